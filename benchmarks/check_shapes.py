@@ -0,0 +1,54 @@
+"""
+Measures the overhead of the shape assertions in the hot paths of GPflow, by
+timing an SVGP-style evaluation (conditional, KL divergence and variational
+expectations) with `gpflow.config` shape checks enabled and disabled, both in
+eager mode and compiled with `tf.function`.
+
+Run with
+
+    python benchmarks/check_shapes.py
+"""
+
+import timeit
+
+import numpy as np
+import tensorflow as tf
+
+import gpflow
+from gpflow.config import Config, as_context
+
+
+def make_objective(num_data=16, num_inducing=8, num_latent=2):
+    rng = np.random.RandomState(0)
+    X = rng.randn(num_data, 1)
+    Y = rng.randn(num_data, num_latent)
+    model = gpflow.models.SVGP(
+        gpflow.kernels.SquaredExponential(),
+        gpflow.likelihoods.Gaussian(),
+        gpflow.inducing_variables.InducingPoints(X[:num_inducing].copy()),
+        num_latent_gps=num_latent,
+    )
+    return model.training_loss_closure((X, Y), compile=False)
+
+
+def benchmark(number=200):
+    results = {}
+    for check_shapes in (True, False):
+        with as_context(Config(check_shapes=check_shapes)):
+            objective = make_objective()
+            compiled = tf.function(objective)
+            compiled()  # trace with the current config
+            results[("eager", check_shapes)] = timeit.timeit(objective, number=number) / number
+            results[("compiled", check_shapes)] = timeit.timeit(compiled, number=number) / number
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    for mode in ("eager", "compiled"):
+        with_checks, without_checks = results[(mode, True)], results[(mode, False)]
+        print(
+            f"{mode:>8}: {1e3 * with_checks:.3f} ms with shape checks, "
+            f"{1e3 * without_checks:.3f} ms without "
+            f"({100 * (1 - without_checks / with_checks):.1f}% saved)"
+        )
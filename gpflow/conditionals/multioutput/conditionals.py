@@ -18,18 +18,20 @@ from ...kernels import (
     MultioutputKernel,
     SeparateIndependent,
     SharedIndependent,
+    StackedSeparateIndependent,
     IndependentLatent,
     LinearCoregionalization,
 )
-from ...config import default_float, default_jitter
+from ...config import default_jitter
 from ..dispatch import conditional
 from ..util import (
     base_conditional,
+    batched_base_conditional,
     expand_independent_outputs,
     fully_correlated_conditional,
     independent_interdomain_conditional,
     mix_latent_gp,
-    rollaxis_left,
+    rollaxis_right,
 )
 
 
@@ -86,6 +88,12 @@ def shared_independent_conditional(
 @conditional.register(object, SeparateIndependentInducingVariables, SeparateIndependent, object)
 @conditional.register(object, SharedIndependentInducingVariables, SeparateIndependent, object)
 @conditional.register(object, SeparateIndependentInducingVariables, SharedIndependent, object)
+@conditional.register(
+    object, SeparateIndependentInducingVariables, StackedSeparateIndependent, object
+)
+@conditional.register(
+    object, SharedIndependentInducingVariables, StackedSeparateIndependent, object
+)
 def separate_independent_conditional(
     Xnew,
     inducing_variable,
@@ -115,29 +123,21 @@ def separate_independent_conditional(
     Kmms = covariances.Kuu(inducing_variable, kernel, jitter=default_jitter())  # [P, M, M]
     Kmns = covariances.Kuf(inducing_variable, kernel, Xnew)  # [P, M, N]
     if isinstance(kernel, Combination):
-        kernels = kernel.kernels
-    else:
-        kernels = [kernel.kernel] * len(inducing_variable.inducing_variable_list)
-    Knns = tf.stack([k.K(Xnew) if full_cov else k.K_diag(Xnew) for k in kernels], axis=0)
-    fs = tf.transpose(f)[:, :, None]  # [P, M, 1]
-    # [P, 1, M, M]  or  [P, M, 1]
-    q_sqrts = tf.transpose(q_sqrt)[:, :, None] if q_sqrt.shape.ndims == 2 else q_sqrt[:, None, :, :]
-
-    def single_gp_conditional(t):
-        Kmm, Kmn, Knn, f, q_sqrt = t
-        return base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, white=white)
-
-    rmu, rvar = tf.map_fn(
-        single_gp_conditional, (Kmms, Kmns, Knns, fs, q_sqrts), (default_float(), default_float())
-    )  # [P, N, 1], [P, 1, N, N] or [P, N, 1]
-
-    fmu = rollaxis_left(tf.squeeze(rmu, axis=-1), 1)  # [N, P]
-
-    if full_cov:
-        fvar = tf.squeeze(rvar, axis=-3)  # [..., 0, :, :]  # [P, N, N]
+        Knns = tf.stack([k.K(Xnew) if full_cov else k.K_diag(Xnew) for k in kernel.kernels], axis=0)
+    elif isinstance(kernel, StackedSeparateIndependent):
+        if full_cov:
+            Knns = kernel.K(Xnew, full_output_cov=False)  # [P, ..., N, N]
+        else:
+            Knns = rollaxis_right(kernel.K_diag(Xnew, full_output_cov=False), 1)  # [P, ..., N]
     else:
-        fvar = rollaxis_left(tf.squeeze(rvar, axis=-1), 1)  # [N, P]
+        # the same kernel is shared by all outputs: evaluate it only once
+        Knn = kernel.kernel.K(Xnew) if full_cov else kernel.kernel.K_diag(Xnew)
+        Knns = tf.broadcast_to(Knn[None], tf.concat([tf.shape(Kmns)[:1], tf.shape(Knn)], 0))
 
+    # [N, P],  [P, N, N] or [N, P]
+    fmu, fvar = batched_base_conditional(
+        Kmns, Kmms, Knns, f, full_cov=full_cov, q_sqrt=q_sqrt, white=white
+    )
     return fmu, expand_independent_outputs(fvar, full_cov, full_output_cov)
 
 
@@ -282,6 +282,9 @@ def coregionalization_conditional(
     - See `gpflow.conditionals._conditional` for a detailed explanation of
       conditional in the single-output case.
     - See the multioutput notebook for more information about the multioutput framework.
+
+    If `kernel.lazy_output_cov` is set, the output covariance for full_cov=False
+    and full_output_cov=True is returned as a lazy `MixedOutputCovariance`.
     """
     ind_conditional = conditional.dispatch(
         object, SeparateIndependentInducingVariables, SeparateIndependent, object
@@ -296,4 +299,7 @@ def coregionalization_conditional(
         full_output_cov=False,
         white=white,
     )  # [N, L], [L, N, N] or [N, L]
-    return mix_latent_gp(kernel.W, gmu, gvar, full_cov, full_output_cov)
+    lazy_output_cov = kernel.lazy_output_cov and full_output_cov and not full_cov
+    return mix_latent_gp(
+        kernel.W, gmu, gvar, full_cov, full_output_cov, lazy_output_cov=lazy_output_cov
+    )
@@ -1,8 +1,10 @@
 from typing import Optional
+
+import numpy as np
 import tensorflow as tf
 
-from ..config import default_float, default_jitter
-from ..utilities.ops import leading_transpose
+from ..config import default_float, default_jitter, default_latent_block_size
+from ..utilities.ops import assert_shapes, leading_transpose, map_row_blocks
 
 
 def base_conditional(
@@ -14,6 +16,7 @@ def base_conditional(
     full_cov=False,
     q_sqrt: Optional[tf.Tensor] = None,
     white=False,
+    latent_block_size: Optional[int] = None,
 ):
     r"""
     Given a g1 and g2, and distribution p and q such that
@@ -28,6 +31,13 @@ def base_conditional(
     This method computes the mean and (co)variance of
       q(g1) = ∫ q(g2) p(g1 | g2)
 
+    Leading dimensions of Kmn are folded into the columns of the triangular
+    solves, so that neither the Cholesky factor of Kmm nor the projection
+    matrix A is broadcast over them. The contribution of q_sqrt to the
+    variance is computed for `latent_block_size` latent functions at a time,
+    so that at most a [latent_block_size, M, ... * N] tensor is held instead of
+    the [R, M, ... * N] tensor q_sqrtᵀ A.
+
     :param Kmn: [M, ..., N]
     :param Kmm: [M, M]
     :param Knn: [..., N, N]  or  N
@@ -36,28 +46,24 @@ def base_conditional(
     :param q_sqrt: If this is a Tensor, it must have shape [R, M, M] (lower
         triangular) or [M, R] (diagonal)
     :param white: bool
+    :param latent_block_size: optional number of latent functions whose
+        variance contribution is computed at once. Defaults to
+        `gpflow.config.default_latent_block_size()`, which is None (all R
+        computed together) unless configured; the config setting applies to all
+        conditionals of the models.
     :return: [N, R]  or [R, N, N]
     """
     # compute kernel stuff
     num_func = tf.shape(f)[-1]  # R
     N = tf.shape(Kmn)[-1]
     M = tf.shape(f)[-2]
+    leading_dims = tf.shape(Kmn)[1:-1]
 
-    # get the leadings dims in Kmn to the front of the tensor
-    # if Kmn has rank two, i.e. [M, N], this is the identity op.
-    K = tf.rank(Kmn)
-    perm = tf.concat(
-        [
-            tf.reshape(tf.range(1, K - 1), [K - 2]),  # leading dims (...)
-            tf.reshape(0, [1]),  # [M]
-            tf.reshape(K - 1, [1]),
-        ],
-        0,
-    )  # [N]
-    Kmn = tf.transpose(Kmn, perm)  # [..., M, N]
+    # [M, S, N] view of Kmn, with S the product of the leading dimensions
+    Kmn_blocks = tf.reshape(Kmn, [M, -1, N])
 
     shape_constraints = [
-        (Kmn, [..., "M", "N"]),
+        (Kmn_blocks, ["M", "S", "N"]),
         (Kmm, ["M", "M"]),
         (Knn, [..., "N", "N"] if full_cov else [..., "N"]),
         (f, ["M", "R"]),
@@ -66,7 +72,7 @@ def base_conditional(
         shape_constraints.append(
             (q_sqrt, (["M", "R"] if q_sqrt.shape.ndims == 2 else ["R", "M", "M"]))
         )
-    tf.debugging.assert_shapes(
+    assert_shapes(
         shape_constraints,
         message="base_conditional() arguments "
         "[Note that this check verifies the shape of an alternative "
@@ -74,62 +80,83 @@ def base_conditional(
         "shape.]",
     )
 
-    leading_dims = tf.shape(Kmn)[:-2]
+    def covariance(B):
+        # [..., M, S * N]  ->  [..., S, N, N], summed over M
+        B_blocks = tf.reshape(B, tf.concat([tf.shape(B)[:-1], [-1, N]], 0))
+        return tf.einsum("...msn,...msk->...snk", B_blocks, B_blocks)
+
     Lm = tf.linalg.cholesky(Kmm)  # [M, M]
 
     # Compute the projection matrix A
-    Lm = tf.broadcast_to(Lm, tf.concat([leading_dims, tf.shape(Lm)], 0))  # [..., M, M]
-    A = tf.linalg.triangular_solve(Lm, Kmn, lower=True)  # [..., M, N]
+    A = tf.linalg.triangular_solve(Lm, tf.reshape(Kmn, [M, -1]), lower=True)  # [M, S * N]
 
     # compute the covariance due to the conditioning
     if full_cov:
-        fvar = Knn - tf.linalg.matmul(A, A, transpose_a=True)  # [..., N, N]
-        cov_shape = tf.concat([leading_dims, [num_func, N, N]], 0)
-        fvar = tf.broadcast_to(tf.expand_dims(fvar, -3), cov_shape)  # [..., R, N, N]
+        cov_shape = tf.concat([leading_dims, [N, N]], 0)
+        fvar = Knn - tf.reshape(covariance(A), cov_shape)  # [..., N, N]
     else:
-        fvar = Knn - tf.reduce_sum(tf.square(A), -2)  # [..., N]
-        cov_shape = tf.concat([leading_dims, [num_func, N]], 0)  # [..., R, N]
-        fvar = tf.broadcast_to(tf.expand_dims(fvar, -2), cov_shape)  # [..., R, N]
+        var_shape = tf.concat([leading_dims, [N]], 0)
+        fvar = Knn - tf.reshape(tf.reduce_sum(tf.square(A), 0), var_shape)  # [..., N]
 
     # another backsubstitution in the unwhitened case
     if not white:
-        A = tf.linalg.triangular_solve(tf.linalg.adjoint(Lm), A, lower=False)
+        A = tf.linalg.triangular_solve(Lm, A, lower=True, adjoint=True)  # [M, S * N]
 
     # construct the conditional mean
-    f_shape = tf.concat([leading_dims, [M, num_func]], 0)  # [..., M, R]
-    f = tf.broadcast_to(f, f_shape)  # [..., M, R]
-    fmean = tf.linalg.matmul(A, f, transpose_a=True)  # [..., N, R]
+    fmean = tf.linalg.matmul(A, f, transpose_a=True)  # [S * N, R]
+    fmean = tf.reshape(fmean, tf.concat([leading_dims, [N, num_func]], 0))  # [..., N, R]
 
     if q_sqrt is not None:
         q_sqrt_dims = q_sqrt.shape.ndims
         if q_sqrt_dims == 2:
-            LTA = A * tf.expand_dims(tf.transpose(q_sqrt), 2)  # [R, M, N]
+            q_sqrt_rows = tf.transpose(q_sqrt)  # [R, M]
         elif q_sqrt_dims == 3:
-            L = tf.linalg.band_part(q_sqrt, -1, 0)  # force lower triangle # [R, M, M]
-            L_shape = tf.shape(L)
-            L = tf.broadcast_to(L, tf.concat([leading_dims, L_shape], 0))
-
-            shape = tf.concat([leading_dims, [num_func, M, N]], axis=0)
-            A_tiled = tf.broadcast_to(tf.expand_dims(A, -3), shape)
-            LTA = tf.linalg.matmul(L, A_tiled, transpose_a=True)  # [R, M, N]
+            q_sqrt_rows = tf.reshape(q_sqrt, [num_func, -1])  # [R, M * M]
         else:  # pragma: no cover
             raise ValueError("Bad dimension for q_sqrt: %s" % str(q_sqrt.shape.ndims))
 
-        if full_cov:
-            fvar = fvar + tf.linalg.matmul(LTA, LTA, transpose_a=True)  # [R, N, N]
+        def latent_variances(q_sqrt_block):
+            # variance contribution of a block of B latent functions
+            if q_sqrt_dims == 2:  # q_sqrt_block is [B, M]
+                LTA = q_sqrt_block[:, :, None] * A  # [B, M, S * N]
+            else:
+                # force lower triangle
+                L = tf.linalg.band_part(tf.reshape(q_sqrt_block, [-1, M, M]), -1, 0)  # [B, M, M]
+                LTA = tf.linalg.matmul(L, A, transpose_a=True)  # [B, M, S * N]
+            if full_cov:
+                return covariance(LTA)  # [B, S, N, N]
+            return tf.reduce_sum(tf.square(LTA), -2)  # [B, S * N]
+
+        if latent_block_size is None:
+            latent_block_size = default_latent_block_size()
+        if latent_block_size is None:
+            q_var = latent_variances(q_sqrt_rows)
         else:
-            fvar = fvar + tf.reduce_sum(tf.square(LTA), -2)  # [R, N]
+            q_var = map_row_blocks(latent_variances, q_sqrt_rows, latent_block_size)
 
-    if not full_cov:
-        fvar = tf.linalg.adjoint(fvar)  # [N, R]
+        if full_cov:
+            # [R, S, N, N]  ->  [..., R, N, N]
+            q_var = tf.transpose(q_var, [1, 0, 2, 3])
+            q_var = tf.reshape(q_var, tf.concat([leading_dims, [num_func, N, N]], 0))
+            fvar = tf.expand_dims(fvar, -3) + q_var  # [..., R, N, N]
+        else:
+            # [R, S * N]  ->  [..., N, R]
+            q_var = tf.reshape(tf.transpose(q_var), tf.concat([leading_dims, [N, num_func]], 0))
+            fvar = tf.expand_dims(fvar, -1) + q_var  # [..., N, R]
+    elif full_cov:
+        cov_shape = tf.concat([leading_dims, [num_func, N, N]], 0)
+        fvar = tf.broadcast_to(tf.expand_dims(fvar, -3), cov_shape)  # [..., R, N, N]
+    else:
+        var_shape = tf.concat([leading_dims, [N, num_func]], 0)
+        fvar = tf.broadcast_to(tf.expand_dims(fvar, -1), var_shape)  # [..., N, R]
 
     shape_constraints = [
-        (Kmn, [..., "M", "N"]),  # tensor included again for N dimension
+        (Kmn_blocks, ["M", "S", "N"]),  # tensor included again for N dimension
         (f, [..., "M", "R"]),  # tensor included again for R dimension
         (fmean, [..., "N", "R"]),
         (fvar, [..., "R", "N", "N"] if full_cov else [..., "N", "R"]),
     ]
-    tf.debugging.assert_shapes(shape_constraints, message="base_conditional() return values")
+    assert_shapes(shape_constraints, message="base_conditional() return values")
 
     return fmean, fvar
 
@@ -143,7 +170,12 @@ def sample_mvn(mean, cov, cov_structure=None, num_samples=None):
     - "diag": cov holds the diagonal elements of the covariance matrix
     - "full": cov holds the full covariance matrix (without jitter)
     :return: sample from the MVN of shape [..., (S), N, D], S = num_samples
+
+    `cov` may also be a `MixedOutputCovariance`, in which case `cov_structure`
+    is ignored and the samples are drawn through its low-rank structure.
     """
+    if isinstance(cov, MixedOutputCovariance):
+        return cov.sample(mean, num_samples=num_samples)
     if cov_structure not in ("diag", "full"):
         raise ValueError("cov_structure must be 'diag' or 'full'")
 
@@ -151,7 +183,7 @@ def sample_mvn(mean, cov, cov_structure=None, num_samples=None):
         (mean, [..., "N", "D"]),
         (cov, [..., "N", "D"] if cov_structure == "diag" else [..., "N", "D", "D"]),
     ]
-    tf.debugging.assert_shapes(shape_constraints, message="sample_mvn() arguments")
+    assert_shapes(shape_constraints, message="sample_mvn() arguments")
 
     mean_shape = tf.shape(mean)
     S = num_samples if num_samples is not None else 1
@@ -179,7 +211,7 @@ def sample_mvn(mean, cov, cov_structure=None, num_samples=None):
         (mean, [..., "N", "D"]),
         (samples, [..., "S", "N", "D"]),
     ]
-    tf.debugging.assert_shapes(shape_constraints, message="sample_mvn() return values")
+    assert_shapes(shape_constraints, message="sample_mvn() return values")
 
     if num_samples is None:
         return tf.squeeze(samples, axis=-3)  # [..., N, D]
@@ -214,6 +246,99 @@ def expand_independent_outputs(fvar, full_cov, full_output_cov):
     return fvar
 
 
+def batched_base_conditional(
+    Kmns: tf.Tensor,
+    Kmms: tf.Tensor,
+    Knns: tf.Tensor,
+    f: tf.Tensor,
+    *,
+    full_cov=False,
+    q_sqrt: Optional[tf.Tensor] = None,
+    white=False,
+):
+    """
+    Computes `base_conditional` for P independent GPs at once, each with its own
+    Kmm, Kmn and Knn. Instead of mapping `base_conditional` over the outputs, the
+    Cholesky factorisations and triangular solves are batched over [P, M, M].
+    Any leading dimensions of the inputs are folded into the N dimension of the
+    triangular solves, so that the Cholesky factors are never broadcast.
+
+    :param Kmns: [P, M, ..., N]
+    :param Kmms: [P, M, M]
+    :param Knns: [P, ..., N, N]  or  [P, ..., N]
+    :param f: [M, P]
+    :param full_cov: bool
+    :param q_sqrt: If this is a Tensor, it must have shape [P, M, M] (lower
+        triangular) or [M, P] (diagonal)
+    :param white: bool
+    :return: [..., N, P]  and  [P, ..., N, N] or [..., N, P]
+    """
+    Kmns_shape = tf.shape(Kmns)
+    num_func, M, N = Kmns_shape[0], Kmns_shape[1], Kmns_shape[-1]
+    leading_dims = Kmns_shape[2:-1]
+    Kmns = tf.reshape(Kmns, [num_func, M, -1])  # [P, M, ... * N]
+
+    shape_constraints = [
+        (Kmns, ["P", "M", "K"]),
+        (Kmms, ["P", "M", "M"]),
+        (f, ["M", "P"]),
+    ]
+    if q_sqrt is not None:
+        shape_constraints.append(
+            (q_sqrt, (["M", "P"] if q_sqrt.shape.ndims == 2 else ["P", "M", "M"]))
+        )
+    assert_shapes(shape_constraints, message="batched_base_conditional() arguments")
+
+    def blocks(A):
+        # [P, M, ... * N]  ->  [P, M, S, N] with S the product of the leading dims
+        return tf.reshape(A, [num_func, M, -1, N])
+
+    def covariance(A):
+        # [P, M, ... * N]  ->  [P, ..., N, N]
+        cov = tf.einsum("pmsn,pmsk->psnk", blocks(A), blocks(A))
+        return tf.reshape(cov, tf.concat([[num_func], leading_dims, [N, N]], 0))
+
+    def variance(A):
+        # [P, M, ... * N]  ->  [P, ..., N]
+        var = tf.reduce_sum(tf.square(A), -2)
+        return tf.reshape(var, tf.concat([[num_func], leading_dims, [N]], 0))
+
+    Lm = tf.linalg.cholesky(Kmms)  # [P, M, M]
+    A = tf.linalg.triangular_solve(Lm, Kmns, lower=True)  # [P, M, ... * N]
+
+    # compute the covariance due to the conditioning
+    if full_cov:
+        fvar = Knns - covariance(A)  # [P, ..., N, N]
+    else:
+        fvar = Knns - variance(A)  # [P, ..., N]
+
+    # another backsubstitution in the unwhitened case
+    if not white:
+        A = tf.linalg.triangular_solve(Lm, A, lower=True, adjoint=True)  # [P, M, ... * N]
+
+    fmean = tf.einsum("pmk,mp->kp", A, f)  # [... * N, P]
+    fmean = tf.reshape(fmean, tf.concat([leading_dims, [N, num_func]], 0))  # [..., N, P]
+
+    if q_sqrt is not None:
+        if q_sqrt.shape.ndims == 2:
+            LTA = A * tf.transpose(q_sqrt)[:, :, None]  # [P, M, ... * N]
+        elif q_sqrt.shape.ndims == 3:
+            L = tf.linalg.band_part(q_sqrt, -1, 0)  # force lower triangle # [P, M, M]
+            LTA = tf.linalg.matmul(L, A, transpose_a=True)  # [P, M, ... * N]
+        else:  # pragma: no cover
+            raise ValueError("Bad dimension for q_sqrt: %s" % str(q_sqrt.shape.ndims))
+
+        if full_cov:
+            fvar = fvar + covariance(LTA)  # [P, ..., N, N]
+        else:
+            fvar = fvar + variance(LTA)  # [P, ..., N]
+
+    if not full_cov:
+        fvar = rollaxis_left(fvar, 1)  # [..., N, P]
+
+    return fmean, fvar
+
+
 def independent_interdomain_conditional(
     Kmn, Kmm, Knn, f, *, full_cov=False, full_output_cov=False, q_sqrt=None, white=False
 ):
@@ -296,7 +421,7 @@ def independent_interdomain_conditional(
     shape_constraints.extend(
         [(Knn, intended_cov_shape), (fmean, ["N", "P"]), (fvar, intended_cov_shape),]
     )
-    tf.debugging.assert_shapes(shape_constraints, message="independent_interdomain_conditional()")
+    assert_shapes(shape_constraints, message="independent_interdomain_conditional()")
 
     return fmean, fvar
 
@@ -431,7 +556,7 @@ def fully_correlated_conditional_repeat(
     shape_constraints.extend(
         [(Knn, intended_cov_shape), (fmean, ["R", "N", "P"]), (fvar, ["R"] + intended_cov_shape),]
     )
-    tf.debugging.assert_shapes(shape_constraints, message="fully_correlated_conditional_repeat()")
+    assert_shapes(shape_constraints, message="fully_correlated_conditional_repeat()")
 
     return fmean, fvar
 
@@ -452,7 +577,7 @@ def rollaxis_right(A, num_rolls):
     return tf.transpose(A, perm)
 
 
-def mix_latent_gp(W, g_mean, g_var, full_cov, full_output_cov):
+def mix_latent_gp(W, g_mean, g_var, full_cov, full_output_cov, lazy_output_cov=False):
     r"""Takes the mean and variance of an uncorrelated L-dimensional latent GP
     and returns the mean and the variance of the mixed GP, `f = W g`,
     where both f and g are GPs, with W having a shape [P, L]
@@ -460,8 +585,17 @@ def mix_latent_gp(W, g_mean, g_var, full_cov, full_output_cov):
     :param W: [P, L]
     :param g_mean: [..., N, L]
     :param g_var: [..., N, L] (full_cov = False) or [L, ..., N, N] (full_cov = True)
+    :param lazy_output_cov: if True (and `full_cov` is False), the output
+        covariance is returned as a `MixedOutputCovariance` instead of a dense
+        [..., N, P, P] tensor.
     :return: f_mean and f_var, shape depends on `full_cov` and `full_output_cov`
     """
+    if lazy_output_cov:
+        if full_cov:
+            raise ValueError("Lazy output covariances require full_cov=False.")
+        f_mean = tf.tensordot(g_mean, W, [[-1], [-1]])  # [..., N, P]
+        return f_mean, MixedOutputCovariance(W, g_var)
+
     shape_constraints = [
         (W, ["P", "L"]),
         (g_mean, [..., "N", "L"]),
@@ -506,6 +640,113 @@ def mix_latent_gp(W, g_mean, g_var, full_cov, full_output_cov):
     shape_constraints.extend(
         [(f_mean, [..., "N", "P"]), (f_var, intended_cov_shape),]
     )
-    tf.debugging.assert_shapes(shape_constraints, message="mix_latent_gp()")
+    assert_shapes(shape_constraints, message="mix_latent_gp()")
 
     return f_mean, f_var
+
+
+class MixedOutputCovariance(tf.experimental.ExtensionType):
+    r"""
+    Lazy representation of the output covariance of a linearly mixed GP,
+
+        Σₙ = W diag(g_var[n]) Wᵀ + diag(diag[n]),
+
+    for every data point n, with W [P, L] and g_var [..., N, L]. For many outputs
+    P and few latent GPs L, it only holds O(NL + PL) values instead of the
+    O(NP²) of the dense [..., N, P, P] tensor, which is only formed by
+    `to_dense`. Sampling costs O(NPL), and `log_density` uses the matrix
+    determinant lemma and the Woodbury identity at O(NPL²) cost.
+
+    It is a TensorFlow extension type, so that it can be returned from and passed
+    to compiled functions.
+    """
+
+    W: tf.Tensor
+    g_var: tf.Tensor
+    diag: Optional[tf.Tensor]
+
+    def __init__(self, W: tf.Tensor, g_var: tf.Tensor, diag: Optional[tf.Tensor] = None):
+        """
+        :param W: mixing matrix [P, L]
+        :param g_var: variances of the latent GPs [..., N, L]
+        :param diag: optional diagonal term (e.g. the likelihood variance), broadcastable
+            to [..., N, P]
+        """
+        self.W = tf.convert_to_tensor(W)
+        self.g_var = tf.convert_to_tensor(g_var)
+        self.diag = diag if diag is None else tf.convert_to_tensor(diag, dtype=self.W.dtype)
+
+    def add_diagonal(self, diag: tf.Tensor) -> "MixedOutputCovariance":
+        """
+        Returns the covariance with `diag` (broadcastable to [..., N, P]) added to
+        its diagonal.
+        """
+        diag = tf.convert_to_tensor(diag, dtype=self.W.dtype)
+        diag = diag if self.diag is None else self.diag + diag
+        return MixedOutputCovariance(self.W, self.g_var, diag)
+
+    def diag_part(self) -> tf.Tensor:
+        """
+        :return: the marginal variances [..., N, P]
+        """
+        variance = tf.tensordot(self.g_var, self.W ** 2, [[-1], [-1]])  # [..., N, P]
+        return variance if self.diag is None else variance + self.diag
+
+    def to_dense(self) -> tf.Tensor:
+        """
+        :return: the dense covariance [..., N, P, P]
+        """
+        g_var_W = tf.expand_dims(self.g_var, axis=-2) * self.W  # [..., N, P, L]
+        cov = tf.tensordot(g_var_W, self.W, [[-1], [-1]])  # [..., N, P, P]
+        if self.diag is None:
+            return cov
+        return tf.linalg.set_diag(cov, tf.linalg.diag_part(cov) + self.diag)
+
+    def sample(self, mean: tf.Tensor, num_samples: Optional[int] = None) -> tf.Tensor:
+        """
+        Draws samples from N(mean, Σ) as mean + W (√g_var ε) + √diag ε'.
+        :param mean: [..., N, P]
+        :return: samples [..., (S), N, P], S = num_samples
+        """
+        S = num_samples if num_samples is not None else 1
+        leading_dims = tf.shape(self.g_var)[:-2]
+        N, L = tf.shape(self.g_var)[-2], tf.shape(self.g_var)[-1]
+        eps_shape = tf.concat([leading_dims, [S, N, L]], 0)
+        eps = tf.random.normal(eps_shape, dtype=self.W.dtype)  # [..., S, N, L]
+        latent = tf.sqrt(self.g_var)[..., None, :, :] * eps  # [..., S, N, L]
+        samples = mean[..., None, :, :] + tf.tensordot(latent, self.W, [[-1], [-1]])
+        if self.diag is not None:
+            noise = tf.random.normal(tf.shape(samples), dtype=self.W.dtype)
+            diag = tf.broadcast_to(self.diag, tf.shape(mean))  # [..., N, P]
+            samples += tf.sqrt(diag)[..., None, :, :] * noise  # [..., S, N, P]
+        if num_samples is None:
+            return tf.squeeze(samples, axis=-3)  # [..., N, P]
+        return samples  # [..., S, N, P]
+
+    def log_density(self, mean: tf.Tensor, Y: tf.Tensor) -> tf.Tensor:
+        """
+        Computes log N(Y; mean, Σ) for every data point. Requires a strictly
+        positive diagonal term.
+        :param mean: [..., N, P]
+        :param Y: [..., N, P]
+        :return: [..., N]
+        """
+        if self.diag is None:
+            raise ValueError("log_density requires a positive diagonal term, see `add_diagonal`.")
+        diag = tf.broadcast_to(self.diag, tf.shape(Y))  # [..., N, P]
+        err = Y - mean  # [..., N, P]
+        V = tf.sqrt(self.g_var)[..., None, :] * self.W  # [..., N, P, L]
+        V_scaled = V / diag[..., None]  # D⁻¹ V
+        capacitance = tf.linalg.matmul(V, V_scaled, transpose_a=True)  # [..., N, L, L]
+        capacitance = tf.linalg.set_diag(capacitance, tf.linalg.diag_part(capacitance) + 1)
+        L_capacitance = tf.linalg.cholesky(capacitance)
+        b = tf.linalg.matmul(V_scaled, err[..., None], transpose_a=True)  # [..., N, L, 1]
+        c = tf.linalg.triangular_solve(L_capacitance, b)  # [..., N, L, 1]
+        mahalanobis = tf.reduce_sum(tf.square(err) / diag, -1) - tf.reduce_sum(
+            tf.square(c), [-2, -1]
+        )
+        log_det = tf.reduce_sum(tf.math.log(diag), -1) + 2 * tf.reduce_sum(
+            tf.math.log(tf.linalg.diag_part(L_capacitance)), -1
+        )
+        num_outputs = tf.cast(tf.shape(Y)[-1], Y.dtype)
+        return -0.5 * (mahalanobis + log_det + num_outputs * np.log(2 * np.pi))
@@ -6,6 +6,8 @@ The module provides functions to modify default settings of GPflow, such as:
 - the type of positive transformation
 - a value for a minimum shift from zero for the positive transformation
 - an output format for `gpflow.utilities.print_summary`
+- whether shape assertions are evaluated in the hot paths
+- the number of latent functions whose conditional variance is computed at once
 
 The module holds global configuration :class:`Config` variable that stores all
 setting values.
@@ -25,6 +27,8 @@ Full set of environment variables and available options:
 * ``GPFLOW_POSITIVE_MINIMUM``: Any positive float number
 * ``GPFLOW_SUMMARY_FMT``: "notebook" or any other format that :mod:`tabulate` can handle.
 * ``GPFLOW_JITTER``: Any positive float number
+* ``GPFLOW_CHECK_SHAPES``: "true" or "false"
+* ``GPFLOW_LATENT_BLOCK_SIZE``: Any positive integer
 
 The user can also change the GPflow configuration temporarily with a context
 manager :func:`as_context`:
@@ -62,6 +66,10 @@ __all__ = [
     "set_default_positive_minimum",
     "default_summary_fmt",
     "set_default_summary_fmt",
+    "default_check_shapes",
+    "set_default_check_shapes",
+    "default_latent_block_size",
+    "set_default_latent_block_size",
     "positive_bijector_type_map",
 ]
 
@@ -79,6 +87,8 @@ class _Values(enum.Enum):
     POSITIVE_MINIMUM = 0.0
     SUMMARY_FMT = "fancy_grid"
     JITTER = 1e-6
+    CHECK_SHAPES = True
+    LATENT_BLOCK_SIZE = None
 
     @property
     def name(self):
@@ -141,6 +151,28 @@ def _default_summary_fmt_factory():
     return _default(_Values.SUMMARY_FMT)
 
 
+def _default_check_shapes_factory():
+    value = _default(_Values.CHECK_SHAPES)
+    if isinstance(value, bool):
+        return value
+    if value.lower() not in ("true", "false"):
+        raise TypeError("Config cannot set the check_shapes value with non boolean type.")
+    return value.lower() == "true"
+
+
+def _default_latent_block_size_factory():
+    value = _default(_Values.LATENT_BLOCK_SIZE)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise TypeError("Config cannot set the latent_block_size value with non integer type.")
+    if value < 1:
+        raise TypeError("Config cannot set the latent_block_size value with non positive value.")
+    return value
+
+
 # The following type alias is for the Config class, to help a static analyser distinguish
 # between the built-in 'float' type and the 'float' type defined in the that class.
 Float = Union[float]
@@ -160,6 +192,12 @@ class Config:
             Default is "softplus".
         positive_minimum: Lower bound for the positive transformation.
         summary_fmt: Summary format for module printing.
+        check_shapes: Whether to evaluate the shape assertions in conditionals, KL
+            divergences, likelihoods and kernels. Default is `True`; set it to `False`
+            to remove their overhead in production runs.
+        latent_block_size: Number of latent functions whose contribution to the
+            variance is computed at once in `base_conditional`, which bounds its memory
+            use for many latent functions. Default is `None`, i.e. all at once.
     """
 
     int: type = field(default_factory=_default_int_factory)
@@ -168,6 +206,8 @@ class Config:
     positive_bijector: str = field(default_factory=_default_positive_bijector_factory)
     positive_minimum: Float = field(default_factory=_default_positive_minimum_factory)
     summary_fmt: str = field(default_factory=_default_summary_fmt_factory)
+    check_shapes: bool = field(default_factory=_default_check_shapes_factory)
+    latent_block_size: Optional[int] = field(default_factory=_default_latent_block_size_factory)
 
 
 def config() -> Config:
@@ -209,6 +249,23 @@ def default_summary_fmt():
     return config().summary_fmt
 
 
+def default_check_shapes():
+    """
+    Whether shape assertions are evaluated. Note that the setting is read when a
+    function is traced, so compiled functions keep the value active at tracing time.
+    """
+    return config().check_shapes
+
+
+def default_latent_block_size():
+    """
+    Number of latent functions whose conditional variance is computed at once, or
+    None for all of them. Like `default_check_shapes`, the setting is read when a
+    function is traced.
+    """
+    return config().latent_block_size
+
+
 def set_config(new_config: Config):
     """Update GPflow config with new settings from `new_config`."""
     global __config
@@ -300,6 +357,33 @@ def set_default_summary_fmt(value: str):
     set_config(replace(config(), summary_fmt=value))
 
 
+def set_default_check_shapes(value: bool):
+    """
+    Sets whether shape assertions are evaluated. Disabling them turns the
+    assertions into no-ops, which removes their overhead in eager mode and lets
+    compiled graphs be fused more aggressively.
+    """
+    if not isinstance(value, bool):
+        raise TypeError("Expected a boolean value")
+
+    set_config(replace(config(), check_shapes=value))
+
+
+def set_default_latent_block_size(value: Optional[int]):
+    """
+    Sets the number of latent functions whose conditional variance is computed at
+    once. Smaller blocks reduce the memory use of predictions with many latent
+    functions; None computes all of them together.
+    """
+    if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+        raise TypeError("Expected an integer value or None")
+
+    if value is not None and value < 1:
+        raise ValueError("Latent block size must be positive")
+
+    set_config(replace(config(), latent_block_size=value))
+
+
 def positive_bijector_type_map() -> Dict[str, type]:
     return {
         "exp": tfp.bijectors.Exp,
@@ -2,4 +2,5 @@ from .dispatch import Kuf
 from .dispatch import Kuu
 
 from . import kufs, kuus
+from .operators import KernelOperator, KufOperator
 from . import multioutput
@@ -25,6 +25,13 @@ def Kuf_sqexp_multiscale(inducing_variable: Multiscale, kernel: SquaredExponenti
 @Kuf.register(InducingPatches, Convolutional, object)
 def Kuf_conv_patch(feat, kern, Xnew):
     Xp = kern.get_patches(Xnew)  # [N, num_patches, patch_len]
-    bigKzx = kern.base_kernel.K(feat.Z, Xp)  # [M, N, P] -- thanks to broadcasting of kernels
-    Kzx = tf.reduce_sum(bigKzx * kern.weights if hasattr(kern, "weights") else bigKzx, [2])
+    if kern.patch_block_size is None:
+        bigKzx = kern.base_kernel.K(feat.Z, Xp)  # [M, N, P] -- thanks to broadcasting of kernels
+        Kzx = tf.reduce_sum(bigKzx * kern.weights if hasattr(kern, "weights") else bigKzx, [2])
+        return Kzx / kern.num_patches
+
+    Kzx = 0.0
+    for block in kern.patch_slices():
+        bigKzx = kern.base_kernel.K(feat.Z, Xp[:, block])  # [M, N, B]
+        Kzx += tf.einsum("mnb,b->mn", bigKzx, kern.weights[block])
     return Kzx / kern.num_patches
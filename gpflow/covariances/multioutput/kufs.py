@@ -14,7 +14,9 @@ from ...kernels import (
     SeparateIndependent,
     LinearCoregionalization,
     SharedIndependent,
+    StackedSeparateIndependent,
 )
+from ...utilities.ops import leading_transpose
 from ..dispatch import Kuf
 
 
@@ -66,6 +68,28 @@ def _Kuf(
     return tf.stack(Kufs, axis=0)  # [L, M, N]
 
 
+@Kuf.register(FallbackSharedIndependentInducingVariables, StackedSeparateIndependent, object)
+def _Kuf(
+    inducing_variable: FallbackSharedIndependentInducingVariables,
+    kernel: StackedSeparateIndependent,
+    Xnew: tf.Tensor,
+):
+    Zs = kernel.scale(inducing_variable.inducing_variable.Z)  # [L, M, D]
+    Kmn = kernel.K_latents(Zs, kernel.scale(Xnew))  # [..., L, M, N]
+    return leading_transpose(Kmn, [-3, -2, ..., -1])  # [L, M, ..., N]
+
+
+@Kuf.register(FallbackSeparateIndependentInducingVariables, StackedSeparateIndependent, object)
+def _Kuf(
+    inducing_variable: FallbackSeparateIndependentInducingVariables,
+    kernel: StackedSeparateIndependent,
+    Xnew: tf.Tensor,
+):
+    Z = tf.stack([f.Z for f in inducing_variable.inducing_variable_list], axis=0)  # [L, M, D]
+    Kmn = kernel.K_latents(kernel.scale(Z, per_output=True), kernel.scale(Xnew))  # [..., L, M, N]
+    return leading_transpose(Kmn, [-3, -2, ..., -1])  # [L, M, ..., N]
+
+
 @Kuf.register(
     (FallbackSeparateIndependentInducingVariables, FallbackSharedIndependentInducingVariables),
     LinearCoregionalization,
@@ -13,6 +13,7 @@ from ...kernels import (
     SeparateIndependent,
     LinearCoregionalization,
     SharedIndependent,
+    StackedSeparateIndependent,
     IndependentLatent,
 )
 from ..dispatch import Kuu
@@ -79,3 +80,29 @@ def _Kuu(
     Kmm = tf.stack(Kmms, axis=0)  # [L, M, M]
     jittermat = tf.eye(len(inducing_variable), dtype=Kmm.dtype)[None, :, :] * jitter
     return Kmm + jittermat
+
+
+@Kuu.register(FallbackSharedIndependentInducingVariables, StackedSeparateIndependent)
+def _Kuu(
+    inducing_variable: FallbackSharedIndependentInducingVariables,
+    kernel: StackedSeparateIndependent,
+    *,
+    jitter=0.0,
+):
+    Zs = kernel.scale(inducing_variable.inducing_variable.Z)  # [L, M, D]
+    Kmm = kernel.K_latents(Zs)  # [L, M, M]
+    jittermat = tf.eye(len(inducing_variable), dtype=Kmm.dtype)[None, :, :] * jitter
+    return Kmm + jittermat
+
+
+@Kuu.register(FallbackSeparateIndependentInducingVariables, StackedSeparateIndependent)
+def _Kuu(
+    inducing_variable: FallbackSeparateIndependentInducingVariables,
+    kernel: StackedSeparateIndependent,
+    *,
+    jitter=0.0,
+):
+    Z = tf.stack([f.Z for f in inducing_variable.inducing_variable_list], axis=0)  # [L, M, D]
+    Kmm = kernel.K_latents(kernel.scale(Z, per_output=True))  # [L, M, M]
+    jittermat = tf.eye(len(inducing_variable), dtype=Kmm.dtype)[None, :, :] * jitter
+    return Kmm + jittermat
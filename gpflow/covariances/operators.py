@@ -0,0 +1,335 @@
+"""
+Lazy linear operators for covariance matrices that are too big to be held in
+memory. The operators evaluate the kernel in tiles on the fly whenever they are
+applied to a vector or matrix, so that only a block of `block_size` rows (or
+columns) of the covariance matrix is live at any time. They are compatible with
+`tf.linalg.LinearOperator`, and can hence be passed to matrix-free solvers such as
+`tf.linalg.experimental.conjugate_gradient`.
+
+If `cache_blocks` is set, tiles evaluated in eager mode are kept and reused by
+subsequent operations. Cached tiles are not updated when the kernel parameters
+change; call `clear_cache` after modifying them.
+"""
+
+import abc
+from typing import Dict, List, Optional, Tuple
+
+import tensorflow as tf
+
+from ..inducing_variables import InducingVariables
+from ..kernels import Kernel
+from .dispatch import Kuf
+
+__all__ = ["KernelOperator", "KufOperator"]
+
+
+class TiledOperator(tf.linalg.LinearOperator, metaclass=abc.ABCMeta):
+    """
+    Base class for linear operators [N, M] that are evaluated in tiles of at most
+    `block_size` rows (if `tile_axis` is 0) or columns (if `tile_axis` is 1).
+    Derived classes implement `_evaluate_block(start, stop)`, which returns the
+    tile of the matrix along `tile_axis`; `start` and `stop` may be Python
+    integers or scalar tensors.
+
+    The tiles are iterated over with `tf.while_loop`, so that the size of the
+    graph does not grow with the number of tiles.
+    """
+
+    tile_axis = 0
+
+    def __init__(
+        self,
+        dtype: tf.DType,
+        shape: Tuple[int, int],
+        block_size: int,
+        cache_blocks: bool,
+        is_self_adjoint: Optional[bool] = None,
+        is_positive_definite: Optional[bool] = None,
+        name: Optional[str] = None,
+    ):
+        if any(dim is None for dim in shape):
+            raise ValueError(
+                f"{self.__class__.__name__} requires statically known input shapes, got {shape}."
+            )
+        if block_size < 1:
+            raise ValueError("`block_size` must be a positive integer.")
+        self._static_shape = tf.TensorShape(shape)
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self._block_cache: Dict[int, tf.Tensor] = {}
+        super().__init__(
+            dtype=dtype,
+            is_self_adjoint=is_self_adjoint,
+            is_positive_definite=is_positive_definite,
+            is_non_singular=True if is_positive_definite else None,
+            is_square=shape[0] == shape[1],
+            name=name,
+        )
+
+    @abc.abstractmethod
+    def _evaluate_block(self, start, stop) -> tf.Tensor:
+        raise NotImplementedError
+
+    def block_bounds(self) -> List[Tuple[int, int]]:
+        """
+        Returns the (start, stop) indices of the tiles along `tile_axis`.
+        """
+        num = self._static_shape[self.tile_axis]
+        return [
+            (start, min(start + self.block_size, num)) for start in range(0, num, self.block_size)
+        ]
+
+    def block(self, index: int) -> tf.Tensor:
+        """
+        Returns the `index`-th tile, using the block cache if enabled.
+        """
+        if index in self._block_cache:
+            return self._block_cache[index]
+        block = self._evaluate_block(*self.block_bounds()[index])
+        if self.cache_blocks and tf.executing_eagerly():
+            self._block_cache[index] = block
+        return block
+
+    def clear_cache(self):
+        """
+        Removes all cached tiles.
+        """
+        self._block_cache = {}
+
+    def _loop_block(self, index: tf.Tensor) -> tf.Tensor:
+        """
+        Returns the `index`-th tile inside `_map_tiles` and `_sum_tiles`, where
+        `index` is a scalar tensor. The block cache is only used in eager mode.
+        """
+        if self.cache_blocks and tf.executing_eagerly():
+            return self.block(int(index))
+        return self._evaluate_block(*self._tile_bounds(index, self._static_shape[self.tile_axis]))
+
+    def _tile_bounds(self, index: tf.Tensor, num: int) -> Tuple[tf.Tensor, tf.Tensor]:
+        start = index * self.block_size
+        return start, tf.minimum(start + self.block_size, num)
+
+    def _num_tiles(self, num: int) -> int:
+        return (num + self.block_size - 1) // self.block_size
+
+    def _map_tiles(self, fn, num: int, axis: int, rank: int) -> tf.Tensor:
+        """
+        Evaluates `fn(index)` for the tiles of a dimension of length `num` in a
+        `tf.while_loop`, and concatenates the results, of rank `rank`, along `axis`.
+        """
+        axis %= rank
+        # TensorArray.concat concatenates along the first axis.
+        to_front = [axis] + [i for i in range(rank) if i != axis]
+        from_front = list(range(1, axis + 1)) + [0] + list(range(axis + 1, rank))
+
+        def body(index, tiles):
+            return index + 1, tiles.write(index, tf.transpose(fn(index), to_front))
+
+        tiles = tf.TensorArray(
+            self.dtype,
+            size=self._num_tiles(num),
+            infer_shape=False,
+            element_shape=tf.TensorShape([None] * rank),
+        )
+        _, tiles = tf.while_loop(
+            lambda index, _: index < self._num_tiles(num),
+            body,
+            (tf.constant(0), tiles),
+            parallel_iterations=1,
+        )
+        return tf.transpose(tiles.concat(), from_front)
+
+    def _sum_tiles(self, fn, num: int) -> tf.Tensor:
+        """
+        Sums `fn(index)` over the tiles of a dimension of length `num` in a
+        `tf.while_loop`.
+        """
+        _, total = tf.while_loop(
+            lambda index, _: index < self._num_tiles(num),
+            lambda index, total: (index + 1, total + fn(index)),
+            (tf.constant(1), fn(tf.constant(0))),
+            parallel_iterations=1,
+        )
+        return total
+
+    def _shape(self):
+        return self._static_shape
+
+    def _shape_tensor(self):
+        return tf.constant(self._static_shape.as_list(), dtype=tf.int32)
+
+    def _matmul(self, x, adjoint=False, adjoint_arg=False):
+        if adjoint_arg:
+            x = tf.linalg.adjoint(x)
+        num = self._static_shape[self.tile_axis]
+        # Tiles along the output dimension are stacked, tiles along the contracted
+        # dimension are summed.
+        if (self.tile_axis == 0) != adjoint:
+            return self._map_tiles(
+                lambda index: tf.matmul(self._loop_block(index), x, adjoint_a=adjoint),
+                num,
+                axis=-2,
+                rank=x.shape.ndims,
+            )
+
+        def contract(index):
+            start, stop = self._tile_bounds(index, num)
+            return tf.matmul(self._loop_block(index), x[..., start:stop, :], adjoint_a=adjoint)
+
+        return self._sum_tiles(contract, num)
+
+    def _to_dense(self):
+        dense = self._map_tiles(
+            self._loop_block, self._static_shape[self.tile_axis], axis=self.tile_axis, rank=2
+        )
+        return tf.ensure_shape(dense, self._static_shape)
+
+
+class KernelOperator(TiledOperator):
+    """
+    Lazy representation of `kernel(X, X2) + diagonal_shift * I`, evaluated in tiles
+    of `block_size` rows.
+
+    If X2 is None, the operator represents the symmetric matrix `kernel(X)` and is
+    flagged as self-adjoint. The diagonal tiles are then evaluated with
+    `kernel(X_block)` rather than `kernel(X_block, X_block)`, so that kernels such
+    as `White` are represented correctly. A `diagonal_shift` (e.g. the noise
+    variance of a Gaussian likelihood, or a jitter) is only allowed in this case.
+
+    Kernel matrices are in general only positive semi-definite (e.g. for the
+    `Linear` kernel, or with repeated inputs), so the operator is only flagged as
+    positive definite, as required by `tf.linalg.experimental.conjugate_gradient`,
+    if a (positive) `diagonal_shift` is given, unless `is_positive_definite` says
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        kernel: Kernel,
+        X: tf.Tensor,
+        X2: Optional[tf.Tensor] = None,
+        *,
+        diagonal_shift=None,
+        block_size: int = 1024,
+        cache_blocks: bool = False,
+        is_positive_definite: Optional[bool] = None,
+        name: str = "KernelOperator",
+    ):
+        """
+        :param kernel: the kernel to evaluate.
+        :param X: inputs [N, D].
+        :param X2: optional inputs [M, D].
+        :param diagonal_shift: optional positive value added to the diagonal of
+            `kernel(X)`.
+        :param block_size: number of rows evaluated at once.
+        :param cache_blocks: whether to keep the evaluated tiles.
+        :param is_positive_definite: whether the represented matrix is positive
+            definite. Defaults to True if `diagonal_shift` is given, else None.
+        """
+        X = tf.convert_to_tensor(X)
+        X2 = X2 if X2 is None else tf.convert_to_tensor(X2)
+        if X2 is not None and diagonal_shift is not None:
+            raise ValueError("`diagonal_shift` is only supported for symmetric operators.")
+        if is_positive_definite is None and diagonal_shift is not None:
+            is_positive_definite = True
+        self.kernel = kernel
+        self.X = X
+        self.X2 = X2
+        self.diagonal_shift = diagonal_shift
+        num_columns = X.shape[0] if X2 is None else X2.shape[0]
+        super().__init__(
+            dtype=X.dtype,
+            shape=(X.shape[0], num_columns),
+            block_size=block_size,
+            cache_blocks=cache_blocks,
+            is_self_adjoint=True if X2 is None else None,
+            is_positive_definite=is_positive_definite,
+            name=name,
+        )
+
+    def _evaluate_block(self, start, stop):
+        X_block = self.X[start:stop]
+        if self.X2 is not None:
+            return self.kernel(X_block, self.X2)
+        diagonal_block = self.kernel(X_block)
+        if self.diagonal_shift is not None:
+            diagonal_block = tf.linalg.set_diag(
+                diagonal_block, tf.linalg.diag_part(diagonal_block) + self.diagonal_shift
+            )
+        # The off-diagonal parts are empty for the first and last tiles.
+        blocks = [
+            self.kernel(X_block, self.X[:start]),
+            diagonal_block,
+            self.kernel(X_block, self.X[stop:]),
+        ]
+        return tf.concat(blocks, axis=-1)
+
+    def _diag_part(self):
+        if self.X2 is None:
+            diagonal = self.kernel(self.X, full_cov=False)
+            if self.diagonal_shift is not None:
+                diagonal += self.diagonal_shift
+            return diagonal
+
+        num = min(self._static_shape[0], self._static_shape[1])
+
+        def diagonal_tile(index):
+            start, stop = self._tile_bounds(index, num)
+            return tf.linalg.diag_part(self.kernel(self.X[start:stop], self.X2[start:stop]))
+
+        return self._map_tiles(diagonal_tile, num, axis=0, rank=1)
+
+    def row_block(self, start: int, stop: int) -> tf.Tensor:
+        """
+        Returns rows `start:stop` of the represented matrix, [stop - start, M].
+        """
+        return self._evaluate_block(start, stop)
+
+
+class KufOperator(TiledOperator):
+    """
+    Lazy representation of `Kuf(inducing_variable, kernel, Xnew)` [M, N] for
+    single-output kernels, evaluated in tiles of `block_size` columns (i.e. data
+    points) through the `Kuf` dispatcher, so that any registered specialisation is
+    used. `Kuu` is of size [M, M] and can be evaluated densely.
+    """
+
+    tile_axis = 1
+
+    def __init__(
+        self,
+        inducing_variable: InducingVariables,
+        kernel: Kernel,
+        Xnew: tf.Tensor,
+        *,
+        block_size: int = 1024,
+        cache_blocks: bool = False,
+        name: str = "KufOperator",
+    ):
+        """
+        :param inducing_variable: the inducing variables.
+        :param kernel: the kernel to evaluate.
+        :param Xnew: inputs [N, D].
+        :param block_size: number of columns evaluated at once.
+        :param cache_blocks: whether to keep the evaluated tiles.
+        """
+        Xnew = tf.convert_to_tensor(Xnew)
+        self.inducing_variable = inducing_variable
+        self.kernel = kernel
+        self.Xnew = Xnew
+        super().__init__(
+            dtype=Xnew.dtype,
+            shape=(len(inducing_variable), Xnew.shape[0]),
+            block_size=block_size,
+            cache_blocks=cache_blocks,
+            name=name,
+        )
+
+    def _evaluate_block(self, start, stop):
+        return Kuf(self.inducing_variable, self.kernel, self.Xnew[start:stop])
+
+    def column_block(self, start: int, stop: int) -> tf.Tensor:
+        """
+        Returns columns `start:stop` of the represented matrix, [M, stop - start].
+        """
+        return self._evaluate_block(start, stop)
@@ -9,6 +9,7 @@ from .multioutput import (
     MultioutputKernel,
     SeparateIndependent,
     SharedIndependent,
+    StackedSeparateIndependent,
     IndependentLatent,
     LinearCoregionalization,
 )
@@ -34,6 +34,7 @@ import numpy as np
 import tensorflow as tf
 
 from ..base import Module
+from ..utilities.ops import square_distance
 
 ActiveDims = Union[slice, list]
 
@@ -94,6 +95,10 @@ class Kernel(Module, metaclass=abc.ABCMeta):
         """
         dims = self.active_dims
         if isinstance(dims, slice):
+            if dims == slice(None):
+                # all dimensions are active: return the inputs themselves, so that
+                # caches keyed on them (see e.g. `Convolutional.cache_patches`) apply
+                return X, X2
             X = X[..., dims]
             if X2 is not None:
                 X2 = X2[..., dims]
@@ -232,16 +237,66 @@ class Combination(Kernel):
 
 class ReducingCombination(Combination):
     def __call__(self, X, X2=None, *, full_cov=True, presliced=False):
-        return self._reduce(
-            [k(X, X2, full_cov=full_cov, presliced=presliced) for k in self.kernels]
-        )
+        if not full_cov:
+            return self._reduce(
+                [k(X, X2, full_cov=full_cov, presliced=presliced) for k in self.kernels]
+            )
+        return self._reduce(self._evaluate_kernels(X, X2, presliced=presliced))
 
     def K(self, X: tf.Tensor, X2: Optional[tf.Tensor] = None) -> tf.Tensor:
-        return self._reduce([k.K(X, X2) for k in self.kernels])
+        return self._reduce(self._evaluate_kernels(X, X2, presliced=True))
 
     def K_diag(self, X: tf.Tensor) -> tf.Tensor:
         return self._reduce([k.K_diag(X) for k in self.kernels])
 
+    def _shared_distance_groups(self) -> List[List[int]]:
+        """
+        Groups the indices of the sub-kernels such that all kernels within a
+        group of more than one element are isotropic stationary kernels with a
+        scalar lengthscale acting on the same `active_dims`. Such kernels only
+        differ by a rescaling of the (unscaled) squared Euclidean distance, which
+        therefore only needs to be computed once per group.
+        """
+        from .stationaries import IsotropicStationary
+
+        groups = {}
+        for i, k in enumerate(self.kernels):
+            shareable = (
+                isinstance(k, IsotropicStationary)
+                and type(k).K is IsotropicStationary.K
+                and not k.ard
+            )
+            if not shareable:
+                key = ("unshared", i)
+            elif isinstance(k.active_dims, slice):
+                key = ("slice", k.active_dims.start, k.active_dims.stop, k.active_dims.step)
+            else:
+                key = ("dims", tuple(np.asarray(k.active_dims).tolist()))
+            groups.setdefault(key, []).append(i)
+        return list(groups.values())
+
+    def _evaluate_kernels(self, X, X2=None, presliced=False) -> List[tf.Tensor]:
+        """
+        Returns the full covariance of each sub-kernel, in the order of
+        `self.kernels`, computing the pairwise squared distance only once for
+        each group returned by `_shared_distance_groups`.
+        """
+        covs = [None] * len(self.kernels)
+        for group in self._shared_distance_groups():
+            if len(group) == 1:
+                i = group[0]
+                covs[i] = self.kernels[i](X, X2, presliced=presliced)
+                continue
+            if presliced:
+                X_sliced, X2_sliced = X, X2
+            else:
+                X_sliced, X2_sliced = self.kernels[group[0]].slice(X, X2)
+            r2 = square_distance(X_sliced, X2_sliced)
+            for i in group:
+                kernel = self.kernels[i]
+                covs[i] = kernel.K_r2(r2 / tf.square(kernel.lengthscales))
+        return covs
+
     @property
     @abc.abstractmethod
     def _reduce(self):
@@ -70,35 +70,44 @@ class ChangePoints(Combination):
         self.kernels = kernels
 
     def K(self, X: tf.Tensor, X2: Optional[tf.Tensor] = None) -> tf.Tensor:
-        sig_X = self._sigmoids(X)  # N x 1 x Ncp
-        sig_X2 = self._sigmoids(X2) if X2 is not None else sig_X
+        # Each kernel is weighted by the product of the sigmoid that starts it
+        # and the one that stops it, evaluated at both inputs; this weight is
+        # the outer product of the per-input `_regime_weights`. The weighted
+        # kernels are accumulated one at a time, so that only N x M tensors
+        # are live.
+        weights_X = self._regime_weights(X)  # N x (Ncp + 1)
+        weights_X2 = self._regime_weights(X2) if X2 is not None else weights_X
+
+        K = 0.0
+        for i, kernel in enumerate(self.kernels):
+            K += weights_X[:, i, None] * kernel(X, X2) * weights_X2[None, :, i]
+        return K
 
-        # `starters` are the sigmoids going from 0 -> 1, whilst `stoppers` go
-        # from 1 -> 0, dimensions are N x N x Ncp
-        starters = sig_X * tf.transpose(sig_X2, perm=(1, 0, 2))
-        stoppers = (1 - sig_X) * tf.transpose((1 - sig_X2), perm=(1, 0, 2))
+    def K_diag(self, X: tf.Tensor) -> tf.Tensor:
+        weights_X = self._regime_weights(X)  # N x (Ncp + 1)
 
-        # prepend `starters` with ones and append ones to `stoppers` since the
-        # first kernel has no start and the last kernel has no end
-        N = tf.shape(X)[0]
-        ones = tf.ones((N, N, 1), dtype=X.dtype)
-        starters = tf.concat([ones, starters], axis=2)
-        stoppers = tf.concat([stoppers, ones], axis=2)
+        K_diag = 0.0
+        for i, kernel in enumerate(self.kernels):
+            K_diag += tf.square(weights_X[:, i]) * kernel(X, full_cov=False)
+        return K_diag
 
-        # now combine with the underlying kernels
-        kernel_stack = tf.stack([k(X, X2) for k in self.kernels], axis=2)
-        return tf.reduce_sum(kernel_stack * starters * stoppers, axis=2)
+    def _regime_weights(self, X: tf.Tensor) -> tf.Tensor:
+        """
+        Returns the weight of each kernel at each input, i.e. the product of the
+        sigmoid going from 0 -> 1 at the start of its regime and the one going
+        from 1 -> 0 at its end. The first kernel has no start and the last kernel
+        has no end.
 
-    def K_diag(self, X: tf.Tensor) -> tf.Tensor:
+        :param X: inputs, N x 1
+        :return: N x (Ncp + 1)
+        """
         N = tf.shape(X)[0]
         sig_X = tf.reshape(self._sigmoids(X), (N, -1))  # N x Ncp
 
         ones = tf.ones((N, 1), dtype=X.dtype)
-        starters = tf.concat([ones, sig_X * sig_X], axis=1)  # N x Ncp
-        stoppers = tf.concat([(1 - sig_X) * (1 - sig_X), ones], axis=1)
-
-        kernel_stack = tf.stack([k(X, full_cov=False) for k in self.kernels], axis=1)
-        return tf.reduce_sum(kernel_stack * starters * stoppers, axis=1)
+        starters = tf.concat([ones, sig_X], axis=1)
+        stoppers = tf.concat([1 - sig_X, ones], axis=1)
+        return starters * stoppers
 
     def _sigmoids(self, X: tf.Tensor) -> tf.Tensor:
         locations = tf.sort(self.locations)  # ensure locations are ordered
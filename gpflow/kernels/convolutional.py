@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 import numpy as np
 import tensorflow as tf
 
@@ -22,25 +24,74 @@ class Convolutional(Kernel):
       year = {2017},
       url = {http://papers.nips.cc/paper/6877-convolutional-gaussian-processes.pdf}
     }
+
+    By default, the base kernel is evaluated on all pairs of patches at once,
+    which requires an intermediate tensor of shape [N, P, N2, P] in `K`. When
+    `patch_block_size` is set, the patches are instead processed in blocks of
+    (at most) `patch_block_size` patches and the weighted sums are accumulated,
+    so that the largest intermediate tensor is [N, patch_block_size, N2,
+    patch_block_size] in `K`, [patch_block_size, P] per image in `K_diag` and
+    [M, N, patch_block_size] in `Kuf`. This bounds the memory per pair of
+    images, but like the output of `K`, it remains proportional to N * N2.
     """
 
-    def __init__(self, base_kernel, image_shape, patch_shape, weights=None, colour_channels=1):
+    def __init__(
+        self,
+        base_kernel,
+        image_shape,
+        patch_shape,
+        weights=None,
+        colour_channels=1,
+        patch_block_size: Optional[int] = None,
+    ):
+        if patch_block_size is not None and (
+            not isinstance(patch_block_size, (int, np.integer))
+            or isinstance(patch_block_size, bool)
+            or patch_block_size < 1
+        ):
+            raise ValueError(
+                f"`patch_block_size` must be None or a positive integer, got {patch_block_size}."
+            )
         super().__init__()
         self.image_shape = image_shape
         self.patch_shape = patch_shape
         self.base_kernel = base_kernel
         self.colour_channels = colour_channels
+        self.patch_block_size = patch_block_size
         self.weights = Parameter(
             np.ones(self.num_patches, dtype=default_float()) if weights is None else weights
         )
+        self._patch_cache = None
+
+    def cache_patches(self, X):
+        """
+        Extracts and stores the patches of the images X, so that subsequent calls
+        to `get_patches` with the very same tensor (e.g. the training inputs held
+        by a model) do not extract them again. This should be called outside of
+        `tf.function`.
+
+        :param X: (N x input_dim)
+        """
+        self._patch_cache = (X, self._extract_patches(X))
+
+    def clear_patch_cache(self):
+        """
+        Removes the patches stored by `cache_patches`.
+        """
+        self._patch_cache = None
 
-    # @lru_cache() -- Can we do some kind of memoizing with TF2?
     def get_patches(self, X):
         """
         Extracts patches from the images X. Patches are extracted separately for each of the colour channels.
+        If the patches of X have been stored by `cache_patches`, these are returned instead.
         :param X: (N x input_dim)
         :return: Patches (N, num_patches, patch_shape)
         """
+        if self._patch_cache is not None and self._patch_cache[0] is X:
+            return self._patch_cache[1]
+        return self._extract_patches(X)
+
+    def _extract_patches(self, X):
         # Roll the colour channel to the front, so it appears to
         # `tf.extract_image_patches()` as separate images. Then extract patches
         # and reshape to have the first axis the same as the number of images.
@@ -60,21 +111,51 @@ class Convolutional(Kernel):
         )
         return to_default_float(reshaped_patches)
 
+    def patch_slices(self) -> List[slice]:
+        """
+        Returns the slices into the patch axis that define the blocks of patches
+        which are processed together, see `patch_block_size`.
+        """
+        block_size = self.patch_block_size or self.num_patches
+        return [
+            slice(start, min(start + block_size, self.num_patches))
+            for start in range(0, self.num_patches, block_size)
+        ]
+
     def K(self, X, X2=None):
         Xp = self.get_patches(X)  # [N, P, patch_len]
         Xp2 = Xp if X2 is None else self.get_patches(X2)
 
-        bigK = self.base_kernel.K(Xp, Xp2)  # [N, num_patches, N, num_patches]
+        if self.patch_block_size is None:
+            bigK = self.base_kernel.K(Xp, Xp2)  # [N, num_patches, N, num_patches]
 
-        W2 = self.weights[:, None] * self.weights[None, :]  # [P, P]
-        W2bigK = bigK * W2[None, :, None, :]
-        return tf.reduce_sum(W2bigK, [1, 3]) / self.num_patches ** 2.0
+            W2 = self.weights[:, None] * self.weights[None, :]  # [P, P]
+            W2bigK = bigK * W2[None, :, None, :]
+            return tf.reduce_sum(W2bigK, [1, 3]) / self.num_patches ** 2.0
+
+        K = 0.0
+        for block in self.patch_slices():
+            for block2 in self.patch_slices():
+                bigK = self.base_kernel.K(Xp[:, block], Xp2[:, block2])  # [N, B, N2, B2]
+                K += tf.einsum("nbmc,b,c->nm", bigK, self.weights[block], self.weights[block2])
+        return K / self.num_patches ** 2.0
 
     def K_diag(self, X):
         Xp = self.get_patches(X)  # N x num_patches x patch_dim
-        W2 = self.weights[:, None] * self.weights[None, :]  # [P, P]
-        bigK = self.base_kernel.K(Xp)  # [N, P, P]
-        return tf.reduce_sum(bigK * W2[None, :, :], [1, 2]) / self.num_patches ** 2.0
+
+        if self.patch_block_size is None:
+            W2 = self.weights[:, None] * self.weights[None, :]  # [P, P]
+            bigK = self.base_kernel.K(Xp)  # [N, P, P]
+            return tf.reduce_sum(bigK * W2[None, :, :], [1, 2]) / self.num_patches ** 2.0
+
+        def single_image_K(xp):  # [P, patch_len]
+            k = 0.0
+            for block in self.patch_slices():
+                bigK = self.base_kernel.K(xp[block], xp)  # [B, P]
+                k += tf.einsum("bp,b,p->", bigK, self.weights[block], self.weights)
+            return k
+
+        return tf.map_fn(single_image_K, Xp) / self.num_patches ** 2.0
 
     @property
     def patch_len(self):
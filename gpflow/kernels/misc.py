@@ -19,6 +19,7 @@ import tensorflow as tf
 
 from ..base import Parameter
 from ..utilities import positive, to_default_float
+from ..utilities.ops import assert_shapes
 from .base import Kernel, ActiveDims
 
 
@@ -191,7 +192,7 @@ class Coregion(Kernel):
         ]
         if X2 is not None:
             shape_constraints.append((X2, [..., "M", 1]))
-        tf.debugging.assert_shapes(shape_constraints)
+        assert_shapes(shape_constraints)
 
         X = tf.cast(X[..., 0], tf.int32)
         if X2 is None:
@@ -203,7 +204,7 @@ class Coregion(Kernel):
         return tf.gather(tf.transpose(tf.gather(B, X2)), X)
 
     def K_diag(self, X):
-        tf.debugging.assert_shapes([(X, [..., "N", 1])])
+        assert_shapes([(X, [..., "N", 1])])
         X = tf.cast(X[..., 0], tf.int32)
         B_diag = self.output_variance()
         return tf.gather(B_diag, X)
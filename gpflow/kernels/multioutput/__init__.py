@@ -2,6 +2,7 @@ from .kernels import (
     MultioutputKernel,
     SeparateIndependent,
     SharedIndependent,
+    StackedSeparateIndependent,
     IndependentLatent,
     LinearCoregionalization,
 )
@@ -14,10 +14,13 @@
 
 import abc
 
+import numpy as np
 import tensorflow as tf
 
 from ...base import Parameter
+from ...utilities.ops import leading_transpose
 from ..base import Combination, Kernel
+from ..stationaries import IsotropicStationary
 
 
 class MultioutputKernel(Kernel):
@@ -148,6 +151,104 @@ class SeparateIndependent(MultioutputKernel, Combination):
         return tf.linalg.diag(stacked) if full_output_cov else stacked  # [N, P, P]  or  [N, P]
 
 
+class StackedSeparateIndependent(MultioutputKernel):
+    """
+    Vectorised equivalent of `SeparateIndependent` for P sub-kernels of the same
+    isotropic stationary class (e.g. P `SquaredExponential` kernels).
+
+    Rather than holding a list of kernels that are evaluated one after the other,
+    the hyperparameters of the sub-kernels are stacked into a single kernel
+    (`self.kernel`) whose parameters have a leading [P] dimension: the variance
+    has shape [P, 1, 1] and the lengthscales [P, 1, 1] or [P, 1, D]. All outputs
+    are then evaluated by a single batched operation.
+
+    The hyperparameters of `kernels` are copied at construction; the kernels
+    themselves are not used afterwards.
+    """
+
+    def __init__(self, kernels, name=None):
+        super().__init__(name=name)
+        kernel_class = type(kernels[0])
+        if not all(type(k) is kernel_class for k in kernels):
+            raise ValueError("StackedSeparateIndependent requires kernels of the same class.")
+        if not issubclass(kernel_class, IsotropicStationary) or (
+            kernel_class.K is not IsotropicStationary.K
+        ):
+            raise ValueError(
+                "StackedSeparateIndependent only supports isotropic stationary kernels "
+                f"defined through `K_r2` or `K_r`, got {kernel_class.__name__}."
+            )
+        if any(repr(k.active_dims) != repr(kernels[0].active_dims) for k in kernels):
+            raise ValueError("StackedSeparateIndependent requires identical `active_dims`.")
+
+        self.kernel = kernel_class(active_dims=kernels[0].active_dims)
+        for parameter_name, parameter in vars(kernels[0]).items():
+            if not isinstance(parameter, Parameter):
+                continue
+            values = np.stack([getattr(k, parameter_name).numpy() for k in kernels])
+            stacked = Parameter(
+                np.reshape(values, [len(kernels), 1, -1]),  # [P, 1, 1] or [P, 1, D]
+                transform=parameter.transform,
+                prior=parameter.prior,
+                prior_on=parameter.prior_on,
+                trainable=parameter.trainable,
+            )
+            setattr(self.kernel, parameter_name, stacked)
+        self.output_dim = len(kernels)
+
+    @property
+    def num_latent_gps(self):
+        return self.output_dim
+
+    @property
+    def latent_kernels(self):
+        """The underlying (stacked) kernel in the multioutput kernel"""
+        return (self.kernel,)
+
+    def scale(self, X, per_output=False):
+        """
+        Slices X to the active dimensions and divides it by the lengthscales of
+        each output.
+        :param X: data matrix [..., N, D], or [P, N, D] if `per_output` is set,
+            in which case each output is evaluated on its own inputs.
+        :return: [..., P, N, D]  or  [P, N, D]
+        """
+        X, _ = self.kernel.slice(X, None)
+        if not per_output:
+            X = X[..., None, :, :]
+        return X / self.kernel.lengthscales
+
+    def K_latents(self, Xs, X2s=None):
+        """
+        Evaluates all sub-kernels on scaled inputs, as returned by `scale`.
+        :param Xs: [..., P, N, D]
+        :param X2s: [..., P, N2, D]
+        :return: [..., P, N, N2]
+        """
+        Xs_sq = tf.reduce_sum(tf.square(Xs), axis=-1)  # [..., P, N]
+        if X2s is None:
+            r2 = -2 * tf.linalg.matmul(Xs, Xs, transpose_b=True)
+            r2 += Xs_sq[..., :, None] + Xs_sq[..., None, :]
+        else:
+            X2s_sq = tf.reduce_sum(tf.square(X2s), axis=-1)  # [..., P, N2]
+            r2 = -2 * tf.linalg.matmul(Xs, X2s, transpose_b=True)
+            r2 += Xs_sq[..., :, None] + X2s_sq[..., None, :]
+        return self.kernel.K_r2(tf.maximum(r2, 0.0))
+
+    def K(self, X, X2=None, full_output_cov=True):
+        X2s = None if X2 is None else self.scale(X2)
+        Kxxs = self.K_latents(self.scale(X), X2s)  # [..., P, N, N2]
+        if full_output_cov:
+            Kxxs = tf.transpose(Kxxs, [1, 2, 0])  # [N, N2, P]
+            return tf.transpose(tf.linalg.diag(Kxxs), [0, 2, 1, 3])  # [N, P, N2, P]
+        return leading_transpose(Kxxs, [-3, ..., -2, -1])  # [P, ..., N, N2]
+
+    def K_diag(self, X, full_output_cov=False):
+        variances = tf.reshape(self.kernel.variance, [-1])  # [P]
+        stacked = tf.ones_like(X[..., :1]) * variances  # [..., N, P]
+        return tf.linalg.diag(stacked) if full_output_cov else stacked  # [N, P, P]  or  [N, P]
+
+
 class IndependentLatent(MultioutputKernel):
     """
     Base class for multioutput kernels that are constructed from independent
@@ -170,11 +271,18 @@ class IndependentLatent(MultioutputKernel):
 class LinearCoregionalization(IndependentLatent, Combination):
     """
     Linear mixing of the latent GPs to form the output.
+
+    If `lazy_output_cov` is True, conditionals with full_cov=False and
+    full_output_cov=True (e.g. `SVGP.predict_f(Xnew, full_output_cov=True)`) return
+    the output covariance as a `MixedOutputCovariance` W diag(g_var) Wᵀ rather
+    than a dense [N, P, P] tensor, which is much cheaper for many outputs P and
+    few latent GPs L.
     """
 
-    def __init__(self, kernels, W, name=None):
+    def __init__(self, kernels, W, name=None, lazy_output_cov: bool = False):
         Combination.__init__(self, kernels=kernels, name=name)
         self.W = Parameter(W)  # [P, L]
+        self.lazy_output_cov = lazy_output_cov
 
     @property
     def num_latent_gps(self):
@@ -5,9 +5,9 @@ import tensorflow as tf
 
 from ..base import Parameter
 from ..utilities import positive
-from ..utilities.ops import difference_matrix
+from ..utilities.ops import difference_matrix, map_row_blocks, square_distance
 from .base import Kernel
-from .stationaries import Stationary, IsotropicStationary
+from .stationaries import Stationary, IsotropicStationary, _rank
 
 
 class Periodic(Kernel):
@@ -36,15 +36,29 @@ class Periodic(Kernel):
         is absorbed into the lengthscales hyperparameter.
     NOTE: periodic kernel uses `active_dims` of a base kernel, therefore
         the constructor doesn't have it as an argument.
+
+    For base kernels implementing K_r2, the scaled sum of squared sines is
+    computed through the mapping u = (cos(2πx/γ), sin(2πx/γ)) / ℓ, as
+    Σ sin²(π(x - x')/γ) / ℓ² = ¼ ‖u - u'‖², which only requires [N, M] tensors.
+    Base kernels implementing K_r need the [N, M, D] difference tensor; setting
+    `difference_block_size` evaluates these in blocks of rows of X (for inputs
+    without leading dimensions).
     """
 
-    def __init__(self, base_kernel: IsotropicStationary, period: Union[float, List[float]] = 1.0):
+    def __init__(
+        self,
+        base_kernel: IsotropicStationary,
+        period: Union[float, List[float]] = 1.0,
+        difference_block_size: Optional[int] = None,
+    ):
         """
         :param base_kernel: the base kernel to make periodic; must inherit from Stationary
             Note that `active_dims` should be specified in the base kernel.
         :param period: the period; to induce a different period per active dimension
             this must be initialized with an array the same length as the number
             of active dimensions e.g. [1., 1., 1.]
+        :param difference_block_size: optional number of rows of X for which the
+            differences are evaluated at once when the base kernel implements K_r.
         """
         if not isinstance(base_kernel, IsotropicStationary):
             raise TypeError("Periodic requires an IsotropicStationary kernel as the `base_kernel`")
@@ -53,6 +67,7 @@ class Periodic(Kernel):
         self.base_kernel = base_kernel
         self.period = Parameter(period, transform=positive())
         self.base_kernel._validate_ard_active_dims(self.period)
+        self.difference_block_size = difference_block_size
 
     @property
     def active_dims(self):
@@ -66,12 +81,31 @@ class Periodic(Kernel):
         return self.base_kernel.K_diag(X)
 
     def K(self, X: tf.Tensor, X2: Optional[tf.Tensor] = None) -> tf.Tensor:
+        if not hasattr(self.base_kernel, "K_r"):
+            U = self._periodic_features(X)
+            U2 = None if X2 is None else self._periodic_features(X2)
+            sine_r2 = 0.25 * square_distance(U, U2)
+            return self.base_kernel.K_r2(sine_r2)
+        blocked = self.difference_block_size is not None
+        if blocked and _rank(X) == 2 and (X2 is None or _rank(X2) == 2):
+            X2 = X if X2 is None else X2
+            return map_row_blocks(
+                lambda X_block: self._K_r_differences(X_block, X2),
+                tf.convert_to_tensor(X),
+                self.difference_block_size,
+            )
+        return self._K_r_differences(X, X2)
+
+    def _periodic_features(self, X: tf.Tensor) -> tf.Tensor:
+        """
+        Returns u = (cos(2πX/γ), sin(2πX/γ)) / ℓ, [..., N, 2D].
+        """
+        r = 2 * np.pi * X / self.period
+        lengthscales = self.base_kernel.lengthscales
+        return tf.concat([tf.cos(r) / lengthscales, tf.sin(r) / lengthscales], axis=-1)
+
+    def _K_r_differences(self, X: tf.Tensor, X2: Optional[tf.Tensor] = None) -> tf.Tensor:
         r = np.pi * (difference_matrix(X, X2)) / self.period
         scaled_sine = tf.sin(r) / self.base_kernel.lengthscales
-        if hasattr(self.base_kernel, "K_r"):
-            sine_r = tf.reduce_sum(tf.abs(scaled_sine), -1)
-            K = self.base_kernel.K_r(sine_r)
-        else:
-            sine_r2 = tf.reduce_sum(tf.square(scaled_sine), -1)
-            K = self.base_kernel.K_r2(sine_r2)
-        return K
+        sine_r = tf.reduce_sum(tf.abs(scaled_sine), -1)
+        return self.base_kernel.K_r(sine_r)
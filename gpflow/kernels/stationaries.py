@@ -1,12 +1,18 @@
+from typing import Optional
+
 import numpy as np
 import tensorflow as tf
 
 from ..base import Parameter
 from ..utilities import positive
-from ..utilities.ops import square_distance, difference_matrix
+from ..utilities.ops import square_distance, difference_matrix, map_row_blocks
 from .base import Kernel
 
 
+def _rank(X) -> Optional[int]:
+    return tf.TensorShape(X.shape).rank
+
+
 class Stationary(Kernel):
     """
     Base class for kernels that are stationary, that is, they only depend on
@@ -68,12 +74,111 @@ class IsotropicStationary(Stationary):
 
         K_r(self, r): Returns the kernel evaluated on r, which is the scaled
         Euclidean distance. Should operate element-wise on r.
+
+    Derived classes whose K_r2 is proportional to the variance parameter may
+    additionally implement
+
+        dK_dr2(self, r2, K): Returns the derivative of K_r2 with respect to r2,
+        given r2 and the kernel values K = K_r2(r2).
+
+    in which case `K` on inputs without leading dimensions uses a hand-written
+    gradient. Automatic differentiation through `square_distance` keeps several
+    [N, M] intermediate tensors alive for the backward pass; the hand-written
+    gradient only keeps the inputs and the output, and recomputes r2 when
+    needed.
     """
 
     def K(self, X, X2=None):
+        if self._has_analytic_gradient() and _rank(X) == 2 and (X2 is None or _rank(X2) == 2):
+            return self._K_custom_gradient(X, X2)
         r2 = self.scaled_squared_euclid_dist(X, X2)
         return self.K_r2(r2)
 
+    def _has_analytic_gradient(self) -> bool:
+        """
+        Whether `dK_dr2` is the derivative of this kernel's `K_r2`, i.e. whether
+        the class that defines `dK_dr2` also defines `K_r2` and `K_r` as seen by
+        this kernel. Subclasses that override `K_r2` or `K_r` but inherit `dK_dr2`
+        use automatic differentiation instead.
+        """
+        cls = type(self)
+        owner = next((base for base in cls.__mro__ if "dK_dr2" in vars(base)), None)
+        if owner is None:
+            return False
+        return all(
+            getattr(cls, name, None) is getattr(owner, name, None) for name in ("K_r2", "K_r")
+        )
+
+    def _K_custom_gradient(self, X, X2=None):
+        """
+        Returns K_r2(‖(X - X2ᵀ) / ℓ‖²) for X [N, D] and X2 [M, D] (or None), with
+        gradients with respect to X, X2, the lengthscales and the variance
+        computed by `_K_gradients`.
+
+        K_r2 reads the variance parameter itself; its gradient is propagated through
+        the `variance` argument, hence no gradients are returned for the variables.
+        """
+        lengthscales = tf.convert_to_tensor(self.lengthscales)
+        variance = tf.convert_to_tensor(self.variance)
+        X = tf.convert_to_tensor(X, dtype=variance.dtype)
+
+        if X2 is None:
+
+            @tf.custom_gradient
+            def K_symmetric(X, lengthscales, variance):
+                K = self.K_r2(square_distance(X / lengthscales, None))
+
+                def grad(dK, variables=None):
+                    dX, _, dlengthscales, dvariance = self._K_gradients(
+                        dK, K, X, None, lengthscales, variance
+                    )
+                    return (dX, dlengthscales, dvariance), [None] * len(variables or [])
+
+                return K, grad
+
+            return K_symmetric(X, lengthscales, variance)
+
+        X2 = tf.convert_to_tensor(X2, dtype=variance.dtype)
+
+        @tf.custom_gradient
+        def K_cross(X, X2, lengthscales, variance):
+            K = self.K_r2(square_distance(X / lengthscales, X2 / lengthscales))
+
+            def grad(dK, variables=None):
+                gradients = self._K_gradients(dK, K, X, X2, lengthscales, variance)
+                return gradients, [None] * len(variables or [])
+
+            return K, grad
+
+        return K_cross(X, X2, lengthscales, variance)
+
+    def _K_gradients(self, dK, K, X, X2, lengthscales, variance):
+        """
+        Returns the gradients of the loss with respect to X, X2 (None if X2 is
+        None, in which case the gradient with respect to X contains both
+        arguments' contributions), the lengthscales and the variance, given its
+        gradient dK with respect to K = K_r2(r2).
+        """
+        A = X / lengthscales  # [N, D]
+        B = A if X2 is None else X2 / lengthscales  # [M, D]
+        # In compiled graphs, recomputing r2 is pruned if dK_dr2 does not use it.
+        r2 = square_distance(A, None if X2 is None else B)
+        G = dK * self.dK_dr2(r2, K)  # [N, M]
+
+        # ∂r2[n, m] / ∂A[n] = 2 (A[n] - B[m]) and ∂r2[n, m] / ∂B[m] = -2 (A[n] - B[m])
+        dA = 2.0 * (A * tf.reduce_sum(G, axis=-1, keepdims=True) - tf.matmul(G, B))
+        dB = 2.0 * (B * tf.reduce_sum(G, axis=-2)[:, None] - tf.matmul(G, A, transpose_a=True))
+
+        dlengthscales = -(tf.reduce_sum(dA * A, axis=0) + tf.reduce_sum(dB * B, axis=0))
+        dlengthscales /= lengthscales  # [D]
+        if lengthscales.shape.num_elements() == 1:
+            dlengthscales = tf.reshape(tf.reduce_sum(dlengthscales), tf.shape(lengthscales))
+        dvariance = tf.reshape(tf.reduce_sum(dK * K) / variance, tf.shape(variance))
+
+        if X2 is None:
+            return (dA + dB) / lengthscales, None, dlengthscales, dvariance
+        return dA / lengthscales, dB / lengthscales, dlengthscales, dvariance
+
     def K_r2(self, r2):
         if hasattr(self, "K_r"):
             # Clipping around the (single) float precision which is ~1e-45.
@@ -99,9 +204,51 @@ class AnisotropicStationary(Stationary):
     on d, which is the pairwise difference matrix, scaled by the lengthscale
     parameter ℓ (i.e. [(X - X2ᵀ) / ℓ]). The last axis corresponds to the
     input dimension.
+
+    Evaluating K_d requires the [..., N, M, D] difference tensor. Derived classes
+    whose K_d only depends on J linear projections d·W of the differences (for
+    J much smaller than D) should additionally implement
+
+        project(self, X): Returns the projection X·W of the scaled inputs X,
+        [..., N, J]. Must be linear in X.
+
+        K_d_projected(self, dp): Returns the kernel evaluated on the projected
+        differences dp = [(X - X2ᵀ) / ℓ]·W, [..., N, M, J].
+
+    which only require a [..., N, M, J] tensor. For other kernels, setting
+    `difference_block_size` evaluates K_d in blocks of rows of X (for inputs
+    without leading dimensions), so that only [difference_block_size, M, D]
+    differences are held at a time.
     """
 
+    def __init__(
+        self, variance=1.0, lengthscales=1.0, difference_block_size: Optional[int] = None, **kwargs,
+    ):
+        """
+        :param variance: the (initial) value for the variance parameter.
+        :param lengthscales: the (initial) value for the lengthscale
+            parameter(s), see `Stationary`.
+        :param difference_block_size: optional number of rows of X for which the
+            differences are evaluated at once, see the class docstring.
+        :param kwargs: accepts `name` and `active_dims`.
+        """
+        super().__init__(variance=variance, lengthscales=lengthscales, **kwargs)
+        self.difference_block_size = difference_block_size
+
     def K(self, X, X2=None):
+        if hasattr(self, "project"):
+            # pylint: disable=no-member
+            Xp = self.project(self.scale(X))
+            X2p = None if X2 is None else self.project(self.scale(X2))
+            return self.K_d_projected(difference_matrix(Xp, X2p))
+        blocked = self.difference_block_size is not None
+        if blocked and _rank(X) == 2 and (X2 is None or _rank(X2) == 2):
+            X2 = X if X2 is None else X2
+            return map_row_blocks(
+                lambda X_block: self.K_d(self.scaled_difference_matrix(X_block, X2)),
+                tf.convert_to_tensor(X),
+                self.difference_block_size,
+            )
         return self.K_d(self.scaled_difference_matrix(X, X2))
 
     def scaled_difference_matrix(self, X, X2=None):
@@ -131,6 +278,9 @@ class SquaredExponential(IsotropicStationary):
     def K_r2(self, r2):
         return self.variance * tf.exp(-0.5 * r2)
 
+    def dK_dr2(self, r2, K):
+        return -0.5 * K
+
 
 class RationalQuadratic(IsotropicStationary):
     """
@@ -161,6 +311,10 @@ class Exponential(IsotropicStationary):
     def K_r(self, r):
         return self.variance * tf.exp(-0.5 * r)
 
+    def dK_dr2(self, r2, K):
+        r = tf.sqrt(tf.maximum(r2, 1e-36))
+        return tf.where(r2 > 1e-36, -0.25 * K / r, tf.zeros_like(K))
+
 
 class Matern12(IsotropicStationary):
     """
@@ -177,6 +331,10 @@ class Matern12(IsotropicStationary):
     def K_r(self, r):
         return self.variance * tf.exp(-r)
 
+    def dK_dr2(self, r2, K):
+        r = tf.sqrt(tf.maximum(r2, 1e-36))
+        return tf.where(r2 > 1e-36, -0.5 * K / r, tf.zeros_like(K))
+
 
 class Matern32(IsotropicStationary):
     """
@@ -194,6 +352,11 @@ class Matern32(IsotropicStationary):
         sqrt3 = np.sqrt(3.0)
         return self.variance * (1.0 + sqrt3 * r) * tf.exp(-sqrt3 * r)
 
+    def dK_dr2(self, r2, K):
+        sqrt3 = np.sqrt(3.0)
+        r = tf.sqrt(tf.maximum(r2, 1e-36))
+        return -1.5 * self.variance * tf.exp(-sqrt3 * r)
+
 
 class Matern52(IsotropicStationary):
     """
@@ -211,6 +374,11 @@ class Matern52(IsotropicStationary):
         sqrt5 = np.sqrt(5.0)
         return self.variance * (1.0 + sqrt5 * r + 5.0 / 3.0 * tf.square(r)) * tf.exp(-sqrt5 * r)
 
+    def dK_dr2(self, r2, K):
+        sqrt5 = np.sqrt(5.0)
+        r = tf.sqrt(tf.maximum(r2, 1e-36))
+        return -5.0 / 6.0 * self.variance * (1.0 + sqrt5 * r) * tf.exp(-sqrt5 * r)
+
 
 class Cosine(AnisotropicStationary):
     """
@@ -228,3 +396,9 @@ class Cosine(AnisotropicStationary):
     def K_d(self, d):
         d = tf.reduce_sum(d, axis=-1)
         return self.variance * tf.cos(2 * np.pi * d)
+
+    def project(self, X):
+        return tf.reduce_sum(X, axis=-1, keepdims=True)
+
+    def K_d_projected(self, dp):
+        return self.variance * tf.cos(2 * np.pi * dp[..., 0])
@@ -15,11 +15,12 @@
 # -*- coding: utf-8 -*-
 
 import tensorflow as tf
-from .config import default_float, default_jitter
+from .config import default_jitter
 from .covariances.kuus import Kuu
 from .inducing_variables import InducingVariables
 from .kernels import Kernel
 from .utilities import Dispatcher, to_default_float
+from .utilities.ops import assert_shapes
 
 prior_kl = Dispatcher("prior_kl")
 
@@ -82,7 +83,7 @@ def gauss_kl(q_mu, q_sqrt, K=None, *, K_cholesky=None):
             shape_constraints.append(
                 (K_cholesky, (["L", "M", "M"] if len(K_cholesky.shape) == 3 else ["M", "M"]))
             )
-    tf.debugging.assert_shapes(shape_constraints, message="gauss_kl() arguments")
+    assert_shapes(shape_constraints, message="gauss_kl() arguments")
 
     M, L = tf.shape(q_mu)[0], tf.shape(q_mu)[1]
 
@@ -100,8 +101,7 @@ def gauss_kl(q_mu, q_sqrt, K=None, *, K_cholesky=None):
         alpha = tf.linalg.triangular_solve(Lp, q_mu, lower=True)  # [L, M, 1] or [M, L]
 
     if is_diag:
-        Lq = Lq_diag = q_sqrt
-        Lq_full = tf.linalg.diag(tf.transpose(q_sqrt))  # [L, M, M]
+        Lq = Lq_diag = q_sqrt  # [M, L]
     else:
         Lq = Lq_full = tf.linalg.band_part(q_sqrt, -1, 0)  # force lower triangle # [L, M, M]
         Lq_diag = tf.linalg.diag_part(Lq)  # [M, L]
@@ -119,22 +119,21 @@ def gauss_kl(q_mu, q_sqrt, K=None, *, K_cholesky=None):
     if is_white:
         trace = tf.reduce_sum(tf.square(Lq))
     else:
-        if is_diag and not is_batched:
-            # K is [M, M] and q_sqrt is [M, L]: fast specialisation
-            LpT = tf.transpose(Lp)  # [M, M]
-            Lp_inv = tf.linalg.triangular_solve(
-                Lp, tf.eye(M, dtype=default_float()), lower=True
-            )  # [M, M]
-            K_inv = tf.linalg.diag_part(tf.linalg.triangular_solve(LpT, Lp_inv, lower=False))[
-                :, None
-            ]  # [M, M] -> [M, 1]
-            trace = tf.reduce_sum(K_inv * tf.square(q_sqrt))
+        if is_diag:
+            # tr(Σp⁻¹ Σq) = Σ_m diag(K⁻¹)_m Lq_m², where diag(K⁻¹) are the squared
+            # column norms of Lp⁻¹: only a single triangular solve is required.
+            eye = tf.eye(M, dtype=Lp.dtype)
+            Lp_inv = tf.linalg.triangular_solve(Lp, eye, lower=True)  # [L, M, M] or [M, M]
+            K_inv_diag = tf.reduce_sum(tf.square(Lp_inv), axis=-2)  # [L, M] or [M]
+            K_inv_diag = tf.transpose(K_inv_diag) if is_batched else K_inv_diag[:, None]
+            trace = tf.reduce_sum(K_inv_diag * tf.square(q_sqrt))  # [M, L] or [M, 1]
+        elif is_batched:
+            LpiLq = tf.linalg.triangular_solve(Lp, Lq_full, lower=True)  # [L, M, M]
+            trace = tf.reduce_sum(tf.square(LpiLq))
         else:
-            # TODO: broadcast instead of tile when tf allows -- tf2.1 segfaults
-            # (https://github.com/tensorflow/tensorflow/issues/37584).
-            # See # https://github.com/GPflow/GPflow/issues/1321
-            Lp_full = Lp if is_batched else tf.tile(tf.expand_dims(Lp, 0), [L, 1, 1])
-            LpiLq = tf.linalg.triangular_solve(Lp_full, Lq_full, lower=True)
+            # solve with the single [M, M] factor against all L square roots at once
+            Lq_stacked = tf.reshape(tf.transpose(Lq_full, [1, 0, 2]), [M, -1])  # [M, L * M]
+            LpiLq = tf.linalg.triangular_solve(Lp, Lq_stacked, lower=True)  # [M, L * M]
             trace = tf.reduce_sum(tf.square(LpiLq))
 
     twoKL = mahalanobis + constant - logdet_qcov + trace
@@ -147,5 +146,5 @@ def gauss_kl(q_mu, q_sqrt, K=None, *, K_cholesky=None):
         scale = 1.0 if is_batched else to_default_float(L)
         twoKL += scale * sum_log_sqdiag_Lp
 
-    tf.debugging.assert_shapes([(twoKL, ())], message="gauss_kl() return value")  # returns scalar
+    assert_shapes([(twoKL, ())], message="gauss_kl() return value")  # returns scalar
     return 0.5 * twoKL
@@ -55,10 +55,16 @@ integration is done by sampling (can be more suitable when F is higher dimension
 import numpy as np
 import tensorflow as tf
 import abc
+import copy
+import functools
 import warnings
+from collections.abc import Iterable
 
-from ..base import Module
-from ..quadrature import hermgauss, ndiag_mc, ndiagquad
+from ..base import Module, Parameter
+from ..conditionals.util import MixedOutputCovariance
+from ..config import default_check_shapes
+from ..quadrature import cached_quadrature_rule, hermgauss, ndiag_mc, ndiagquad
+from ..utilities.ops import assert_equal, assert_shapes
 
 
 class Likelihood(Module, metaclass=abc.ABCMeta):
@@ -104,8 +110,10 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
         :param F: function evaluation Tensor, with shape [..., latent_dim]
         :param Y: observation Tensor, with shape [..., observation_dim]
         """
+        if not default_check_shapes():
+            return
         expected_shape = tf.broadcast_dynamic_shape(tf.shape(F)[:-1], tf.shape(Y)[:-1])
-        tf.debugging.assert_equal(tf.shape(result), expected_shape)
+        assert_equal(tf.shape(result), expected_shape)
 
     def _check_latent_dims(self, F):
         """
@@ -113,7 +121,7 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
 
         :param F: function evaluation Tensor, with shape [..., latent_dim]
         """
-        tf.debugging.assert_shapes([(F, (..., self.latent_dim))])
+        assert_shapes([(F, (..., self.latent_dim))])
 
     def _check_data_dims(self, Y):
         """
@@ -121,7 +129,7 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
 
         :param Y: observation Tensor, with shape [..., observation_dim]
         """
-        tf.debugging.assert_shapes([(Y, (..., self.observation_dim))])
+        assert_shapes([(Y, (..., self.observation_dim))])
 
     def log_prob(self, F, Y):
         """
@@ -194,10 +202,13 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
 
 
         :param Fmu: mean function evaluation Tensor, with shape [..., latent_dim]
-        :param Fvar: variance of function evaluation Tensor, with shape [..., latent_dim]
+        :param Fvar: variance of function evaluation Tensor, with shape [..., latent_dim],
+            or a lazy `MixedOutputCovariance` (see `_predict_mean_and_mixed_var`)
         :returns: mean and variance, both with shape [..., observation_dim]
         """
         self._check_latent_dims(Fmu)
+        if isinstance(Fvar, MixedOutputCovariance):
+            return self._predict_mean_and_mixed_var(Fmu, Fvar)
         self._check_latent_dims(Fvar)
         mu, var = self._predict_mean_and_var(Fmu, Fvar)
         self._check_data_dims(mu)
@@ -208,6 +219,22 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
     def _predict_mean_and_var(self, Fmu, Fvar):
         raise NotImplementedError
 
+    def _predict_mean_and_mixed_var(self, Fmu, Fvar):
+        """
+        Predictive mean and output covariance for a lazy output covariance Fvar of
+        the latent functions, as returned by models with a `LinearCoregionalization`
+        kernel with `lazy_output_cov` set. Only likelihoods that preserve its
+        structure implement this.
+
+        :param Fmu: mean function evaluation Tensor, with shape [..., N, latent_dim]
+        :param Fvar: `MixedOutputCovariance`
+        :returns: mean [..., N, observation_dim] and `MixedOutputCovariance`
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support lazy output covariances; "
+            "use full_output_cov=False or a Gaussian likelihood."
+        )
+
     def predict_log_density(self, Fmu, Fvar, Y):
         r"""
         Given a Normal distribution for the latent function, and a datum Y,
@@ -229,7 +256,7 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
         :param Y: observation Tensor, with shape [..., observation_dim]:
         :returns: log predictive density, with shape [...]
         """
-        tf.debugging.assert_equal(tf.shape(Fmu), tf.shape(Fvar))
+        assert_equal(tf.shape(Fmu), tf.shape(Fvar))
         self._check_last_dims_valid(Fmu, Y)
         res = self._predict_log_density(Fmu, Fvar, Y)
         self._check_return_shape(res, Fmu, Y)
@@ -273,7 +300,7 @@ class Likelihood(Module, metaclass=abc.ABCMeta):
         :param Y: observation Tensor, with shape [..., observation_dim]:
         :returns: expected log density of the data given q(F), with shape [...]
         """
-        tf.debugging.assert_equal(tf.shape(Fmu), tf.shape(Fvar))
+        assert_equal(tf.shape(Fmu), tf.shape(Fvar))
         # returns an error if Y[:-1] and Fmu[:-1] do not broadcast together
         _ = tf.broadcast_dynamic_shape(tf.shape(Fmu)[:-1], tf.shape(Y)[:-1])
         self._check_last_dims_valid(Fmu, Y)
@@ -303,12 +330,84 @@ class ScalarLikelihood(Likelihood):
 
     Some univariate integrals can be done by quadrature: we implement quadrature routines for 1D
     integrals in this class, though they may be overwritten by inheriting classes where those
-    integrals are available in closed form.
+    integrals are available in closed form. The quadrature rule is selected by
+    `quadrature_scheme` (see `gpflow.quadrature.quadrature_rule`), with
+    `num_gauss_hermite_points` as its number of points or accuracy level.
+
+    Latent functions with a small variance can be integrated accurately with few
+    points. If `adaptive_quadrature_orders` is set to a sequence of
+    (max_variance, num_points) pairs with increasing max_variance, e.g.
+    `[(1e-6, 3), (1e-3, 8)]`, each datum is integrated with the num_points of the
+    first pair whose max_variance is at least its Fvar, and with
+    `num_gauss_hermite_points` if there is none. The data are partitioned into one
+    bucket per order, so each bucket is integrated with a single vectorized call.
     """
 
     def __init__(self, **kwargs):
         super().__init__(latent_dim=None, observation_dim=None, **kwargs)
         self.num_gauss_hermite_points = 20
+        self.quadrature_scheme = "gauss-hermite"
+        self.adaptive_quadrature_orders = None
+
+    @property
+    def quadrature_rule(self):
+        """
+        Evaluation locations [Q, 1] and weights [Q] of the quadrature rule used by
+        this likelihood, from the quadrature rule registry.
+        """
+        return cached_quadrature_rule(self.quadrature_scheme, self.num_gauss_hermite_points, 1)
+
+    def _quadrature(self, funcs, Fmu, Fvar, logspace: bool = False, **Ys):
+        """
+        Computes the Gaussian expectations of `funcs` with `ndiagquad`, using
+        `adaptive_quadrature_orders` if set. Fmu, Fvar and Ys have the same shape.
+        """
+        if not self.adaptive_quadrature_orders:
+            return ndiagquad(
+                funcs,
+                self.num_gauss_hermite_points,
+                Fmu,
+                Fvar,
+                logspace=logspace,
+                scheme=self.quadrature_scheme,
+                **Ys,
+            )
+
+        max_variances, orders = zip(*self.adaptive_quadrature_orders)
+        orders = orders + (self.num_gauss_hermite_points,)
+        num_buckets = len(orders)
+        shape = tf.shape(Fmu)
+        Fmu, Fvar = tf.reshape(Fmu, (-1,)), tf.reshape(Fvar, (-1,))
+        Ys = {name: tf.reshape(Y, (-1,)) for name, Y in Ys.items()}
+
+        max_variances = tf.constant(max_variances, dtype=Fvar.dtype)
+        buckets = tf.searchsorted(max_variances, Fvar, side="left")  # [N]
+        indices = tf.dynamic_partition(tf.range(tf.size(Fmu)), buckets, num_buckets)
+        Fmus = tf.dynamic_partition(Fmu, buckets, num_buckets)
+        Fvars = tf.dynamic_partition(Fvar, buckets, num_buckets)
+        Ys_partitioned = {
+            name: tf.dynamic_partition(Y, buckets, num_buckets) for name, Y in Ys.items()
+        }
+
+        results = []  # [num_buckets][num_funcs]
+        for b, H in enumerate(orders):
+            Ys_b = {name: Y[b] for name, Y in Ys_partitioned.items()}
+            result = ndiagquad(
+                funcs,
+                H,
+                Fmus[b],
+                Fvars[b],
+                logspace=logspace,
+                scheme=self.quadrature_scheme,
+                **Ys_b,
+            )
+            results.append(result if isinstance(funcs, Iterable) else [result])
+
+        stitched = [
+            tf.reshape(tf.dynamic_stitch(indices, list(bucket_results)), shape)
+            for bucket_results in zip(*results)
+        ]
+        return stitched if isinstance(funcs, Iterable) else stitched[0]
 
     def _check_last_dims_valid(self, F, Y):
         """
@@ -316,7 +415,7 @@ class ScalarLikelihood(Likelihood):
         :param F: function evaluation Tensor, with shape [..., latent_dim]
         :param Y: observation Tensor, with shape [..., latent_dim]
         """
-        tf.debugging.assert_shapes([(F, (..., "num_latent")), (Y, (..., "num_latent"))])
+        assert_shapes([(F, (..., "num_latent")), (Y, (..., "num_latent"))])
 
     def _log_prob(self, F, Y):
         r"""
@@ -340,10 +439,7 @@ class ScalarLikelihood(Likelihood):
         :param Y: observation Tensor, with shape [..., latent_dim]:
         :returns: variational expectations, with shape [...]
         """
-        return tf.reduce_sum(
-            ndiagquad(self._scalar_log_prob, self.num_gauss_hermite_points, Fmu, Fvar, Y=Y),
-            axis=-1,
-        )
+        return tf.reduce_sum(self._quadrature(self._scalar_log_prob, Fmu, Fvar, Y=Y), axis=-1)
 
     def _predict_log_density(self, Fmu, Fvar, Y):
         r"""
@@ -355,10 +451,7 @@ class ScalarLikelihood(Likelihood):
         :returns: log predictive density, with shape [...]
         """
         return tf.reduce_sum(
-            ndiagquad(
-                self._scalar_log_prob, self.num_gauss_hermite_points, Fmu, Fvar, logspace=True, Y=Y,
-            ),
-            axis=-1,
+            self._quadrature(self._scalar_log_prob, Fmu, Fvar, logspace=True, Y=Y), axis=-1
         )
 
     def _predict_mean_and_var(self, Fmu, Fvar):
@@ -375,21 +468,155 @@ class ScalarLikelihood(Likelihood):
             return self.conditional_variance(*X) + self.conditional_mean(*X) ** 2
 
         integrands = [self.conditional_mean, integrand]
-        E_y, E_y2 = ndiagquad(integrands, self.num_gauss_hermite_points, Fmu, Fvar)
+        E_y, E_y2 = self._quadrature(integrands, Fmu, Fvar)
         V_y = E_y2 - E_y ** 2
         return E_y, V_y
 
 
+def _attributes_equal(a, b) -> bool:
+    if a is b:
+        return True
+    try:
+        return bool(np.all(a == b))
+    except (TypeError, ValueError):
+        return False
+
+
 class SwitchedLikelihood(ScalarLikelihood):
-    def __init__(self, likelihood_list, **kwargs):
+    def __init__(self, likelihood_list, vectorize: bool = False, **kwargs):
         """
         In this likelihood, we assume at extra column of Y, which contains
         integers that specify a likelihood from the list of likelihoods.
+
+        By default, the data are partitioned by that column on every evaluation
+        (with `tf.dynamic_partition` and `tf.dynamic_stitch`). For fixed training
+        data (e.g. VGP, GPMC), `precompute_partition` replaces this with static
+        gathers.
+
+        If `vectorize` is True, the likelihoods are grouped by class (and by the
+        values of their other public attributes), and their parameters must be
+        scalars. Each group is evaluated once for all of its data, with every
+        parameter gathered per datum from the stacked parameters of the
+        likelihoods in the group. The data are only partitioned across groups,
+        and not at all if all likelihoods are in a single group.
         """
         super().__init__(**kwargs)
         for l in likelihood_list:
             assert isinstance(l, ScalarLikelihood)
         self.likelihoods = likelihood_list
+        self.vectorize = vectorize
+        self._partition_labels = None
+        self._partition_indices = None
+        self._partition_inverse = None
+        if vectorize:
+            self._vectorization_groups = self._group_vectorizable()
+
+    def _group_vectorizable(self):
+        """
+        Groups the likelihoods that can be vectorized together, see `vectorize`.
+
+        :return: a list of groups, each a list of indices into `self.likelihoods`.
+        """
+        groups = []
+        for i, likelihood in enumerate(self.likelihoods):
+            for name, value in vars(likelihood).items():
+                if isinstance(value, Parameter) and value.shape.ndims != 0:
+                    raise ValueError(
+                        f"Vectorized SwitchedLikelihood requires scalar parameters, "
+                        f"but {name} has shape {value.shape}."
+                    )
+            for group in groups:
+                if self._vectorizable_together(self.likelihoods[group[0]], likelihood):
+                    group.append(i)
+                    break
+            else:
+                groups.append([i])
+
+        group_labels, group_indices = np.zeros(len(self.likelihoods), np.int32), []
+        for label, group in enumerate(groups):
+            group_labels[group] = label
+            group_indices.append(np.arange(len(group), dtype=np.int32))
+        self._group_labels = tf.constant(group_labels)
+        self._group_positions = tf.constant(
+            np.concatenate(group_indices)[np.argsort(np.concatenate(groups), kind="stable")]
+        )
+        return groups
+
+    @staticmethod
+    def _vectorizable_together(first, other) -> bool:
+        if type(first) is not type(other):
+            return False
+        return all(
+            _attributes_equal(value, getattr(first, name))
+            for name, value in vars(other).items()
+            if not name.startswith("_") and not isinstance(value, Parameter)
+        )
+
+    @staticmethod
+    def _vectorized_likelihood(likelihoods, ind):
+        """
+        Returns a copy of the first of `likelihoods`, whose parameters are replaced
+        by their per-datum values, with the shape of the index tensor `ind` into
+        `likelihoods`.
+        """
+        first = likelihoods[0]
+        vectorized = copy.copy(first)
+        for name, value in vars(first).items():
+            if isinstance(value, Parameter):
+                stacked = tf.stack([getattr(l, name) for l in likelihoods])  # [K]
+                setattr(vectorized, name, tf.gather(stacked, ind))
+        return vectorized
+
+    def _vectorized(self, likelihoods, args, func_name, ind):
+        """
+        Evaluates <likelihood>.<func_name> for all data of a group of likelihoods at
+        once, see `vectorize`. `ind` indexes into `likelihoods`.
+        """
+        first = likelihoods[0]
+        if func_name == "_scalar_log_prob":
+            return self._vectorized_likelihood(likelihoods, ind[..., None])._scalar_log_prob(*args)
+
+        # Likelihoods that integrate by quadrature evaluate the log-density on a
+        # flattened grid of points, so the index is passed through as data.
+        method = "_" + func_name
+        if getattr(type(first), method) is not getattr(ScalarLikelihood, method):
+            vectorized = self._vectorized_likelihood(likelihoods, ind[..., None])
+            return getattr(vectorized, func_name)(*args)
+
+        def log_prob(F, Y, ind):
+            return self._vectorized_likelihood(likelihoods, ind)._scalar_log_prob(F, Y)
+
+        Fmu, Fvar, Y = args
+        ind = tf.broadcast_to(ind[..., None], tf.shape(Fmu))
+        logspace = func_name == "predict_log_density"
+        quadrature = first._quadrature(log_prob, Fmu, Fvar, logspace=logspace, Y=Y, ind=ind)
+        return tf.reduce_sum(quadrature, axis=-1)
+
+    def precompute_partition(self, Y):
+        """
+        Precomputes the partition of the data by the index column of Y [N, L+1],
+        so that subsequent evaluations split and recombine the data with static
+        gathers, which are cheaper than dynamic partitions and can be compiled
+        with XLA. All subsequent calls must pass data with the same index column,
+        which is checked on every evaluation.
+        """
+        ind = np.asarray(Y)[..., -1].astype(np.int32)
+        if ind.ndim != 1:
+            raise ValueError("precompute_partition requires Y of shape [N, L+1].")
+        indices = [np.flatnonzero(ind == i) for i in range(len(self.likelihoods))]
+        self._partition_labels = tf.constant(ind)
+        self._partition_indices = [tf.constant(i, dtype=tf.int32) for i in indices]
+        self._partition_inverse = tf.constant(
+            np.argsort(np.concatenate(indices), kind="stable"), dtype=tf.int32
+        )
+
+    def clear_partition(self):
+        """
+        Removes the partition computed by `precompute_partition`.
+        """
+        self._partition_labels = None
+        self._partition_indices = None
+        self._partition_inverse = None
 
     def _partition_and_stitch(self, args, func_name):
         """
@@ -397,8 +624,9 @@ class SwitchedLikelihood(ScalarLikelihood):
 
         args[-1] is the 'Y' argument, which contains the indexes to self.likelihoods.
 
-        This function splits up the args using dynamic_partition, calls the
-        relevant function on the likelihoods, and re-combines the result.
+        This function splits up the args using dynamic_partition (or the
+        precomputed partition), calls the relevant function on the likelihoods,
+        and re-combines the result.
         """
         # get the index from Y
         Y = args[-1]
@@ -407,21 +635,47 @@ class SwitchedLikelihood(ScalarLikelihood):
         Y = Y[..., :-1]
         args[-1] = Y
 
+        if self.vectorize:
+            groups = [[self.likelihoods[i] for i in group] for group in self._vectorization_groups]
+            if len(groups) == 1:
+                return self._vectorized(groups[0], args, func_name, ind)
+
+            # partition the data by group, passing on the index within the group
+            args = args + [tf.gather(self._group_positions, ind)]
+            ind = tf.gather(self._group_labels, ind)
+            funcs = [functools.partial(self._vectorized_call, group, func_name) for group in groups]
+        else:
+            funcs = [getattr(lik, func_name) for lik in self.likelihoods]
+
+        if self._partition_indices is not None and not self.vectorize:
+            # not a shape check: mismatching labels would silently evaluate the wrong likelihoods
+            tf.debugging.assert_equal(
+                ind, self._partition_labels, message="Y does not match the precomputed partition"
+            )
+            results = [
+                f(*[tf.gather(X, indices) for X in args])
+                for f, indices in zip(funcs, self._partition_indices)
+            ]
+            return tf.gather(tf.concat(results, axis=0), self._partition_inverse)
+
         # split up the arguments into chunks corresponding to the relevant likelihoods
-        args = zip(*[tf.dynamic_partition(X, ind, len(self.likelihoods)) for X in args])
+        args = zip(*[tf.dynamic_partition(X, ind, len(funcs)) for X in args])
 
         # apply the likelihood-function to each section of the data
-        funcs = [getattr(lik, func_name) for lik in self.likelihoods]
         results = [f(*args_i) for f, args_i in zip(funcs, args)]
 
         # stitch the results back together
-        partitions = tf.dynamic_partition(tf.range(0, tf.size(ind)), ind, len(self.likelihoods))
+        partitions = tf.dynamic_partition(tf.range(0, tf.size(ind)), ind, len(funcs))
         results = tf.dynamic_stitch(partitions, results)
 
         return results
 
+    def _vectorized_call(self, likelihoods, func_name, *args):
+        *args, ind = args
+        return self._vectorized(likelihoods, args, func_name, ind)
+
     def _check_last_dims_valid(self, F, Y):
-        tf.assert_equal(tf.shape(F)[-1], tf.shape(Y)[-1] - 1)
+        assert_equal(tf.shape(F)[-1], tf.shape(Y)[-1] - 1)
 
     def _scalar_log_prob(self, F, Y):
         return self._partition_and_stitch([F, Y], "_scalar_log_prob")
@@ -447,12 +701,36 @@ class SwitchedLikelihood(ScalarLikelihood):
 
 
 class MonteCarloLikelihood(Likelihood):
+    """
+    A likelihood whose expectations under q(f) are estimated with
+    `num_monte_carlo_points` Monte Carlo samples.
+
+    The samples are drawn according to `monte_carlo_sampling` ("random",
+    "antithetic" or "sobol", see `gpflow.quadrature.standard_normal_samples`);
+    if `control_variates` is set, the samples are also used as control variates
+    for the variational expectations and predictive moments (see
+    `gpflow.quadrature.ndiag_mc`). Both reduce the variance of the estimates, and
+    hence of the ELBO gradients, for a given number of samples.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.num_monte_carlo_points = 100
+        self.monte_carlo_sampling = "random"
+        self.control_variates = False
 
     def _mc_quadrature(self, funcs, Fmu, Fvar, logspace: bool = False, epsilon=None, **Ys):
-        return ndiag_mc(funcs, self.num_monte_carlo_points, Fmu, Fvar, logspace, epsilon, **Ys)
+        return ndiag_mc(
+            funcs,
+            self.num_monte_carlo_points,
+            Fmu,
+            Fvar,
+            logspace,
+            epsilon,
+            sampling=self.monte_carlo_sampling,
+            control_variate=self.control_variates,
+            **Ys,
+        )
 
     def _predict_mean_and_var(self, Fmu, Fvar, epsilon=None):
         r"""
@@ -5,7 +5,7 @@ import tensorflow_probability as tfp
 from ..base import Module, Parameter
 from ..config import default_float
 from ..utilities import to_default_float, to_default_int
-from ..quadrature import hermgauss
+from ..quadrature import cached_quadrature_rule
 from .base import Likelihood, MonteCarloLikelihood
 
 
@@ -104,6 +104,117 @@ class RobustMax(Module):
         # take the product over the latent functions, and the sum over the GH grid.
         return tf.reduce_prod(cdfs, axis=[1]) @ tf.reshape(gh_w / np.sqrt(np.pi), (-1, 1))
 
+    def _log_squashed_cdf(self, z):
+        """
+        log(Φ(z) (1 - 2 squash) + squash), the log of the squashed CDFs used in
+        `prob_is_largest`, computed in log space.
+        """
+        standard_normal = tfp.distributions.Normal(tf.zeros([], z.dtype), tf.ones([], z.dtype))
+        log_cdf = standard_normal.log_cdf(z) + np.log1p(-2 * self._squash)
+        return tfp.math.log_add_exp(log_cdf, tf.cast(np.log(self._squash), z.dtype))
+
+    def prob_is_largest_all_classes(
+        self, mu, var, gh_x, gh_w, num_grid_points: int = 200, max_grid_spacing: float = 0.5
+    ):
+        """
+        Computes `prob_is_largest` for every class at once, [N, K].
+
+        For class y, the probability is the Gauss-Hermite estimate of
+        E_{x ~ N(mu_y, var_y)}[exp(S(x) - log Φ_y(x))], with the sum of the log CDFs
+        of all latent functions S(x) = Σ_j log Φ((x - mu_j) / √var_j). Rather than
+        evaluating S at the H nodes of each of the K classes, which costs
+        O(N K² H), S and its derivative are evaluated on a shared grid of
+        `num_grid_points` points spanning all nodes, and S is interpolated at the
+        nodes by cubic Hermite interpolation, which costs O(N K (H + num_grid_points)).
+        All computations are in log space.
+
+        S varies on the scale of the smallest standard deviation of the latent
+        functions, so the interpolation is only accurate if the grid spacing is
+        small compared to it. For the data whose grid spacing exceeds
+        `max_grid_spacing` times their smallest standard deviation (i.e. whose
+        class means are far apart relative to it), S is evaluated exactly at the
+        nodes instead.
+
+        :param mu: means [N, K].
+        :param var: variances [N, K].
+        :param gh_x: Gauss-Hermite evaluation locations [H].
+        :param gh_w: Gauss-Hermite weights [H].
+        :param num_grid_points: number of points of the shared grid.
+        :param max_grid_spacing: largest grid spacing, relative to the smallest
+            standard deviation of a datum, for which the grid is used.
+        :return: probabilities [N, K].
+        """
+        std = self.safe_sqrt(var)  # [N, K]
+        X = mu[:, :, None] + np.sqrt(2.0) * std[:, :, None] * gh_x  # [N, K, H]
+
+        span = tf.reduce_max(X, axis=[1, 2]) - tf.reduce_min(X, axis=[1, 2])  # [N]
+        spacing = span / (num_grid_points - 1)
+        exact = spacing > max_grid_spacing * tf.reduce_min(std, axis=1)  # [N]
+        indices = tf.dynamic_partition(tf.range(tf.shape(mu)[0]), tf.cast(exact, tf.int32), 2)
+        gathered = [[tf.gather(t, i) for t in (X, mu, std)] for i in indices]
+        S = tf.dynamic_stitch(
+            indices,
+            [
+                self._interpolated_log_cdf_sum(*gathered[0], num_grid_points),
+                self._log_cdf_sum(*gathered[1]),
+            ],
+        )  # [N, K, H]
+
+        # the CDF of the selected latent function at its own nodes is Φ(√2 gh_x)
+        log_own_cdf = self._log_squashed_cdf(np.sqrt(2.0) * gh_x)  # [H]
+        log_w = tf.math.log(gh_w / np.sqrt(np.pi))  # [H]
+        return tf.exp(tf.reduce_logsumexp(S - log_own_cdf + log_w, axis=-1))  # [N, K]
+
+    def _log_cdf_sum(self, X, mu, std):
+        """
+        S(X) = Σ_j log Φ((X - mu_j) / std_j) at the nodes X [N, K, H], evaluated
+        exactly in O(N K² H). The sum over j is accumulated in a loop, so that only
+        [N, K, H] tensors are held in memory.
+        """
+
+        def body(j, S):
+            dist = (X - mu[:, j, None, None]) / std[:, j, None, None]  # [N, K, H]
+            return j + 1, S + self._log_squashed_cdf(dist)
+
+        num_classes = tf.shape(mu)[1]
+        _, S = tf.while_loop(lambda j, _: j < num_classes, body, (tf.constant(0), tf.zeros_like(X)))
+        return S  # [N, K, H]
+
+    def _interpolated_log_cdf_sum(self, X, mu, std, num_grid_points):
+        """
+        S(X) = Σ_j log Φ((X - mu_j) / std_j) at the nodes X [N, K, H], interpolated
+        from a grid of `num_grid_points` points spanning the nodes of each datum.
+        """
+        # S and its derivative on a grid spanning all nodes of the datum
+        lower = tf.reduce_min(X, axis=[1, 2])[:, None]  # [N, 1]
+        upper = tf.reduce_max(X, axis=[1, 2])[:, None]  # [N, 1]
+        spacing = (upper - lower) / (num_grid_points - 1)  # [N, 1]
+        grid = lower + spacing * tf.range(num_grid_points, dtype=mu.dtype)  # [N, G]
+        dist = (grid[:, :, None] - mu[:, None, :]) / std[:, None, :]  # [N, G, K]
+        log_cdfs = self._log_squashed_cdf(dist)  # [N, G, K]
+        log_pdfs = -0.5 * tf.square(dist) - 0.5 * np.log(2 * np.pi)
+        dlog_cdfs = (1 - 2 * self._squash) * tf.exp(log_pdfs - log_cdfs) / std[:, None, :]
+        S_grid = tf.reduce_sum(log_cdfs, axis=-1)  # [N, G]
+        dS_grid = tf.reduce_sum(dlog_cdfs, axis=-1) * spacing  # [N, G], per grid spacing
+
+        # cubic Hermite interpolation of S at the nodes
+        N, K, H = tf.shape(X)[0], tf.shape(X)[1], tf.shape(X)[2]
+        position = tf.reshape((X - lower[:, :, None]) / spacing[:, :, None], (N, K * H))
+        index = tf.clip_by_value(tf.floor(position), 0, num_grid_points - 2)
+        t = position - index
+        index = tf.cast(index, tf.int32)
+        S0, S1 = tf.gather(S_grid, index, batch_dims=1), tf.gather(S_grid, index + 1, batch_dims=1)
+        dS0 = tf.gather(dS_grid, index, batch_dims=1)
+        dS1 = tf.gather(dS_grid, index + 1, batch_dims=1)
+        t2, t3 = t ** 2, t ** 3
+        S = (
+            (2 * t3 - 3 * t2 + 1) * S0
+            + (t3 - 2 * t2 + t) * dS0
+            + (-2 * t3 + 3 * t2) * S1
+            + (t3 - t2) * dS1
+        )
+        return tf.reshape(S, (N, K, H))
+
 
 class MultiClass(Likelihood):
     def __init__(self, num_classes, invlink=None, **kwargs):
@@ -118,6 +229,17 @@ class MultiClass(Likelihood):
         self.num_classes = num_classes
         self.num_gauss_hermite_points = 20
 
+        # If `vectorized_prediction` is set, `predict_mean_and_var` computes the
+        # probabilities of all classes at once (see
+        # `RobustMax.prob_is_largest_all_classes`), optionally only for the
+        # `prediction_top_k` classes with the largest latent means per datum: the
+        # other classes are then assumed never to be the largest. The grid
+        # parameters are passed on as `num_grid_points` and `max_grid_spacing`.
+        self.vectorized_prediction = False
+        self.prediction_top_k = None
+        self.num_prediction_grid_points = 200
+        self.prediction_max_grid_spacing = 0.5
+
         if invlink is None:
             invlink = RobustMax(self.num_classes)
 
@@ -126,6 +248,15 @@ class MultiClass(Likelihood):
 
         self.invlink = invlink
 
+    @property
+    def quadrature_rule(self):
+        """
+        Gauss-Hermite evaluation locations and weights, both [H], for
+        H = num_gauss_hermite_points, from the quadrature rule registry.
+        """
+        gh_x, gh_w = cached_quadrature_rule("gauss-hermite", self.num_gauss_hermite_points, 1)
+        return tf.reshape(gh_x, (-1,)), gh_w
+
     def _log_prob(self, F, Y):
         hits = tf.equal(tf.expand_dims(tf.argmax(F, 1), 1), tf.cast(Y, tf.int64))
         yes = tf.ones(tf.shape(Y), dtype=default_float()) - self.invlink.epsilon
@@ -134,14 +265,33 @@ class MultiClass(Likelihood):
         return tf.reduce_sum(tf.math.log(p), axis=-1)
 
     def _variational_expectations(self, Fmu, Fvar, Y):
-        gh_x, gh_w = hermgauss(self.num_gauss_hermite_points)
+        gh_x, gh_w = self.quadrature_rule
         p = self.invlink.prob_is_largest(Y, Fmu, Fvar, gh_x, gh_w)
         ve = p * tf.math.log(1.0 - self.invlink.epsilon) + (1.0 - p) * tf.math.log(
             self.invlink.eps_k1
         )
         return tf.reduce_sum(ve, axis=-1)
 
+    def _predict_all_classes(self, Fmu, Fvar):
+        gh_x, gh_w = self.quadrature_rule
+        prob_is_largest = lambda mu, var: self.invlink.prob_is_largest_all_classes(
+            mu, var, gh_x, gh_w, self.num_prediction_grid_points, self.prediction_max_grid_spacing
+        )
+        if self.prediction_top_k is None or self.prediction_top_k >= self.num_classes:
+            p = prob_is_largest(Fmu, Fvar)  # [N, K]
+        else:
+            top_k = tf.math.top_k(Fmu, self.prediction_top_k).indices  # [N, k]
+            p_top_k = prob_is_largest(
+                tf.gather(Fmu, top_k, batch_dims=1), tf.gather(Fvar, top_k, batch_dims=1)
+            )  # [N, k]
+            rows = tf.broadcast_to(tf.range(tf.shape(Fmu)[0])[:, None], tf.shape(top_k))
+            p = tf.scatter_nd(tf.stack([rows, top_k], axis=-1), p_top_k, tf.shape(Fmu))
+        return p * (1.0 - self.invlink.epsilon) + (1.0 - p) * self.invlink.eps_k1
+
     def _predict_mean_and_var(self, Fmu, Fvar):
+        if self.vectorized_prediction:
+            ps = self._predict_all_classes(Fmu, Fvar)
+            return ps, ps - tf.square(ps)
         possible_outputs = [
             tf.fill(tf.stack([tf.shape(Fmu)[0], 1]), np.array(i, dtype=np.int64))
             for i in range(self.num_classes)
@@ -154,7 +304,7 @@ class MultiClass(Likelihood):
         return tf.reduce_sum(tf.math.log(self._predict_non_logged_density(Fmu, Fvar, Y)), axis=-1)
 
     def _predict_non_logged_density(self, Fmu, Fvar, Y):
-        gh_x, gh_w = hermgauss(self.num_gauss_hermite_points)
+        gh_x, gh_w = self.quadrature_rule
         p = self.invlink.prob_is_largest(Y, Fmu, Fvar, gh_x, gh_w)
         den = p * (1.0 - self.invlink.epsilon) + (1.0 - p) * (self.invlink.eps_k1)
         return den
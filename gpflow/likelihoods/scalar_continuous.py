@@ -49,6 +49,9 @@ class Gaussian(ScalarLikelihood):
     def _predict_mean_and_var(self, Fmu, Fvar):
         return tf.identity(Fmu), Fvar + self.variance
 
+    def _predict_mean_and_mixed_var(self, Fmu, Fvar):
+        return tf.identity(Fmu), Fvar.add_diagonal(self.variance)
+
     def _predict_log_density(self, Fmu, Fvar, Y):
         return tf.reduce_sum(logdensities.gaussian(Y, Fmu, Fvar + self.variance), axis=-1)
 
@@ -16,6 +16,7 @@ import numpy as np
 import tensorflow as tf
 from .config import default_float
 from .utilities import to_default_float
+from .utilities.ops import assert_shapes
 
 
 def gaussian(x, mu, var):
@@ -104,6 +105,6 @@ def multivariate_normal(x, mu, L):
         (L, ["D", "D"]),
         (p, ["N"]),
     ]
-    tf.debugging.assert_shapes(shape_constraints, message="multivariate_normal()")
+    assert_shapes(shape_constraints, message="multivariate_normal()")
 
     return p
@@ -16,7 +16,7 @@
 
 from .gplvm import GPLVM, BayesianGPLVM
 from .gpmc import GPMC
-from .gpr import GPR
+from .gpr import GPR, KroneckerGPR
 from .model import BayesianModel, GPModel
 from .training_mixins import (
     ExternalDataTrainingLossMixin,
@@ -24,6 +24,7 @@ from .training_mixins import (
 )
 
 # from .gplvm import PCA_reduce
+from .sampling import InducingPosteriorSampler, PosteriorSampler, pathwise_samples
 from .sgpmc import SGPMC
 from .sgpr import GPRFITC, SGPR
 from .svgp import SVGP
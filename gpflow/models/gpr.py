@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 
+import numpy as np
 import tensorflow as tf
 
 import gpflow
-from ..kernels import Kernel
+from ..kernels import Coregion, Kernel, LinearCoregionalization
 from ..logdensities import multivariate_normal
 from ..mean_functions import MeanFunction
 from .model import GPModel, InputData, RegressionData, MeanAndVariance
@@ -102,3 +103,276 @@ class GPR(GPModel, InternalDataTrainingLossMixin):
         )  # [N, P], [N, P] or [P, N, N]
         f_mean = f_mean_zero + self.mean_function(Xnew)
         return f_mean, f_var
+
+
+class _Eigendecompositions(NamedTuple):
+    """
+    The eigendecompositions K₀ = U_K diag(s_K) U_Kᵀ and B₀ = U_B diag(s_B) U_Bᵀ, and
+    the eigenvalues [N, P] of Σ₀ = K₀ ⊗ B₀ + σ₀² I, all constants for automatic
+    differentiation; the current K, B and σ² in that eigenbasis, which carry the
+    gradients.
+    """
+
+    rotated_K: tf.Tensor
+    rotated_B: tf.Tensor
+    noise_variance: tf.Tensor
+    s_K: tf.Tensor
+    U_K: tf.Tensor
+    s_B: tf.Tensor
+    U_B: tf.Tensor
+    eigenvalues: tf.Tensor
+
+
+class KroneckerGPR(GPModel, InternalDataTrainingLossMixin):
+    r"""
+    Multi-output Gaussian Process Regression for isotopic data, i.e. data where
+    every output is observed at every input, exploiting the Kronecker structure
+    of the covariance.
+
+    The outputs are coregionalised through an output covariance B [P, P], so that
+    the covariance of the (row-wise) vectorised observations Y [N, P] is
+
+    .. math::
+       \mathbf{K} \otimes \mathbf{B} + \sigma_n \mathbf{I}.
+
+    B is either given by a `Coregion` kernel (B = W Wᵀ + diag(kappa)) together
+    with a single-output input kernel, or by a `LinearCoregionalization` kernel
+    whose latent kernels are all the same kernel object (B = W Wᵀ).
+
+    Instead of a Cholesky factorisation of the dense [NP, NP] matrix, the log
+    marginal likelihood and the predictions use the eigendecompositions of K and
+    B, at a cost of O(N³ + P³ + N²P + NP²) rather than O(N³P³).
+
+    The derivatives of eigenvectors are ill-conditioned when eigenvalues (nearly)
+    coincide, as they do for the default initialisation of `Coregion`, a
+    rank-deficient W or repeated inputs. The eigendecompositions are therefore
+    constants for automatic differentiation: K, B and σ² enter through an expansion
+    of the inverse and log-determinant of the covariance around its current value,
+    whose correction terms vanish but give exact gradients (and exact second
+    derivatives of the log marginal likelihood).
+    """
+
+    def __init__(
+        self,
+        data: RegressionData,
+        kernel: Kernel,
+        coregion: Optional[Coregion] = None,
+        mean_function: Optional[MeanFunction] = None,
+        noise_variance: float = 1.0,
+    ):
+        """
+        :param data: tuple of inputs X [N, D] and observations Y [N, P].
+        :param kernel: the input kernel, or a `LinearCoregionalization` kernel with
+            a single shared latent kernel, in which case `coregion` must be None.
+        :param coregion: a `Coregion` kernel with `output_dim` P providing B.
+        """
+        if isinstance(kernel, LinearCoregionalization):
+            if coregion is not None:
+                raise ValueError("`coregion` must be None for LinearCoregionalization kernels.")
+            if any(k is not kernel.kernels[0] for k in kernel.kernels):
+                raise ValueError(
+                    "KroneckerGPR requires all latent kernels of the LinearCoregionalization "
+                    "kernel to be the same kernel object."
+                )
+        elif not isinstance(coregion, Coregion):
+            raise ValueError("KroneckerGPR requires a Coregion kernel for the outputs.")
+        likelihood = gpflow.likelihoods.Gaussian(noise_variance)
+        _, Y_data = data
+        super().__init__(kernel, likelihood, mean_function, num_latent_gps=Y_data.shape[-1])
+        self.coregion = coregion
+        self.data = data
+
+    @property
+    def input_kernel(self) -> Kernel:
+        """The kernel K on the inputs."""
+        if isinstance(self.kernel, LinearCoregionalization):
+            return self.kernel.kernels[0]
+        return self.kernel
+
+    def output_covariance(self) -> tf.Tensor:
+        """The covariance B [P, P] between the outputs."""
+        if isinstance(self.kernel, LinearCoregionalization):
+            return tf.linalg.matmul(self.kernel.W, self.kernel.W, transpose_b=True)
+        return self.coregion.output_covariance()
+
+    def _eigendecompositions(self) -> _Eigendecompositions:
+        X, _ = self.data
+        K = self.input_kernel(X)  # [N, N]
+        B = self.output_covariance()  # [P, P]
+        noise_variance = tf.convert_to_tensor(self.likelihood.variance)
+        s_K, U_K = tf.linalg.eigh(tf.stop_gradient(K))  # [N], [N, N]
+        s_B, U_B = tf.linalg.eigh(tf.stop_gradient(B))  # [P], [P, P]
+        eigenvalues = s_K[:, None] * s_B[None, :] + tf.stop_gradient(noise_variance)  # [N, P]
+        return _Eigendecompositions(
+            rotated_K=tf.linalg.matmul(U_K, K @ U_K, transpose_a=True),
+            rotated_B=tf.linalg.matmul(U_B, B @ U_B, transpose_a=True),
+            noise_variance=noise_variance,
+            s_K=s_K,
+            U_K=U_K,
+            s_B=s_B,
+            U_B=U_B,
+            eigenvalues=eigenvalues,
+        )
+
+    @staticmethod
+    def _rotated_solve(eig: _Eigendecompositions, rotated_rhs: tf.Tensor) -> tf.Tensor:
+        """
+        Solves (K ⊗ B + σ² I) α = r in the eigenbasis, i.e. returns U_Kᵀ α U_B [N, P]
+        given U_Kᵀ r U_B [N, P], using the second-order expansion of the inverse
+        Σ⁻¹ = Σ₀⁻¹ - Σ₀⁻¹ Δ Σ₀⁻¹ + Σ₀⁻¹ Δ Σ₀⁻¹ Δ Σ₀⁻¹ around the constant Σ₀.
+        """
+
+        def rotated_difference(V):  # Δ V, where Δ = K ⊗ B + σ² I - Σ₀ vanishes
+            rotated_covariance = eig.rotated_K @ V @ eig.rotated_B
+            return rotated_covariance + (eig.noise_variance - eig.eigenvalues) * V
+
+        zeroth_order = rotated_rhs / eig.eigenvalues
+        first_order = rotated_difference(zeroth_order) / eig.eigenvalues
+        second_order = rotated_difference(first_order) / eig.eigenvalues
+        return zeroth_order - first_order + second_order
+
+    @staticmethod
+    def _log_det(eig: _Eigendecompositions) -> tf.Tensor:
+        """
+        The log-determinant of K ⊗ B + σ² I, using the second-order expansion
+        log|Σ| = log|Σ₀| + tr(Σ₀⁻¹ Δ) - ½ tr(Σ₀⁻¹ Δ Σ₀⁻¹ Δ) around the constant Σ₀.
+        """
+        inv_eigenvalues = 1.0 / eig.eigenvalues  # [N, P]
+        diag_K = tf.linalg.diag_part(eig.rotated_K)
+        diag_B = tf.linalg.diag_part(eig.rotated_B)
+        diag_difference = diag_K[:, None] * diag_B[None, :] - eig.eigenvalues  # [N, P]
+        diag_difference += eig.noise_variance
+        squares_K, squares_B = tf.square(eig.rotated_K), tf.square(eig.rotated_B)
+        # tr(Σ₀⁻¹ Δ Σ₀⁻¹ Δ), splitting off the diagonal of Δ = K ⊗ B + σ² I - Σ₀
+        trace_squared = (
+            tf.reduce_sum(inv_eigenvalues * (squares_K @ inv_eigenvalues @ squares_B))
+            - tf.reduce_sum(tf.square(diag_K[:, None] * diag_B[None, :] * inv_eigenvalues))
+            + tf.reduce_sum(tf.square(diag_difference * inv_eigenvalues))
+        )
+        return (
+            tf.reduce_sum(tf.math.log(eig.eigenvalues))
+            + tf.reduce_sum(diag_difference * inv_eigenvalues)
+            - 0.5 * trace_squared
+        )
+
+    def maximum_log_likelihood_objective(self) -> tf.Tensor:
+        return self.log_marginal_likelihood()
+
+    def log_marginal_likelihood(self) -> tf.Tensor:
+        r"""
+        Computes the log marginal likelihood.
+
+        .. math::
+            \log p(Y | \theta).
+
+        """
+        X, Y = self.data
+        eig = self._eigendecompositions()
+        err = Y - self.mean_function(X)  # [N, P]
+        rotated_err = tf.linalg.matmul(eig.U_K, err @ eig.U_B, transpose_a=True)
+        rotated_alpha = self._rotated_solve(eig, rotated_err)
+        num_values = tf.cast(tf.size(eig.eigenvalues), eig.eigenvalues.dtype)
+        return -0.5 * (
+            tf.reduce_sum(rotated_err * rotated_alpha)
+            + self._log_det(eig)
+            + num_values * np.log(2 * np.pi)
+        )
+
+    def predict_f(
+        self, Xnew: InputData, full_cov: bool = False, full_output_cov: bool = False
+    ) -> MeanAndVariance:
+        r"""
+        This method computes predictions at X \in R^{N \x D} input points
+
+        .. math::
+            p(F* | Y)
+
+        where F* are points on the GP at new data points, Y are noisy observations at training data points.
+        """
+        X_data, Y_data = self.data
+        eig = self._eigendecompositions()
+        B = self.output_covariance()
+        err = Y_data - self.mean_function(X_data)
+
+        rotated_err = tf.linalg.matmul(eig.U_K, err @ eig.U_B, transpose_a=True)
+        rotated_alpha = self._rotated_solve(eig, rotated_err)
+        alpha = eig.U_K @ rotated_alpha @ tf.transpose(eig.U_B)  # [N, P]
+        kmn = self.input_kernel(Xnew, X_data)  # [N*, N]
+        f_mean = kmn @ alpha @ B + self.mean_function(Xnew)  # [N*, P]
+
+        A = kmn @ eig.U_K  # [N*, N]
+        C = B @ eig.U_B  # [P, P]
+        inv_eigenvalues = 1.0 / eig.eigenvalues  # [N, P]
+        if full_cov and full_output_cov:
+            knn = self.input_kernel(Xnew)  # [N*, N*]
+            prior = knn[:, None, :, None] * B[None, :, None, :]
+            reduction = tf.einsum("in,pk,nk,jn,qk->ipjq", A, C, inv_eigenvalues, A, C)
+        elif full_cov:
+            knn = self.input_kernel(Xnew)  # [N*, N*]
+            prior = tf.linalg.diag_part(B)[:, None, None] * knn[None, :, :]
+            weights = tf.linalg.matmul(tf.square(C), inv_eigenvalues, transpose_b=True)  # [P, N]
+            reduction = tf.einsum("in,pn,jn->pij", A, weights, A)
+        elif full_output_cov:
+            knn = self.input_kernel(Xnew, full_cov=False)  # [N*]
+            prior = knn[:, None, None] * B[None, :, :]
+            weights = tf.square(A) @ inv_eigenvalues  # [N*, P]
+            reduction = tf.einsum("ik,pk,qk->ipq", weights, C, C)
+        else:
+            knn = self.input_kernel(Xnew, full_cov=False)  # [N*]
+            prior = knn[:, None] * tf.linalg.diag_part(B)[None, :]
+            reduction = tf.square(A) @ inv_eigenvalues @ tf.transpose(tf.square(C))
+        reduction += self._reduction_gradient(eig, A, C, reduction, full_cov, full_output_cov)
+        f_var = prior - reduction  # [N*, P], [N*, P, P], [P, N*, N*] or [N*, P, N*, P]
+        return f_mean, f_var
+
+    @staticmethod
+    def _reduction_gradient(
+        eig: _Eigendecompositions,
+        A: tf.Tensor,
+        C: tf.Tensor,
+        reduction: tf.Tensor,
+        full_cov: bool,
+        full_output_cov: bool,
+    ) -> tf.Tensor:
+        """
+        Returns zeros of the shape of the variance reduction, whose gradients are those
+        of the reduction (kmn ⊗ B) Σ⁻¹ (kmn ⊗ B)ᵀ through Σ⁻¹, from the first-order
+        term -Σ₀⁻¹ Δ Σ₀⁻¹ of the expansion of the inverse. As this term is costlier
+        than the reduction itself, it is only evaluated in the backward pass.
+        """
+        A, C = tf.stop_gradient(A), tf.stop_gradient(C)
+        weights = 1.0 / eig.eigenvalues  # [N, P], Σ₀⁻¹ in the eigenbasis
+        j = "j" if full_cov else "i"
+        q = "q" if full_output_cov else "p"
+        output = {
+            (True, True): "ipjq",
+            (True, False): "pij",
+            (False, True): "ipq",
+            (False, False): "ip",
+        }[full_cov, full_output_cov]
+
+        def first_order(rotated_K, rotated_B, noise_variance):
+            # Δ = (ΔK) ⊗ B₀ + K₀ ⊗ (ΔB) + (Δσ²) I to first order, in the eigenbasis
+            dK = rotated_K - tf.linalg.diag(eig.s_K)
+            dB = rotated_B - tf.linalg.diag(eig.s_B)
+            dnoise = noise_variance - tf.stop_gradient(noise_variance)
+            subscripts_K = f"k,pk,{q}k,in,nk,nm,mk,{j}m->{output}"
+            subscripts_B = f"n,in,{j}n,pk,nk,kl,nl,{q}l->{output}"
+            subscripts_noise = f"in,{j}n,pk,{q}k,nk->{output}"
+            term_K = tf.einsum(subscripts_K, eig.s_B, C, C, A, weights, dK, weights, A)
+            term_B = tf.einsum(subscripts_B, eig.s_K, A, A, C, weights, dB, weights, C)
+            term_noise = dnoise * tf.einsum(subscripts_noise, A, A, C, C, tf.square(weights))
+            return -(term_K + term_B + term_noise)
+
+        @tf.custom_gradient
+        def zeros(rotated_K, rotated_B, noise_variance):
+            def grad(upstream):
+                inputs = [rotated_K, rotated_B, noise_variance]
+                with tf.GradientTape() as tape:
+                    tape.watch(inputs)
+                    value = first_order(*inputs)
+                return tape.gradient(value, inputs, output_gradients=upstream)
+
+            return tf.zeros_like(reduction), grad
+
+        return zeros(eig.rotated_K, eig.rotated_B, eig.noise_variance)
@@ -0,0 +1,380 @@
+# Copyright 2020 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Posterior samplers for GP models.
+
+Pathwise posterior sampling ("Matheron's rule"): a posterior function sample is
+written as a prior function sample plus an update through the inducing (or
+training) inputs Z,
+
+    f(·) = f_prior(·) + k(·, Z) K_ZZ⁻¹ (u - f_prior(Z)),
+
+where u is a sample of the inducing (or noisy training) outputs. The prior sample
+is approximated with random Fourier features, so that the resulting function
+samples can be evaluated at arbitrary inputs X [N, D] in O(N (F + M)), for F
+features and M inducing inputs, without factorising an [N, N] covariance.
+
+Samplers bound to fixed inputs: `PosteriorSampler` factorises the posterior
+covariance at the inputs once, and then draws batches of S samples at O(S N²)
+cost. `InducingPosteriorSampler` samples sparse models through their inducing
+outputs, at O(S N M) cost without any [N, N] factorisation.
+"""
+
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+from ..config import default_float, default_jitter
+from ..covariances import Kuf, Kuu
+from ..inducing_variables import InducingPoints
+from ..kernels import Exponential, Kernel, Matern12, Matern32, Matern52, SquaredExponential
+from ..mean_functions import MeanFunction
+from ..utilities.ops import leading_transpose
+from .gpr import GPR
+from .model import GPModel, InputData
+from .sgpr import SGPR
+from .svgp import SVGP
+
+__all__ = [
+    "RandomFourierFeatures",
+    "FunctionSamples",
+    "pathwise_samples",
+    "PosteriorSampler",
+    "InducingPosteriorSampler",
+]
+
+
+class RandomFourierFeatures:
+    """
+    Random Fourier features φ(X) [..., N, F] of a stationary kernel, such that
+    φ(X) φ(X2)ᵀ is an unbiased estimate of k(X, X2):
+
+        φ(x) = √(2σ² / F) cos(ωᵀ x / ℓ + b),
+
+    with frequencies ω drawn from the spectral density of the kernel and phases
+    b ~ U(0, 2π). The frequencies and phases are drawn once, at construction;
+    the variance and lengthscales of the kernel are read on every evaluation.
+
+    Supported kernels are SquaredExponential, Exponential, Matern12, Matern32 and
+    Matern52.
+    """
+
+    def __init__(self, kernel: Kernel, input_dim: int, num_features: int):
+        """
+        :param kernel: the kernel to approximate.
+        :param input_dim: the number of active input dimensions of the kernel.
+        :param num_features: the number of features F.
+        """
+        self.kernel = kernel
+        self.num_features = num_features
+        self.frequencies = _spectral_frequencies(kernel, [num_features, input_dim])  # [F, D]
+        self.phases = tf.random.uniform(
+            [num_features], maxval=2 * np.pi, dtype=default_float()
+        )  # [F]
+
+    def __call__(self, X: InputData) -> tf.Tensor:
+        X, _ = self.kernel.slice(X, None)
+        X_scaled = X / self.kernel.lengthscales  # [..., N, D]
+        projection = tf.tensordot(X_scaled, self.frequencies, [[-1], [-1]])  # [..., N, F]
+        amplitude = tf.sqrt(2 * self.kernel.variance / self.num_features)
+        return amplitude * tf.cos(projection + self.phases)  # [..., N, F]
+
+
+def _spectral_frequencies(kernel: Kernel, shape) -> tf.Tensor:
+    """
+    Draws frequencies from the normalised spectral density of `kernel`, for
+    inputs scaled by the lengthscales.
+    """
+    normal = tf.random.normal(shape, dtype=default_float())
+    if isinstance(kernel, SquaredExponential):
+        return normal
+    # The spectral density of a Matérn-ν kernel is a Student-t distribution with 2ν
+    # degrees of freedom: ω = z / √g with z ~ N(0, I) and g ~ Gamma(ν, rate=ν).
+    if isinstance(kernel, (Matern12, Exponential)):
+        nu = 0.5
+    elif isinstance(kernel, Matern32):
+        nu = 1.5
+    elif isinstance(kernel, Matern52):
+        nu = 2.5
+    else:
+        raise NotImplementedError(
+            f"Random Fourier features are not implemented for {kernel.__class__.__name__}."
+        )
+    gamma = tf.random.gamma(shape[:1], alpha=nu, beta=nu, dtype=default_float())  # [F]
+    frequencies = normal / tf.sqrt(gamma)[:, None]
+    if isinstance(kernel, Exponential):
+        # Exponential is a Matern12 kernel with doubled lengthscales
+        frequencies = 0.5 * frequencies
+    return frequencies
+
+
+class FunctionSamples:
+    """
+    S posterior function samples of a GP with P outputs, represented as
+
+        f_s(X) = φ(X) w_s + k(X, Z) v_s + m(X),
+
+    with random Fourier features φ(X) [N, F], prior weights w [S, F, P], update
+    weights v [S, M, P] and mean function m. Calling the object on inputs
+    X [..., N, D] evaluates all samples, [..., S, N, P], or [..., N, P] for a
+    single sample (num_samples=None).
+
+    The update weights are computed at construction; the samples are therefore
+    only valid while the model parameters are not changed.
+    """
+
+    def __init__(
+        self,
+        features: RandomFourierFeatures,
+        prior_weights: tf.Tensor,
+        inducing_inputs: tf.Tensor,
+        update_weights: tf.Tensor,
+        mean_function: MeanFunction,
+        num_samples: Optional[int] = None,
+    ):
+        self.features = features
+        self.prior_weights = prior_weights  # [S, F, P]
+        self.inducing_inputs = inducing_inputs  # [M, D]
+        self.update_weights = update_weights  # [S, M, P]
+        self.mean_function = mean_function
+        self.num_samples = num_samples
+
+    def prior(self, X: InputData) -> tf.Tensor:
+        """
+        Evaluates the prior function samples, [..., S, N, P].
+        """
+        return tf.einsum("...nf,sfp->...snp", self.features(X), self.prior_weights)
+
+    def __call__(self, X: InputData) -> tf.Tensor:
+        Kxz = self.features.kernel(X, self.inducing_inputs)  # [..., N, M]
+        update = tf.einsum("...nm,smp->...snp", Kxz, self.update_weights)  # [..., S, N, P]
+        samples = self.prior(X) + update + self.mean_function(X)[..., None, :, :]
+        if self.num_samples is None:
+            return tf.squeeze(samples, axis=-3)  # [..., N, P]
+        return samples  # [..., S, N, P]
+
+
+def pathwise_samples(
+    model: GPModel, num_samples: Optional[int] = None, num_features: int = 1024
+) -> FunctionSamples:
+    """
+    Draws posterior function samples from a GPR, SGPR or SVGP model with a
+    single-output stationary kernel (see `RandomFourierFeatures`), using
+    pathwise conditioning.
+
+    :param model: the model to sample from.
+    :param num_samples: number of function samples S. If None, a single sample is
+        drawn and evaluating it returns [..., N, P] rather than [..., S, N, P].
+    :param num_features: number of random Fourier features for the prior samples.
+    :return: a callable `FunctionSamples` object.
+    """
+    S = 1 if num_samples is None else num_samples
+    P = model.num_latent_gps
+    kernel = model.kernel
+
+    if isinstance(model, (SVGP, SGPR)):
+        if not isinstance(model.inducing_variable, InducingPoints):
+            raise NotImplementedError("Pathwise sampling requires InducingPoints.")
+        Z = model.inducing_variable.Z
+        Kzz = Kuu(model.inducing_variable, kernel, jitter=default_jitter())  # [M, M]
+    elif isinstance(model, GPR):
+        Z, Y = model.data
+        Kzz = kernel(Z)
+        Kzz = tf.linalg.set_diag(Kzz, tf.linalg.diag_part(Kzz) + model.likelihood.variance)
+    else:
+        raise NotImplementedError(
+            f"Pathwise sampling is not implemented for {model.__class__.__name__}."
+        )
+    Lz = tf.linalg.cholesky(Kzz)  # [M, M]
+    M = tf.shape(Z)[0]
+
+    input_dim = kernel.slice(Z, None)[0].shape[-1]
+    features = RandomFourierFeatures(kernel, input_dim, num_features)
+    prior_weights = tf.random.normal([S, num_features, P], dtype=default_float())  # [S, F, P]
+    prior_at_Z = tf.einsum("mf,sfp->smp", features(Z), prior_weights)  # [S, M, P]
+
+    eps = tf.random.normal([S, M, P], dtype=default_float())  # [S, M, P]
+    if isinstance(model, SVGP):
+        if model.q_sqrt.shape.ndims == 2:
+            v = model.q_mu + model.q_sqrt * eps  # [S, M, P]
+        else:
+            q_sqrt = tf.linalg.band_part(model.q_sqrt, -1, 0)  # [P, M, M]
+            v = model.q_mu + tf.einsum("pmk,skp->smp", q_sqrt, eps)
+        u = tf.einsum("mk,skp->smp", Lz, v) if model.whiten else v
+        residual = u - prior_at_Z
+    elif isinstance(model, SGPR):
+        q_mu, q_cov = model.compute_qu()  # [M, P], [M, M]
+        q_cov = tf.linalg.set_diag(q_cov, tf.linalg.diag_part(q_cov) + default_jitter())
+        u = q_mu + tf.einsum("mk,skp->smp", tf.linalg.cholesky(q_cov), eps)
+        residual = u - prior_at_Z
+    else:
+        # the noisy prior sample at the training inputs is prior_at_Z + √σ² eps
+        err = Y - model.mean_function(Z)  # [N, P]
+        residual = err - prior_at_Z - tf.sqrt(model.likelihood.variance) * eps
+
+    # v = Kzz⁻¹ (u - f_prior(Z)), solved for all samples and outputs at once
+    rhs = tf.reshape(tf.transpose(residual, [1, 0, 2]), [M, -1])  # [M, S * P]
+    update_weights = tf.linalg.cholesky_solve(Lz, rhs)
+    update_weights = tf.transpose(tf.reshape(update_weights, [M, S, P]), [1, 0, 2])  # [S, M, P]
+
+    return FunctionSamples(
+        features, prior_weights, Z, update_weights, model.mean_function, num_samples
+    )
+
+
+class PosteriorSampler:
+    """
+    Draws correlated posterior samples of `model` at fixed inputs Xnew. The
+    posterior mean and the Cholesky factor of the [P, N, N] posterior covariance
+    are computed once, at construction, so that each batch of S samples costs
+    O(S N²) instead of the O(N³) of `GPModel.predict_f_samples`.
+
+    If the Cholesky factorisation fails, the jitter added to the diagonal is
+    increased tenfold, up to `max_jitter_attempts` times.
+
+    The cached factor is not updated when the model parameters change; create a
+    new sampler instead.
+    """
+
+    def __init__(
+        self,
+        model: GPModel,
+        Xnew: InputData,
+        *,
+        jitter: Optional[float] = None,
+        max_jitter_attempts: int = 5,
+    ):
+        """
+        :param model: the model to sample from.
+        :param Xnew: inputs [..., N, D].
+        :param jitter: initial jitter added to the diagonal of the covariance,
+            defaults to `gpflow.config.default_jitter()`.
+        :param max_jitter_attempts: number of times the jitter is increased
+            before giving up.
+        """
+        self.Xnew = Xnew
+        mean, cov = model.predict_f(Xnew, full_cov=True)  # [..., N, P], [..., P, N, N]
+        self.mean = mean
+        jitter = default_jitter() if jitter is None else jitter
+        for _ in range(max_jitter_attempts):
+            try:
+                cholesky = tf.linalg.cholesky(
+                    tf.linalg.set_diag(cov, tf.linalg.diag_part(cov) + jitter)
+                )
+            except tf.errors.InvalidArgumentError:
+                cholesky = None
+            if cholesky is not None and tf.reduce_all(tf.math.is_finite(cholesky)):
+                break
+            jitter *= 10
+        else:
+            raise tf.errors.InvalidArgumentError(
+                None, None, "The posterior covariance is not positive definite."
+            )
+        self.jitter = jitter
+        self.cholesky = cholesky  # [..., P, N, N]
+
+    def sample(self, num_samples: Optional[int] = None) -> tf.Tensor:
+        """
+        :param num_samples: number of samples S.
+        :return: samples [..., S, N, P], or [..., N, P] if num_samples is None.
+        """
+        S = 1 if num_samples is None else num_samples
+        eps_shape = tf.concat([tf.shape(self.cholesky)[:-1], [S]], 0)
+        eps = tf.random.normal(eps_shape, dtype=self.cholesky.dtype)  # [..., P, N, S]
+        samples = tf.linalg.matmul(self.cholesky, eps)  # [..., P, N, S]
+        samples = leading_transpose(samples, [..., -1, -2, -3]) + self.mean[..., None, :, :]
+        if num_samples is None:
+            return tf.squeeze(samples, axis=-3)  # [..., N, P]
+        return samples  # [..., S, N, P]
+
+
+class InducingPosteriorSampler:
+    """
+    Draws posterior samples of a sparse model (SVGP or SGPR with a single-output
+    kernel) at fixed inputs Xnew through its inducing outputs u ~ q(u):
+
+        f(Xnew) = m(Xnew) + A u,
+
+    where A = K_fu K_uu⁻¹ (or K_fu L_uu⁻ᵀ for whitened SVGP models) [N, M] is
+    cached at construction. This gives a rank-M approximation of the posterior
+    covariance that drops the Nyström residual K_ff - Q_ff. With
+    `diagonal_correction`, the diagonal of the residual is added as independent
+    noise, so that the marginal variances are exact. No [N, N] matrix is formed
+    or factorised, and each batch of S samples costs O(S N M P).
+    """
+
+    def __init__(self, model: GPModel, Xnew: InputData, *, diagonal_correction: bool = True):
+        """
+        :param model: an SVGP or SGPR model.
+        :param Xnew: inputs [N, D].
+        :param diagonal_correction: whether to add the diagonal of K_ff - Q_ff.
+        """
+        if isinstance(model, SVGP):
+            self.q_mu = tf.convert_to_tensor(model.q_mu)  # [M, P]
+            if model.q_sqrt.shape.ndims == 2:
+                self.q_sqrt = tf.linalg.diag(tf.transpose(model.q_sqrt))  # [P, M, M]
+            else:
+                self.q_sqrt = tf.linalg.band_part(model.q_sqrt, -1, 0)  # [P, M, M]
+            whiten = model.whiten
+        elif isinstance(model, SGPR):
+            self.q_mu, q_cov = model.compute_qu()  # [M, P], [M, M]
+            q_cov = tf.linalg.set_diag(q_cov, tf.linalg.diag_part(q_cov) + default_jitter())
+            self.q_sqrt = tf.linalg.cholesky(q_cov)[None, :, :]  # [1, M, M]
+            whiten = False
+        else:
+            raise NotImplementedError(
+                f"InducingPosteriorSampler is not implemented for {model.__class__.__name__}."
+            )
+
+        kernel, inducing_variable = model.kernel, model.inducing_variable
+        Kuu_ = Kuu(inducing_variable, kernel, jitter=default_jitter())  # [M, M]
+        Kuf_ = Kuf(inducing_variable, kernel, Xnew)  # [M, N]
+        Luu = tf.linalg.cholesky(Kuu_)
+        whitened_projection = tf.linalg.triangular_solve(Luu, Kuf_)  # [M, N]
+
+        if whiten:
+            self.projection = whitened_projection  # [M, N]
+        else:
+            self.projection = tf.linalg.triangular_solve(
+                Luu, whitened_projection, adjoint=True
+            )  # [M, N]
+        self.mean = tf.linalg.matmul(self.projection, self.q_mu, transpose_a=True)
+        self.mean += model.mean_function(Xnew)  # [N, P]
+
+        if diagonal_correction:
+            residual = kernel(Xnew, full_cov=False) - tf.reduce_sum(
+                tf.square(whitened_projection), 0
+            )
+            self.residual_variance = tf.maximum(residual, 0.0)[:, None]  # [N, 1]
+        else:
+            self.residual_variance = None
+
+    def sample(self, num_samples: Optional[int] = None) -> tf.Tensor:
+        """
+        :param num_samples: number of samples S.
+        :return: samples [S, N, P], or [N, P] if num_samples is None.
+        """
+        S = 1 if num_samples is None else num_samples
+        M, P = tf.shape(self.q_mu)[0], tf.shape(self.q_mu)[1]
+        eps = tf.random.normal([S, M, P], dtype=self.q_mu.dtype)
+        u = tf.einsum("pmk,skp->smp", tf.broadcast_to(self.q_sqrt, [P, M, M]), eps)
+        samples = tf.einsum("mn,smp->snp", self.projection, u) + self.mean  # [S, N, P]
+        if self.residual_variance is not None:
+            noise = tf.random.normal(tf.shape(samples), dtype=samples.dtype)
+            samples += tf.sqrt(self.residual_variance) * noise
+        if num_samples is None:
+            return tf.squeeze(samples, axis=0)  # [N, P]
+        return samples  # [S, N, P]
@@ -4,3 +4,4 @@ from . import natgrad
 from .natgrad import *
 from .scipy import Scipy
 from .mcmc import SamplingHelper
+from .multistart import MultiStart, MultiStartResult, sample_initial_values
@@ -0,0 +1,239 @@
+"""
+Multi-start optimisation of GPflow models.
+
+The marginal likelihood of a GP is in general multimodal, so it is common to run
+`Scipy.minimize` from several random initialisations and keep the best optimum.
+`MultiStart` runs the restarts in a pool of worker processes, each of which builds
+its own copy of the model from a picklable `model_factory` and is restricted to a
+small number of TensorFlow threads, so that the restarts run in parallel rather
+than competing for the cores of a single process.
+
+Example:
+    def create_model():  # must be defined at module level to be picklable
+        return gpflow.models.GPR(data, kernel=gpflow.kernels.Matern52())
+
+    model = create_model()
+    initial_values = sample_initial_values(
+        model, 20, ranges={".kernel.lengthscales": (0.1, 10.0)}, seed=0
+    )
+    results = MultiStart(create_model, threads_per_process=1).minimize(model, initial_values)
+    # `model` now holds the parameters of the restart with the lowest loss.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import tensorflow as tf
+from scipy.optimize import OptimizeResult
+
+from .. import config
+from ..base import Module, Parameter, PriorOn
+from ..utilities import multiple_assign, parameter_dict, read_values
+from .scipy import LossClosure, Scipy
+
+__all__ = ["MultiStart", "MultiStartResult", "sample_initial_values"]
+
+ModelFactory = Callable[[], Module]
+LossClosureFactory = Callable[[Module], LossClosure]
+
+
+class MultiStartResult(NamedTuple):
+    """
+    The outcome of one restart. `values` are the optimised parameter values, as
+    returned by `read_values`. If the optimisation did not reach a finite loss,
+    `loss` is infinite and `values` is None; `scipy_result` is None as well if it
+    raised an error (e.g. a Cholesky failure at the initial values).
+    """
+
+    loss: float
+    values: Optional[Dict[str, np.ndarray]]
+    initial_values: Dict[str, np.ndarray]
+    scipy_result: Optional[OptimizeResult]
+
+
+def sample_initial_values(
+    model: Module,
+    num_samples: int,
+    ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    seed: Optional[int] = None,
+) -> List[Dict[str, np.ndarray]]:
+    """
+    Draws initial values for the trainable parameters of a model.
+
+    Parameters listed in `ranges` are drawn uniformly between the given (low, high)
+    bounds of their constrained value. The other trainable parameters are drawn from
+    their prior if they have one, and keep their current value otherwise.
+
+    :param model: the model whose parameters are initialised.
+    :param num_samples: number of sets of initial values.
+    :param ranges: a dictionary with keys of the form ".module.path.to.parameter"
+        (as in `multiple_assign`) and (low, high) tuples as values.
+    :param seed: seed of the random number generator.
+    :return: a list of `num_samples` dictionaries, suitable for `multiple_assign`.
+    """
+    ranges = {} if ranges is None else ranges
+    parameters = parameter_dict(model)
+    unknown_paths = set(ranges) - set(parameters)
+    if unknown_paths:
+        raise ValueError(f"The model has no parameters at paths {sorted(unknown_paths)}.")
+
+    rng = np.random.RandomState(seed)
+    samples = []
+    for _ in range(num_samples):
+        values = {}
+        for path, parameter in parameters.items():
+            shape = tuple(parameter.shape)
+            dtype = parameter.dtype.as_numpy_dtype
+            if path in ranges:
+                low, high = ranges[path]
+                values[path] = rng.uniform(low, high, size=shape).astype(dtype)
+            elif _has_prior(parameter):
+                values[path] = _sample_prior(parameter, rng).astype(dtype)
+        samples.append(values)
+    return samples
+
+
+def _has_prior(parameter) -> bool:
+    return isinstance(parameter, Parameter) and parameter.trainable and parameter.prior is not None
+
+
+def _sample_prior(parameter: Parameter, rng: np.random.RandomState) -> np.ndarray:
+    prior = parameter.prior
+    distribution_rank = prior.batch_shape.ndims + prior.event_shape.ndims
+    sample_shape = tuple(parameter.shape)[: parameter.shape.ndims - distribution_rank]
+    # a stateless seed, so that the samples only depend on `rng`
+    seed = tf.constant(rng.randint(2 ** 31 - 1, size=2), dtype=tf.int32)
+    sample = prior.sample(sample_shape, seed=seed)
+    if parameter.prior_on == PriorOn.UNCONSTRAINED and parameter.transform is not None:
+        sample = parameter.transform.forward(sample)
+    return np.broadcast_to(sample.numpy(), parameter.shape).copy()
+
+
+def _training_loss(model: Module) -> LossClosure:
+    return model.training_loss
+
+
+def _initialize_worker(worker_config: config.Config, num_threads: int) -> None:
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(num_threads)
+    config.set_config(worker_config)
+
+
+def _minimize_from(
+    model_factory: ModelFactory,
+    loss_closure: LossClosureFactory,
+    initial_values: Dict[str, np.ndarray],
+    method: Optional[str],
+    compile: bool,
+    scipy_kwargs: dict,
+    model: Optional[Module] = None,
+) -> MultiStartResult:
+    model = model_factory() if model is None else model
+    try:
+        multiple_assign(model, initial_values)
+        result = Scipy().minimize(
+            loss_closure(model), model.trainable_variables, method, compile=compile, **scipy_kwargs
+        )
+    except tf.errors.InvalidArgumentError:
+        return MultiStartResult(np.inf, None, initial_values, None)
+    if not np.isfinite(result.fun):
+        return MultiStartResult(np.inf, None, initial_values, result)
+    return MultiStartResult(float(result.fun), read_values(model), initial_values, result)
+
+
+class MultiStart:
+    """
+    Runs `Scipy.minimize` from several initial values, in parallel worker processes,
+    and keeps the parameters that reach the lowest loss.
+
+    Worker processes are started with the "spawn" method, as TensorFlow's runtime
+    cannot be forked safely. They hence cannot share the model with the calling
+    process: each one builds its own model by calling `model_factory`, which (like
+    `loss_closure` and the `scipy_kwargs`) must therefore be picklable, i.e.
+    defined at module level. Only parameter values are passed between processes.
+    The GPflow config of the calling process is replicated in the workers.
+    """
+
+    def __init__(
+        self,
+        model_factory: ModelFactory,
+        num_processes: Optional[int] = None,
+        threads_per_process: int = 1,
+        loss_closure: Optional[LossClosureFactory] = None,
+    ):
+        """
+        :param model_factory: a callable without arguments that returns a new model,
+            with the same structure as the model passed to `minimize`.
+        :param num_processes: number of worker processes. Defaults to the number of
+            cores divided by `threads_per_process`. If 0, the restarts are run
+            sequentially in the calling process, on a single model built by
+            `model_factory`; the factory then does not need to be picklable.
+        :param threads_per_process: number of TensorFlow intra- and inter-op threads
+            of each worker process.
+        :param loss_closure: a callable that returns the loss closure of a model.
+            Defaults to `model.training_loss`, which requires a model with internal
+            data; use e.g. `functools.partial(SVGP.training_loss_closure, data=data)`
+            for other models.
+        """
+        if threads_per_process < 1:
+            raise ValueError("`threads_per_process` must be a positive integer.")
+        if num_processes is None:
+            num_processes = max(1, (os.cpu_count() or 1) // threads_per_process)
+        self.model_factory = model_factory
+        self.num_processes = num_processes
+        self.threads_per_process = threads_per_process
+        self.loss_closure = _training_loss if loss_closure is None else loss_closure
+
+    def minimize(
+        self,
+        model: Module,
+        initial_values: Sequence[Dict[str, np.ndarray]],
+        method: Optional[str] = "L-BFGS-B",
+        compile: bool = True,
+        **scipy_kwargs,
+    ) -> List[MultiStartResult]:
+        """
+        Minimizes the loss from each set of initial values, and assigns the optimised
+        parameters of the restart with the lowest loss to `model`.
+
+        :param model: the model that receives the best parameter values.
+        :param initial_values: a sequence of dictionaries of initial parameter values,
+            as passed to `multiple_assign` (see e.g. `sample_initial_values`).
+        :param method: the Scipy optimisation method.
+        :param compile: whether to compile the loss and gradient evaluation.
+        :param scipy_kwargs: further arguments passed to `Scipy.minimize`.
+        :return: the `MultiStartResult` of every restart, in the order of
+            `initial_values`.
+        """
+        args = (self.model_factory, self.loss_closure)
+        if self.num_processes == 0:
+            worker_model = self.model_factory()
+            default_values = read_values(worker_model)
+            results = []
+            for values in initial_values:
+                multiple_assign(worker_model, default_values)
+                results.append(
+                    _minimize_from(*args, values, method, compile, scipy_kwargs, worker_model)
+                )
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=min(self.num_processes, len(initial_values)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+                initargs=(config.config(), self.threads_per_process),
+            )
+            with pool:
+                futures = [
+                    pool.submit(_minimize_from, *args, values, method, compile, scipy_kwargs)
+                    for values in initial_values
+                ]
+                results = [future.result() for future in futures]
+
+        best = min(results, key=lambda result: result.loss)
+        if not np.isfinite(best.loss):
+            raise RuntimeError("The optimisation failed from all initial values.")
+        multiple_assign(model, best.values)
+        return results
@@ -5,12 +5,15 @@ import scipy.optimize
 import tensorflow as tf
 from scipy.optimize import OptimizeResult
 
-__all__ = ["Scipy"]
+__all__ = ["Scipy", "PackedVariables"]
 
 Variables = Iterable[tf.Variable]
 StepCallback = Callable[[int, Variables, List[tf.Tensor]], None]
 LossClosure = Callable[[], tf.Tensor]
 
+# Methods that use Hessian-vector products, which are supplied automatically.
+HESSP_METHODS = ("newton-cg", "trust-ncg", "trust-krylov", "trust-constr")
+
 
 class Scipy:
     def minimize(
@@ -44,6 +47,12 @@ class Scipy:
                 well as its gradient computation) inside a `tf.function()`,
                 which will improve optimization speed in most cases.
 
+            For second-order methods ("Newton-CG", "trust-ncg", "trust-krylov" and
+            "trust-constr"), Hessian-vector products are passed to Scipy as
+            `hessp`, unless `hess` or `hessp` are given in `scipy_kwargs`. They are
+            computed exactly by forward-over-reverse automatic differentiation
+            (see `hessp_func`), at a cost of a few gradient evaluations each.
+
             scipy_kwargs: Arguments passed through to `scipy.optimize.minimize`
 
         Returns:
@@ -69,6 +78,14 @@ class Scipy:
             callback = self.callback_func(variables, step_callback)
             scipy_kwargs.update(dict(callback=callback))
 
+        if (
+            isinstance(method, str)
+            and method.lower() in HESSP_METHODS
+            and "hess" not in scipy_kwargs
+            and "hessp" not in scipy_kwargs
+        ):
+            scipy_kwargs.update(hessp=self.hessp_func(closure, variables, compile=compile))
+
         return scipy.optimize.minimize(
             func, initial_params, jac=True, method=method, **scipy_kwargs
         )
@@ -81,31 +98,63 @@ class Scipy:
     def eval_func(
         cls, closure: LossClosure, variables: Variables, compile: bool = True
     ) -> Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        packed = PackedVariables(variables)
+
         def _tf_eval(x: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
-            values = cls.unpack_tensors(variables, x)
-            cls.assign_tensors(variables, values)
+            packed.assign(x)
 
-            loss, grads = _compute_loss_and_gradients(closure, variables)
-            return loss, cls.pack_tensors(grads)
+            loss, grads = _compute_loss_and_gradients(closure, packed.variables)
+            return tf.cast(loss, tf.float64), packed.pack(grads)
 
         if compile:
             _tf_eval = tf.function(_tf_eval)
 
         def _eval(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
             loss, grad = _tf_eval(tf.convert_to_tensor(x))
-            return loss.numpy().astype(np.float64), grad.numpy().astype(np.float64)
+            return _to_numpy(loss), _to_numpy(grad)
 
         return _eval
 
+    @classmethod
+    def hessp_func(
+        cls, closure: LossClosure, variables: Variables, compile: bool = True
+    ) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Returns a function that computes the product of the Hessian of the loss
+        at x with a vector p, both packed like `initial_parameters`, by
+        forward-mode differentiation of the gradient computation in the direction
+        of p (forward-over-reverse). The full Hessian is never formed.
+        """
+
+        packed = PackedVariables(variables)
+
+        def _tf_hessp(x: tf.Tensor, p: tf.Tensor) -> tf.Tensor:
+            packed.assign(x)
+
+            tangents = packed.unpack(p)
+            with tf.autodiff.ForwardAccumulator(list(packed.variables), tangents) as accumulator:
+                _, grads = _compute_loss_and_gradients(closure, packed.variables)
+            hessp = accumulator.jvp(grads, unconnected_gradients=tf.UnconnectedGradients.ZERO)
+            return packed.pack(hessp)
+
+        if compile:
+            _tf_hessp = tf.function(_tf_hessp)
+
+        def _hessp(x: np.ndarray, p: np.ndarray) -> np.ndarray:
+            return _to_numpy(_tf_hessp(tf.convert_to_tensor(x), tf.convert_to_tensor(p)))
+
+        return _hessp
+
     @classmethod
     def callback_func(
         cls, variables: Variables, step_callback: StepCallback
     ) -> Callable[[np.ndarray], None]:
         step = 0  # type: int
+        packed = PackedVariables(variables)
 
         def _callback(x: np.ndarray) -> None:
             nonlocal step
-            values = cls.unpack_tensors(variables, x)
+            values = packed.unpack(tf.convert_to_tensor(x))
             step_callback(step=step, variables=variables, values=values)
             step += 1
 
@@ -136,6 +185,70 @@ class Scipy:
             tensor.assign(tensor_vector)
 
 
+class PackedVariables:
+    """
+    A view of a sequence of variables as the flat float64 vector used on the Scipy
+    side, with the variables stored one after another in order.
+
+    The sizes and shapes of the variables are read once, when the view is created,
+    so that unpacking a vector takes a single split rather than a slice per
+    variable. Variables with a shape that is not fully defined fall back to sizes
+    and shapes evaluated at run time.
+    """
+
+    def __init__(self, variables: Variables):
+        self.variables = tuple(variables)
+        self.shapes = [variable.shape for variable in self.variables]
+        self.sizes = [shape.num_elements() for shape in self.shapes]
+        self.is_static = all(shape.is_fully_defined() for shape in self.shapes)
+
+    @property
+    def size(self) -> Optional[int]:
+        """
+        The length of the packed vector, or None if it is only known at run time.
+        """
+        return sum(self.sizes) if self.is_static else None
+
+    def unpack(self, vector: tf.Tensor) -> List[tf.Tensor]:
+        """
+        Splits a packed vector into tensors of the shapes and dtypes of the variables.
+        """
+        if self.is_static:
+            sizes, shapes = self.sizes, self.shapes
+        else:
+            sizes = tf.stack([tf.size(variable) for variable in self.variables])
+            shapes = [tf.shape(variable) for variable in self.variables]
+        parts = tf.split(vector, sizes, num=len(self.variables))
+        return [
+            tf.reshape(tf.cast(part, variable.dtype), shape)
+            for part, variable, shape in zip(parts, self.variables, shapes)
+        ]
+
+    def assign(self, vector: tf.Tensor) -> tf.Operation:
+        """
+        Assigns a packed vector to the variables, as a single grouped operation.
+        """
+        assignments = [
+            variable.assign(value, read_value=False)
+            for variable, value in zip(self.variables, self.unpack(vector))
+        ]
+        return tf.group(assignments)
+
+    def pack(self, tensors: Iterable[tf.Tensor]) -> tf.Tensor:
+        """
+        Concatenates tensors matching the variables (e.g. their gradients) into a
+        float64 vector.
+        """
+        flats = [tf.reshape(tf.cast(tensor, tf.float64), (-1,)) for tensor in tensors]
+        return tf.concat(flats, axis=0)
+
+
+def _to_numpy(tensor: tf.Tensor) -> np.ndarray:
+    # `np.asarray` shares the host buffer of a float64 tensor, whereas `.numpy()`
+    # copies it.
+    return np.asarray(tensor, dtype=np.float64)
+
+
 V = TypeVar("V", bound=Variables)
 
 
@@ -14,9 +14,11 @@
 
 import itertools
 from collections.abc import Iterable
+from typing import Dict, Tuple
 
 import numpy as np
 import tensorflow as tf
+from scipy.special import comb
 
 from .config import default_float
 from .utilities import to_default_float
@@ -46,7 +48,122 @@ def mvhermgauss(H: int, D: int):
     return x, w
 
 
-def mvnquad(func, means, covs, H: int, Din: int = None, Dout=None):
+def smolyak_hermgauss(H: int, D: int):
+    """
+    Return the evaluation locations 'xn', and weights 'wn' for a Smolyak sparse
+    grid built from univariate Gauss-Hermite rules with 1, ..., H points:
+
+        A(q, D) = sum_{q-D+1 <= |i| <= q} (-1)^(q-|i|) C(D-1, q-|i|) U^i_1 x ... x U^i_D,
+
+    with q = H + D - 1 (Heiss & Winschel, 2008). The rule integrates polynomials
+    of total degree up to 2H-1 exactly, as does the univariate H-point rule, and
+    coincides with it for D = 1. Points shared by several tensor grids are merged.
+    Some of the weights are negative.
+
+    The outputs can be used in the same way as those of `mvhermgauss`.
+
+    :param H: accuracy level, i.e. the largest number of univariate points.
+    :param D: Number of input dimensions.
+    :return: eval_locations 'x' (?xD), weights 'w' (?)
+    """
+    q = H + D - 1
+    rules = [hermgauss(n) for n in range(1, H + 1)]
+    points = {}
+    for levels in itertools.product(range(1, H + 1), repeat=D):
+        total = sum(levels)
+        if not q - D + 1 <= total <= q:
+            continue
+        coefficient = (-1) ** (q - total) * comb(D - 1, q - total, exact=True)
+        grid_x = itertools.product(*(rules[level - 1][0] for level in levels))
+        grid_w = itertools.product(*(rules[level - 1][1] for level in levels))
+        for x, w in zip(grid_x, grid_w):
+            key = tuple(np.round(x, 12))
+            points[key] = points.get(key, 0.0) + coefficient * np.prod(w)
+    x = np.array(list(points.keys()), dtype=default_float()).reshape(-1, D)
+    w = np.array(list(points.values()), dtype=default_float())
+    keep = w != 0.0
+    return x[keep], w[keep]
+
+
+def cubature(D: int):
+    """
+    Return the evaluation locations 'xn', and weights 'wn' for the third-degree
+    spherical-radial cubature rule (the unscented transform without a central
+    point): the 2D points ±√(D/2) e_d, with equal weights.
+
+    The outputs can be used in the same way as those of `mvhermgauss`.
+
+    :param D: Number of input dimensions.
+    :return: eval_locations 'x' (2DxD), weights 'w' (2D)
+    """
+    eye = np.eye(D, dtype=default_float())
+    x = np.sqrt(D / 2) * np.concatenate([eye, -eye], axis=0)
+    w = np.full(2 * D, np.pi ** (D / 2) / (2 * D), dtype=default_float())
+    return x, w
+
+
+QUADRATURE_SCHEMES = ("gauss-hermite", "smolyak", "cubature")
+
+
+def quadrature_rule(scheme: str, H: int, D: int):
+    """
+    Return the evaluation locations and weights of a quadrature scheme, for
+    integrals of the form int exp(-x'x) f(x) dx ~ sum_i w[i] f(x[i,:]).
+
+    :param scheme: one of QUADRATURE_SCHEMES:
+        "gauss-hermite": tensor-product Gauss-Hermite rule, H**D points (`mvhermgauss`);
+        "smolyak": Smolyak sparse grid of level H (`smolyak_hermgauss`);
+        "cubature": third-degree spherical-radial rule, 2D points, H is ignored (`cubature`).
+    :param H: Number of Gauss-Hermite evaluation points, or accuracy level.
+    :param D: Number of input dimensions.
+    :return: eval_locations 'x' (?xD), weights 'w' (?)
+    """
+    if scheme == "gauss-hermite":
+        return mvhermgauss(H, D)
+    if scheme == "smolyak":
+        return smolyak_hermgauss(H, D)
+    if scheme == "cubature":
+        return cubature(D)
+    raise ValueError(f"Unknown quadrature scheme {scheme!r}, expected one of {QUADRATURE_SCHEMES}.")
+
+
+_QUADRATURE_RULE_CACHE: Dict[Tuple[str, int, int, tf.DType], Tuple[tf.Tensor, tf.Tensor]] = {}
+
+
+def cached_quadrature_rule(scheme: str, H: int, D: int, dtype=None):
+    """
+    Registry of quadrature rules: returns the evaluation locations and weights of
+    `quadrature_rule(scheme, H, D)` as tensors, which are computed once per
+    (scheme, H, D, dtype) and then reused.
+
+    The tensors are created eagerly, even when this is called while tracing a
+    `tf.function`, so that retracing does not rebuild the grids, and traced graphs
+    capture large rules as inputs instead of embedding a copy of them (TensorFlow
+    still inlines tensors with fewer than 128 elements as constants).
+
+    :param scheme: quadrature scheme, see `quadrature_rule`.
+    :param H: Number of Gauss-Hermite evaluation points, or accuracy level.
+    :param D: Number of input dimensions.
+    :param dtype: dtype of the returned tensors, defaults to `default_float()`.
+    :return: eval_locations 'x' (?xD), weights 'w' (?)
+    """
+    dtype = tf.as_dtype(default_float() if dtype is None else dtype)
+    key = (scheme, H, D, dtype)
+    if key not in _QUADRATURE_RULE_CACHE:
+        x, w = quadrature_rule(scheme, H, D)
+        with tf.init_scope():
+            _QUADRATURE_RULE_CACHE[key] = (tf.constant(x, dtype), tf.constant(w, dtype))
+    return _QUADRATURE_RULE_CACHE[key]
+
+
+def clear_quadrature_rule_cache():
+    """
+    Removes all rules from the registry used by `cached_quadrature_rule`.
+    """
+    _QUADRATURE_RULE_CACHE.clear()
+
+
+def mvnquad(func, means, covs, H: int, Din: int = None, Dout=None, scheme: str = "gauss-hermite"):
     """
     Computes N Gaussian expectation integrals of a single function 'f'
     using Gauss-Hermite quadrature.
@@ -57,6 +174,7 @@ def mvnquad(func, means, covs, H: int, Din: int = None, Dout=None):
     :param Din: Number of input dimensions. Needs to be known at call-time.
     :param Dout: Number of output dimensions. Defaults to (). Dout is assumed
     to leave out the item index, i.e. f actually maps (?xD)->(?x*Dout).
+    :param scheme: quadrature scheme, see `quadrature_rule`.
     :return: quadratures (N,*Dout)
     """
     # Figure out input shape information
@@ -70,16 +188,17 @@ def mvnquad(func, means, covs, H: int, Din: int = None, Dout=None):
             "is problematic. Consider using your own session."
         )  # pragma: no cover
 
-    xn, wn = mvhermgauss(H, Din)
+    xn, wn = cached_quadrature_rule(scheme, H, Din, dtype=covs.dtype)
     N = means.shape[0]
+    Q = wn.shape[0]
 
     # transform points based on Gaussian parameters
     cholXcov = tf.linalg.cholesky(covs)  # NxDxD
     Xt = tf.linalg.matmul(
         cholXcov, tf.tile(xn[None, :, :], (N, 1, 1)), transpose_b=True
-    )  # NxDxH**D
-    X = 2.0 ** 0.5 * Xt + tf.expand_dims(means, 2)  # NxDxH**D
-    Xr = tf.reshape(tf.transpose(X, [2, 0, 1]), (-1, Din))  # (H**D*N)xD
+    )  # NxDxQ, for Q quadrature points
+    X = 2.0 ** 0.5 * Xt + tf.expand_dims(means, 2)  # NxDxQ
+    Xr = tf.reshape(tf.transpose(X, [2, 0, 1]), (-1, Din))  # (Q*N)xD
 
     # perform quadrature
     fevals = func(Xr)
@@ -92,12 +211,14 @@ def mvnquad(func, means, covs, H: int, Din: int = None, Dout=None):
             "shape. Running mvnquad in `autoflow` without specifying `Din` and `Dout` "
             "is problematic. Consider using your own session."
         )  # pragma: no cover
-    fX = tf.reshape(fevals, (H ** Din, N,) + Dout)
-    wr = np.reshape(wn * np.pi ** (-Din * 0.5), (-1,) + (1,) * (1 + len(Dout)))
+    fX = tf.reshape(fevals, (Q, N,) + Dout)
+    wr = tf.reshape(wn * np.pi ** (-Din * 0.5), (-1,) + (1,) * (1 + len(Dout)))
     return tf.reduce_sum(fX * wr, 0)
 
 
-def ndiagquad(funcs, H: int, Fmu, Fvar, logspace: bool = False, **Ys):
+def ndiagquad(
+    funcs, H: int, Fmu, Fvar, logspace: bool = False, scheme: str = "gauss-hermite", **Ys
+):
     """
     Computes N Gaussian expectation integrals of one or more functions
     using Gauss-Hermite quadrature. The Gaussians must be independent.
@@ -112,6 +233,9 @@ def ndiagquad(funcs, H: int, Fmu, Fvar, logspace: bool = False, **Ys):
     :param Fvar: array/tensor or `Din`-tuple/list thereof
     :param logspace: if True, funcs are the log-integrands and this calculates
         the log-expectation of exp(funcs)
+    :param scheme: quadrature scheme, see `quadrature_rule`. For `Din` > 1, the
+        "smolyak" and "cubature" schemes need far fewer evaluations than the
+        default tensor-product "gauss-hermite" rule.
     :param **Ys: arrays/tensors; deterministic arguments to be passed by name
 
     Fmu, Fvar, Ys should all have same shape, with overall size `N`
@@ -134,28 +258,35 @@ def ndiagquad(funcs, H: int, Fmu, Fvar, logspace: bool = False, **Ys):
         shape = tf.shape(Fmu)
         Fmu, Fvar = [tf.reshape(f, (-1, 1, 1)) for f in [Fmu, Fvar]]
 
-    xn, wn = mvhermgauss(H, Din)
-    # xn: H**Din x Din, wn: H**Din
+    xn, wn = cached_quadrature_rule(scheme, H, Din, dtype=Fmu.dtype)
+    # xn: Q x Din, wn: Q, for Q quadrature points (H**Din for "gauss-hermite")
+    Q = wn.shape[0]
 
-    gh_x = xn.reshape(1, -1, Din)  # [1, H]**Din x Din
-    Xall = gh_x * tf.sqrt(2.0 * Fvar) + Fmu  # [N, H]**Din x Din
-    Xs = [Xall[:, :, i] for i in range(Din)]  # [N, H]**Din  each
+    gh_x = tf.reshape(xn, (1, -1, Din))  # [1, Q, Din]
+    Xall = gh_x * tf.sqrt(2.0 * Fvar) + Fmu  # [N, Q, Din]
+    Xs = [Xall[:, :, i] for i in range(Din)]  # [N, Q] each
 
-    gh_w = wn * np.pi ** (-0.5 * Din)  # H**Din x 1
+    gh_w = tf.reshape(wn * np.pi ** (-0.5 * Din), (-1, 1))  # [Q, 1]
+    positive_weights = np.all(wn.numpy() > 0)
 
     for name, Y in Ys.items():
         Y = tf.reshape(Y, (-1, 1))
-        Y = tf.tile(Y, [1, H ** Din])  # broadcast Y to match X
+        Y = tf.tile(Y, [1, Q])  # broadcast Y to match X
         # without the tiling, some calls such as tf.where() (in bernoulli) fail
-        Ys[name] = Y  # now [N, H]**Din
+        Ys[name] = Y  # now [N, Q]
 
     def eval_func(f):
-        feval = f(*Xs, **Ys)  # f should be elementwise: return shape [N, H]**Din
-        if logspace:
-            log_gh_w = np.log(gh_w.reshape(1, -1))
+        feval = f(*Xs, **Ys)  # f should be elementwise: return shape [N, Q]
+        if logspace and positive_weights:
+            log_gh_w = tf.math.log(tf.reshape(gh_w, (1, -1)))
             result = tf.reduce_logsumexp(feval + log_gh_w, axis=1)
+        elif logspace:
+            # sparse grids have negative weights: shift by the maximum instead
+            feval_max = tf.stop_gradient(tf.reduce_max(feval, axis=1, keepdims=True))
+            weighted = tf.linalg.matmul(tf.exp(feval - feval_max), gh_w)
+            result = tf.math.log(weighted[:, 0]) + feval_max[:, 0]
         else:
-            result = tf.linalg.matmul(feval, gh_w.reshape(-1, 1))
+            result = tf.linalg.matmul(feval, gh_w)
         return tf.reshape(result, shape)
 
     if isinstance(funcs, Iterable):
@@ -164,7 +295,55 @@ def ndiagquad(funcs, H: int, Fmu, Fvar, logspace: bool = False, **Ys):
     return eval_func(funcs)
 
 
-def ndiag_mc(funcs, S: int, Fmu, Fvar, logspace: bool = False, epsilon=None, **Ys):
+MONTE_CARLO_SAMPLING = ("random", "antithetic", "sobol")
+
+
+def standard_normal_samples(S: int, N: int, D: int, sampling: str = "random", dtype=None):
+    """
+    Draws S standard normal samples for each of N independent D-dimensional
+    Gaussians, [S, N, D].
+
+    :param sampling: one of MONTE_CARLO_SAMPLING:
+        "random": independent pseudo-random samples;
+        "antithetic": S/2 independent samples and their negations (S is rounded
+            up to an even number of draws, of which the first S are returned);
+        "sobol": randomised quasi-Monte Carlo: the first S points of a Sobol
+            sequence in D dimensions, with an independent random digital shift
+            for each of the N Gaussians, mapped through the normal quantile
+            function. Every shifted sequence is a low-discrepancy set, and each
+            point is marginally uniform, so the estimates remain unbiased.
+    :param dtype: dtype of the samples, defaults to `default_float()`.
+    """
+    dtype = default_float() if dtype is None else dtype
+    if sampling == "random":
+        return tf.random.normal((S, N, D), dtype=dtype)
+    if sampling == "antithetic":
+        epsilon = tf.random.normal(((S + 1) // 2, N, D), dtype=dtype)
+        return tf.concat([epsilon, -epsilon], axis=0)[:S]
+    if sampling == "sobol":
+        num_bits = 30
+        sobol = tf.math.sobol_sample(D, S, dtype=tf.float64)  # [S, D]
+        sobol_bits = tf.cast(sobol * 2 ** num_bits, tf.int64)
+        shift = tf.random.uniform((N, D), maxval=2 ** num_bits, dtype=tf.int64)
+        shifted = tf.bitwise.bitwise_xor(sobol_bits[:, None, :], shift[None, :, :])  # [S, N, D]
+        uniform = (tf.cast(shifted, tf.float64) + 0.5) / 2 ** num_bits
+        return tf.cast(tf.math.ndtri(uniform), dtype)
+    raise ValueError(
+        f"Unknown Monte Carlo sampling {sampling!r}, expected one of {MONTE_CARLO_SAMPLING}."
+    )
+
+
+def ndiag_mc(
+    funcs,
+    S: int,
+    Fmu,
+    Fvar,
+    logspace: bool = False,
+    epsilon=None,
+    sampling: str = "random",
+    control_variate: bool = False,
+    **Ys,
+):
     """
     Computes N Gaussian expectation integrals of one or more functions
     using Monte Carlo samples. The Gaussians must be independent.
@@ -176,6 +355,15 @@ def ndiag_mc(funcs, S: int, Fmu, Fvar, logspace: bool = False, epsilon=None, **Y
     :param Fvar: array/tensor
     :param logspace: if True, funcs are the log-integrands and this calculates
         the log-expectation of exp(funcs)
+    :param epsilon: optional standard normal samples [S, N, D]; if None, they are
+        drawn with `standard_normal_samples` according to `sampling`
+    :param sampling: sampling strategy, see `standard_normal_samples`
+    :param control_variate: if True (and logspace is False), the samples epsilon
+        are used as control variates, with known mean zero: the estimate of
+        E[f] becomes mean(f) - β mean(epsilon), where β [N, D] is the regression
+        coefficient of f on epsilon, estimated from the same samples (and not
+        differentiated through). This removes the part of the Monte Carlo error
+        that is linear in the samples.
     :param **Ys: arrays/tensors; deterministic arguments to be passed by name
 
     Fmu, Fvar, Ys should all have same shape, with overall size `N`
@@ -184,8 +372,7 @@ def ndiag_mc(funcs, S: int, Fmu, Fvar, logspace: bool = False, epsilon=None, **Y
     N, D = Fmu.shape[0], Fvar.shape[1]
 
     if epsilon is None:
-        epsilon = tf.random.normal((S, N, D), dtype=default_float())
-
+        epsilon = standard_normal_samples(S, N, D, sampling)
     mc_x = Fmu[None, :, :] + tf.sqrt(Fvar[None, :, :]) * epsilon
     mc_Xr = tf.reshape(mc_x, (S * N, D))
 
@@ -201,6 +388,13 @@ def ndiag_mc(funcs, S: int, Fmu, Fvar, logspace: bool = False, epsilon=None, **Y
         if logspace:
             log_S = tf.math.log(to_default_float(S))
             return tf.reduce_logsumexp(feval, axis=0) - log_S  # [N, D]
+        elif control_variate:
+            mean = tf.reduce_mean(feval, axis=0)  # [N, D_out]
+            # E[epsilon] = 0 and E[epsilon²] = 1, so β = E[(f - E[f]) epsilon]
+            beta = tf.stop_gradient(
+                tf.einsum("snk,snd->ndk", feval - mean, epsilon) / (S - 1)
+            )  # [N, D, D_out]
+            return mean - tf.einsum("ndk,nd->nk", beta, tf.reduce_mean(epsilon, axis=0))
         else:
             return tf.reduce_mean(feval, axis=0)
 
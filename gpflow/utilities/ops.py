@@ -5,6 +5,8 @@ import tensorflow as tf
 import tensorflow_probability as tfp
 import numpy as np
 
+from ..config import default_check_shapes
+
 
 EllipsisType = type(...)
 
@@ -25,6 +27,24 @@ def eye(num: int, value: tf.Tensor, dtype: Optional[tf.DType] = None) -> tf.Tens
     return tf.linalg.diag(tf.fill([num], value))
 
 
+def assert_shapes(shape_constraints, message: Optional[str] = None):
+    """
+    `tf.debugging.assert_shapes` that is skipped when shape checks are disabled
+    through `gpflow.config`.
+    """
+    if default_check_shapes():
+        tf.debugging.assert_shapes(shape_constraints, message=message)
+
+
+def assert_equal(x, y, message: Optional[str] = None):
+    """
+    `tf.debugging.assert_equal` that is skipped when shape checks are disabled
+    through `gpflow.config`.
+    """
+    if default_check_shapes():
+        tf.debugging.assert_equal(x, y, message=message)
+
+
 def leading_transpose(
     tensor: tf.Tensor, perm: List[Union[int, EllipsisType]], leading_dim: int = 0
 ) -> tf.Tensor:
@@ -129,6 +149,30 @@ def difference_matrix(X, X2):
     return diff
 
 
+def map_row_blocks(fn, X, block_size: int):
+    """
+    Evaluates `fn` on consecutive blocks of `block_size` rows of X and
+    concatenates the results along the first axis, so that only one block's
+    intermediate tensors are live at a time (in the forward pass).
+
+    `fn` must act row-wise, mapping a [B, D] tensor to a [B, ...] tensor of the
+    same dtype as X. The last block is padded with zeros, and the corresponding
+    rows are removed from the result.
+
+    :param fn: function applied to each block of rows.
+    :param X: tf.Tensor, shape [N, D].
+    :param block_size: number of rows per block.
+    :return: tf.Tensor, shape [N, ...]
+    """
+    num_rows = tf.shape(X)[0]
+    num_blocks = (num_rows + block_size - 1) // block_size
+    padding = num_blocks * block_size - num_rows
+    X_blocks = tf.reshape(tf.pad(X, [[0, padding], [0, 0]]), [num_blocks, block_size, -1])
+    results = tf.map_fn(fn, X_blocks, parallel_iterations=1)  # [num_blocks, B, ...]
+    results = tf.reshape(results, tf.concat([[-1], tf.shape(results)[2:]], 0))
+    return results[:num_rows]
+
+
 def pca_reduce(X: tf.Tensor, latent_dim: tf.Tensor) -> tf.Tensor:
     """
     A helpful function for linearly reducing the dimensionality of the input
@@ -31,9 +31,9 @@ if sys.version_info < (3, 7):
     requirements.append("dataclasses")
 
 if not on_readthedocs:
-    requirements.append("tensorflow-probability>=0.9")
+    requirements.append("tensorflow-probability>=0.15")
 
-min_tf_version = "2.1.0"
+min_tf_version = "2.7.0"
 tf_cpu = "tensorflow"
 tf_gpu = "tensorflow-gpu"
 
@@ -8,8 +8,10 @@ import gpflow.inducing_variables.multioutput as mf
 import gpflow.kernels.multioutput as mk
 from gpflow.conditionals import sample_conditional
 from gpflow.conditionals.util import (
+    MixedOutputCovariance,
     fully_correlated_conditional,
     fully_correlated_conditional_repeat,
+    mix_latent_gp,
     sample_mvn,
 )
 from gpflow.inducing_variables import InducingPoints
@@ -616,6 +618,76 @@ def test_separate_independent_mof():
     check_equality_predictions(Data.data, [model_1, model_2, model_3])
 
 
+@pytest.mark.parametrize("separate_inducing", [True, False])
+@pytest.mark.parametrize("full_cov", [True, False])
+@pytest.mark.parametrize("full_output_cov", [True, False])
+def test_stacked_separate_independent(separate_inducing, full_cov, full_output_cov):
+    """
+    StackedSeparateIndependent evaluates all outputs in a single batched
+    operation, and should match SeparateIndependent with the same kernels.
+    """
+    rng = np.random.RandomState(1)
+    kern_list = [
+        gpflow.kernels.Matern32(variance=rng.rand() + 0.5, lengthscales=rng.rand(2) + 0.5)
+        for _ in range(Data.P)
+    ]
+    kernel_1 = mk.SeparateIndependent(kern_list)
+    kernel_2 = mk.StackedSeparateIndependent(kern_list)
+    if separate_inducing:
+        inducing_variable = mf.SeparateIndependentInducingVariables(
+            [InducingPoints(rng.randn(Data.M, 2)) for _ in range(Data.P)]
+        )
+    else:
+        inducing_variable = mf.SharedIndependentInducingVariables(
+            InducingPoints(rng.randn(Data.M, 2))
+        )
+    X, X2 = rng.randn(Data.N, 2), rng.randn(Data.Ntest, 2)
+    f = rng.randn(Data.M, Data.P)
+    q_sqrt = tf.convert_to_tensor(create_q_sqrt(Data.M, Data.P))
+
+    np.testing.assert_allclose(
+        kernel_1(X, X2, full_cov=True, full_output_cov=full_output_cov),
+        kernel_2(X, X2, full_cov=True, full_output_cov=full_output_cov),
+    )
+    np.testing.assert_allclose(
+        kernel_1(X, full_cov=False, full_output_cov=full_output_cov),
+        kernel_2(X, full_cov=False, full_output_cov=full_output_cov),
+    )
+    np.testing.assert_allclose(
+        gpflow.covariances.Kuu(inducing_variable, kernel_1, jitter=default_jitter()),
+        gpflow.covariances.Kuu(inducing_variable, kernel_2, jitter=default_jitter()),
+    )
+    np.testing.assert_allclose(
+        gpflow.covariances.Kuf(inducing_variable, kernel_1, X),
+        gpflow.covariances.Kuf(inducing_variable, kernel_2, X),
+    )
+    mean_1, var_1 = gpflow.conditionals.conditional(
+        X,
+        inducing_variable,
+        kernel_1,
+        f,
+        q_sqrt=q_sqrt,
+        full_cov=full_cov,
+        full_output_cov=full_output_cov,
+    )
+    mean_2, var_2 = gpflow.conditionals.conditional(
+        X,
+        inducing_variable,
+        kernel_2,
+        f,
+        q_sqrt=q_sqrt,
+        full_cov=full_cov,
+        full_output_cov=full_output_cov,
+    )
+    np.testing.assert_allclose(mean_1, mean_2)
+    np.testing.assert_allclose(var_1, var_2)
+
+
+def test_stacked_separate_independent_requires_same_class():
+    with pytest.raises(ValueError):
+        mk.StackedSeparateIndependent([SquaredExponential(), gpflow.kernels.Matern12()])
+
+
 def test_mixed_mok_with_Id_vs_independent_mok():
     data = DataMixedKernelWithEye
     # Independent model
@@ -705,3 +777,88 @@ def test_MixedKernelSeparateMof():
     model_2 = SVGP(k2, Gaussian(), inducing_variable=f2, q_mu=data.mu_data, q_sqrt=data.sqrt_data)
 
     check_equality_predictions(Data.data, [model_1, model_2])
+
+
+def test_lazy_coregionalization_conditional():
+    data = DataMixedKernel
+
+    def create_model(lazy_output_cov):
+        kernel = mk.LinearCoregionalization(
+            [SquaredExponential() for _ in range(data.L)],
+            W=data.W,
+            lazy_output_cov=lazy_output_cov,
+        )
+        inducing_variable = mf.SharedIndependentInducingVariables(
+            InducingPoints(data.X[: data.M, ...])
+        )
+        return SVGP(kernel, Gaussian(), inducing_variable, q_mu=data.mu_data, q_sqrt=data.sqrt_data)
+
+    model, lazy_model = create_model(False), create_model(True)
+    mean, cov = model.predict_f(data.X, full_output_cov=True)
+    lazy_mean, lazy_cov = lazy_model.predict_f(data.X, full_output_cov=True)
+    assert isinstance(lazy_cov, MixedOutputCovariance)
+    np.testing.assert_allclose(lazy_mean, mean)
+    np.testing.assert_allclose(lazy_cov.to_dense(), cov)
+    np.testing.assert_allclose(lazy_cov.diag_part(), np.diagonal(cov, axis1=-2, axis2=-1))
+
+    # the flag only applies to full_cov=False and full_output_cov=True
+    for full_cov, full_output_cov in [(False, False), (True, False), (True, True)]:
+        expected = model.predict_f(data.X, full_cov=full_cov, full_output_cov=full_output_cov)
+        actual = lazy_model.predict_f(data.X, full_cov=full_cov, full_output_cov=full_output_cov)
+        np.testing.assert_allclose(actual[1], expected[1])
+
+    # the lazy covariance can be returned from compiled functions
+    predict = tf.function(lambda X: lazy_model.predict_f(X, full_output_cov=True))
+    compiled_mean, compiled_cov = predict(data.X)
+    assert isinstance(compiled_cov, MixedOutputCovariance)
+    np.testing.assert_allclose(compiled_mean, mean)
+    np.testing.assert_allclose(compiled_cov.to_dense(), cov)
+
+    # a Gaussian likelihood adds its variance to the diagonal
+    y_mean, y_cov = lazy_model.predict_y(data.X, full_output_cov=True)
+    assert isinstance(y_cov, MixedOutputCovariance)
+    np.testing.assert_allclose(y_mean, mean)
+    noise = lazy_model.likelihood.variance.numpy()
+    np.testing.assert_allclose(y_cov.to_dense(), cov + noise * np.eye(cov.shape[-1]))
+
+
+def test_lazy_output_cov_unsupported_likelihood():
+    N, P, L = 4, 5, 2
+    cov = MixedOutputCovariance(rng.randn(P, L), rng.rand(N, L))
+    likelihood = gpflow.likelihoods.Bernoulli()
+    with pytest.raises(NotImplementedError):
+        likelihood.predict_mean_and_var(rng.randn(N, P), cov)
+
+
+def test_mix_latent_gp_lazy_full_cov():
+    N, P, L = 4, 5, 2
+    with pytest.raises(ValueError):
+        mix_latent_gp(rng.randn(P, L), rng.randn(N, L), rng.rand(L, N, N), True, True, True)
+
+
+@pytest.mark.parametrize("num_samples", [None, 3])
+def test_mixed_output_covariance(num_samples):
+    N, P, L = 4, 5, 2
+    W, g_var = rng.randn(P, L), rng.rand(N, L)
+    mean, Y, noise = rng.randn(N, P), rng.randn(N, P), rng.rand(P) + 0.1
+    cov = MixedOutputCovariance(W, g_var).add_diagonal(noise)
+
+    dense = cov.to_dense().numpy()
+    np.testing.assert_allclose(dense, np.einsum("pl,nl,ql->npq", W, g_var, W) + np.diag(noise))
+    expected = [scipy.stats.multivariate_normal.logpdf(Y[n], mean[n], dense[n]) for n in range(N)]
+    np.testing.assert_allclose(cov.log_density(mean, Y), expected)
+
+    samples = sample_mvn(mean, cov, num_samples=num_samples)
+    assert samples.shape == ((N, P) if num_samples is None else (num_samples, N, P))
+
+
+def test_mixed_output_covariance_sample_moments():
+    tf.random.set_seed(0)
+    N, P, L = 2, 4, 2
+    W, g_var = rng.randn(P, L), rng.rand(N, L)
+    cov = MixedOutputCovariance(W, g_var).add_diagonal(0.5)
+    mean = rng.randn(N, P)
+    samples = cov.sample(mean, num_samples=20000).numpy()  # [S, N, P]
+    np.testing.assert_allclose(samples.mean(0), mean, atol=0.1)
+    empirical_cov = np.einsum("snp,snq->npq", samples - mean, samples - mean) / samples.shape[0]
+    np.testing.assert_allclose(empirical_cov, cov.to_dense(), atol=0.15)
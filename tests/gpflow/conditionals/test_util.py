@@ -12,13 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest import mock
 
 import numpy as np
 import pytest
 import tensorflow as tf
 from numpy.testing import assert_allclose
 
-from gpflow.conditionals.util import leading_transpose, rollaxis_left, rollaxis_right
+import gpflow
+
+from gpflow.conditionals.util import (
+    base_conditional,
+    batched_base_conditional,
+    leading_transpose,
+    rollaxis_left,
+    rollaxis_right,
+)
 
 
 def test_leading_transpose():
@@ -99,3 +108,100 @@ def test_rollaxis_idempotent(rolls):
 
     assert_allclose(A, A_left_right)
     assert_allclose(A, A_right_left)
+
+
+@pytest.mark.parametrize("full_cov", [True, False])
+@pytest.mark.parametrize("white", [True, False])
+@pytest.mark.parametrize("q_sqrt_dims", [None, 2, 3])
+def test_batched_base_conditional(full_cov, white, q_sqrt_dims):
+    """ Check that the batched conditional matches `base_conditional` for each output """
+    rng = np.random.RandomState(0)
+    P, M, N = 3, 5, 4
+    Kmms = np.stack([np.cov(rng.randn(M, 2 * M)) + np.eye(M) for _ in range(P)])  # [P, M, M]
+    Kmns = rng.randn(P, M, N)
+    Knns = rng.randn(P, N, N) if full_cov else rng.randn(P, N)
+    f = rng.randn(M, P)
+    q_sqrt = {None: None, 2: rng.rand(M, P), 3: np.tril(rng.randn(P, M, M))}[q_sqrt_dims]
+    q_sqrt = q_sqrt if q_sqrt is None else tf.convert_to_tensor(q_sqrt)
+
+    mean, var = batched_base_conditional(
+        Kmns, Kmms, Knns, f, full_cov=full_cov, q_sqrt=q_sqrt, white=white
+    )
+
+    for p in range(P):
+        if q_sqrt_dims == 2:
+            q_sqrt_p = q_sqrt[:, p : p + 1]
+        elif q_sqrt_dims == 3:
+            q_sqrt_p = q_sqrt[p : p + 1]
+        else:
+            q_sqrt_p = None
+        mean_p, var_p = base_conditional(
+            Kmns[p],
+            Kmms[p],
+            Knns[p],
+            f[:, p : p + 1],
+            full_cov=full_cov,
+            q_sqrt=q_sqrt_p,
+            white=white,
+        )
+        assert_allclose(mean[:, p], mean_p[:, 0])
+        if full_cov:
+            assert_allclose(var[p], var_p[0])
+        else:
+            assert_allclose(var[:, p], var_p[:, 0])
+
+
+@pytest.mark.parametrize("full_cov", [True, False])
+@pytest.mark.parametrize("q_sqrt_dims", [2, 3])
+@pytest.mark.parametrize("latent_block_size", [1, 2, 5])
+def test_base_conditional_latent_blocks(full_cov, q_sqrt_dims, latent_block_size):
+    """ Check that computing the variance in blocks of latents does not change the result """
+    rng = np.random.RandomState(1)
+    R, M, S, N = 3, 4, 2, 5
+    Kmm = np.cov(rng.randn(M, 2 * M)) + np.eye(M)
+    Kmn = rng.randn(M, S, N)
+    Knn = rng.randn(S, N, N) if full_cov else rng.randn(S, N)
+    f = rng.randn(M, R)
+    q_sqrt = rng.rand(M, R) if q_sqrt_dims == 2 else np.tril(rng.randn(R, M, M))
+    q_sqrt = tf.convert_to_tensor(q_sqrt)
+
+    mean, var = base_conditional(Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt)
+    mean_blocks, var_blocks = base_conditional(
+        Kmn, Kmm, Knn, f, full_cov=full_cov, q_sqrt=q_sqrt, latent_block_size=latent_block_size
+    )
+    assert_allclose(mean, mean_blocks)
+    assert_allclose(var, var_blocks)
+
+    # each leading dimension is handled as a separate set of inputs
+    for s in range(S):
+        mean_s, var_s = base_conditional(
+            Kmn[:, s], Kmm, Knn[s], f, full_cov=full_cov, q_sqrt=q_sqrt
+        )
+        assert_allclose(mean[s], mean_s)
+        assert_allclose(var[s], var_s)
+
+
+@pytest.mark.parametrize("full_cov", [True, False])
+def test_latent_block_size_config(full_cov):
+    """ The configured latent block size reaches base_conditional through the models """
+    rng = np.random.RandomState(2)
+    R, M, N = 5, 4, 6
+    Z, Xnew = rng.randn(M, 1), rng.randn(N, 1)
+    model = gpflow.models.SVGP(
+        gpflow.kernels.SquaredExponential(),
+        gpflow.likelihoods.Gaussian(),
+        Z,
+        num_latent_gps=R,
+        q_mu=rng.randn(M, R),
+        q_sqrt=np.tril(rng.randn(R, M, M)),
+    )
+    mean, var = model.predict_f(Xnew, full_cov=full_cov)
+
+    with mock.patch(
+        "gpflow.conditionals.util.map_row_blocks", wraps=gpflow.utilities.ops.map_row_blocks
+    ) as map_row_blocks:
+        with gpflow.config.as_context(gpflow.config.Config(latent_block_size=2)):
+            mean_blocks, var_blocks = model.predict_f(Xnew, full_cov=full_cov)
+    assert map_row_blocks.call_count == 1
+    assert_allclose(mean_blocks, mean)
+    assert_allclose(var_blocks, var)
@@ -22,14 +22,18 @@ import tensorflow_probability as tfp
 
 import gpflow
 from gpflow.config import (
+    default_check_shapes,
     default_float,
     default_int,
     default_jitter,
+    default_latent_block_size,
     default_positive_bijector,
     default_summary_fmt,
+    set_default_check_shapes,
     set_default_float,
     set_default_int,
     set_default_jitter,
+    set_default_latent_block_size,
     set_default_positive_bijector,
     set_default_summary_fmt,
 )
@@ -46,6 +50,9 @@ _env_values = [
     ("summary_fmt", "simple", "simple"),
     ("positive_minimum", "1e-3", 1e-3),
     ("jitter", "1e-2", 1e-2),
+    ("check_shapes", "false", False),
+    ("check_shapes", "True", True),
+    ("latent_block_size", "4", 4),
 ]
 
 
@@ -84,6 +91,42 @@ def test_dtype_setting(getter, setter, valid_type_1, valid_type_2):
     assert getter() == valid_type_2
 
 
+def test_check_shapes_setting():
+    with gpflow.config.as_context():
+        set_default_check_shapes(False)
+        assert not default_check_shapes()
+    assert default_check_shapes()
+
+
+def test_check_shapes_errorcheck():
+    with pytest.raises(TypeError):
+        set_default_check_shapes("false")
+
+
+def test_latent_block_size_setting():
+    assert default_latent_block_size() is None
+    with gpflow.config.as_context():
+        set_default_latent_block_size(2)
+        assert default_latent_block_size() == 2
+    assert default_latent_block_size() is None
+
+
+@pytest.mark.parametrize("value, error", [("2", TypeError), (1.5, TypeError), (0, ValueError)])
+def test_latent_block_size_errorcheck(value, error):
+    with pytest.raises(error):
+        set_default_latent_block_size(value)
+
+
+def test_check_shapes_disabled():
+    """ Coregion.K only uses the first column of X, which it asserts to be the only one """
+    kernel = gpflow.kernels.Coregion(output_dim=3, rank=1)
+    X = np.zeros((4, 2))
+    with pytest.raises(ValueError):
+        kernel(X)
+    with gpflow.config.as_context(gpflow.config.Config(check_shapes=False)):
+        assert kernel(X).shape == (4, 4)
+
+
 @pytest.mark.parametrize(
     "setter, invalid_type",
     [
@@ -91,6 +91,13 @@ _inducing_variables_and_kernels = [
         InducingPatches(np.random.randn(71, 4)),
         gpflow.kernels.Convolutional(gpflow.kernels.SquaredExponential(), [3, 3], [2, 2]),
     ],
+    [
+        9,
+        InducingPatches(np.random.randn(71, 4)),
+        gpflow.kernels.Convolutional(
+            gpflow.kernels.SquaredExponential(), [3, 3], [2, 2], patch_block_size=3
+        ),
+    ],
 ]
 
 
@@ -103,3 +110,23 @@ def test_inducing_variables_psd_schur(input_dim, inducing_variable, kernel):
     Kff_values = kernel(X)
     Qff_values = Kuf_values.numpy().T @ np.linalg.solve(Kuu_values, Kuf_values)
     assert np.all(np.linalg.eig(Kff_values - Qff_values)[0] > 0.0)
+
+
+@pytest.mark.parametrize("patch_block_size", [1, 3, 4])
+def test_Kuf_conv_patch_blocks(patch_block_size):
+    inducing_variable = InducingPatches(np.random.randn(7, 4))
+    X = np.random.randn(5, 9)
+    weights = np.random.uniform(0.5, 2.0, 4)
+    kernel = gpflow.kernels.Convolutional(
+        gpflow.kernels.SquaredExponential(), [3, 3], [2, 2], weights=weights
+    )
+    blocked_kernel = gpflow.kernels.Convolutional(
+        gpflow.kernels.SquaredExponential(),
+        [3, 3],
+        [2, 2],
+        weights=weights,
+        patch_block_size=patch_block_size,
+    )
+    np.testing.assert_allclose(
+        Kuf(inducing_variable, kernel, X), Kuf(inducing_variable, blocked_kernel, X)
+    )
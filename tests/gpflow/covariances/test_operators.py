@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.covariances import KernelOperator, KufOperator, Kuf
+from gpflow.inducing_variables import InducingPoints, Multiscale
+
+rng = np.random.RandomState(0)
+
+N, M, D = 23, 7, 2
+X = rng.randn(N, D)
+X2 = rng.randn(M, D)
+V = rng.randn(N, 3)
+
+kernels = [
+    gpflow.kernels.SquaredExponential(lengthscales=[0.5, 1.5]),
+    gpflow.kernels.Matern32() + gpflow.kernels.White(variance=0.1),
+]
+
+
+@pytest.mark.parametrize("kernel", kernels)
+@pytest.mark.parametrize("block_size", [1, 5, 23, 100])
+@pytest.mark.parametrize("diagonal_shift", [None, 0.3])
+def test_kernel_operator_symmetric(kernel, block_size, diagonal_shift):
+    operator = KernelOperator(kernel, X, diagonal_shift=diagonal_shift, block_size=block_size)
+    expected = kernel(X).numpy()
+    if diagonal_shift is not None:
+        expected += diagonal_shift * np.eye(N)
+
+    assert operator.shape == (N, N)
+    assert_allclose(operator.to_dense(), expected)
+    assert_allclose(operator.matmul(V), expected @ V)
+    assert_allclose(operator.matvec(V[:, 0]), expected @ V[:, 0])
+    assert_allclose(operator.matmul(V, adjoint=True), expected.T @ V)
+    assert_allclose(operator.diag_part(), np.diag(expected))
+    assert_allclose(operator.row_block(3, 9), expected[3:9])
+
+
+@pytest.mark.parametrize("block_size", [1, 4, 100])
+def test_kernel_operator_cross_covariance(block_size):
+    kernel = kernels[0]
+    operator = KernelOperator(kernel, X, X[:M] + 0.1, block_size=block_size)
+    expected = kernel(X, X[:M] + 0.1).numpy()
+
+    assert operator.shape == (N, M)
+    assert_allclose(operator.to_dense(), expected)
+    assert_allclose(operator.matmul(V[:M]), expected @ V[:M])
+    assert_allclose(operator.matmul(V, adjoint=True), expected.T @ V)
+    assert_allclose(operator.diag_part(), np.diag(expected))
+
+
+def test_kernel_operator_diagonal_shift_requires_symmetric():
+    with pytest.raises(ValueError):
+        KernelOperator(kernels[0], X, X2, diagonal_shift=0.1)
+
+
+def test_kernel_operator_cache():
+    kernel = gpflow.kernels.SquaredExponential()
+    operator = KernelOperator(kernel, X, block_size=5, cache_blocks=True)
+    before = operator.matmul(V)
+    assert len(operator._block_cache) == len(operator.block_bounds())
+    assert operator.block(0) is operator.block(0)
+
+    kernel.variance.assign(2.0)
+    assert_allclose(operator.matmul(V), before)
+    operator.clear_cache()
+    assert_allclose(operator.matmul(V), 2.0 * before.numpy())
+
+
+def test_kernel_operator_conjugate_gradient():
+    kernel = gpflow.kernels.SquaredExponential()
+    operator = KernelOperator(kernel, X, diagonal_shift=0.5, block_size=6)
+    rhs = tf.constant(V[:, 0])
+    result = tf.linalg.experimental.conjugate_gradient(operator, rhs, tol=1e-10, max_iter=N)
+    expected = np.linalg.solve(kernel(X).numpy() + 0.5 * np.eye(N), rhs)
+    assert_allclose(result.x, expected, rtol=1e-6)
+
+
+def test_kernel_operator_gradients():
+    kernel = gpflow.kernels.SquaredExponential()
+    operator = KernelOperator(kernel, X, block_size=6)
+    with tf.GradientTape(persistent=True) as tape:
+        lazy = tf.reduce_sum(operator.matmul(V))
+        dense = tf.reduce_sum(kernel(X) @ V)
+    for variable in kernel.trainable_variables:
+        assert_allclose(tape.gradient(lazy, variable), tape.gradient(dense, variable))
+
+
+@pytest.mark.parametrize("block_size", [1, 6])
+def test_kernel_operator_compiled(block_size):
+    kernel = gpflow.kernels.SquaredExponential()
+    expected = kernel(X).numpy()
+
+    @tf.function
+    def evaluate():
+        operator = KernelOperator(kernel, X, block_size=block_size)
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(operator.matmul(V))
+        gradient = tape.gradient(loss, kernel.variance.unconstrained_variable)
+        return operator.to_dense(), operator.matmul(V, adjoint=True), gradient
+
+    dense, product, gradient = evaluate()
+    assert_allclose(dense, expected)
+    assert_allclose(product, expected.T @ V)
+    with tf.GradientTape() as tape:
+        loss = tf.reduce_sum(kernel(X) @ V)
+    assert_allclose(gradient, tape.gradient(loss, kernel.variance.unconstrained_variable))
+
+
+def test_operator_graph_size():
+    """ The number of ops in the graph does not depend on the number of tiles """
+
+    def num_ops(block_size):
+        @tf.function
+        def evaluate():
+            operator = KernelOperator(kernels[0], X, block_size=block_size)
+            return operator.matmul(V), operator.matmul(V, adjoint=True)
+
+        return len(evaluate.get_concrete_function().graph.get_operations())
+
+    assert num_ops(1) == num_ops(10)
+
+
+def test_kernel_operator_positive_definite_hint():
+    linear = gpflow.kernels.Linear()
+    assert not KernelOperator(linear, X).is_positive_definite
+    assert KernelOperator(linear, X, diagonal_shift=1e-6).is_positive_definite
+    assert KernelOperator(linear, X, is_positive_definite=True).is_positive_definite
+    assert not KernelOperator(linear, X, X2).is_self_adjoint
+
+
+@pytest.mark.parametrize(
+    "inducing_variable", [InducingPoints(X2), Multiscale(X2, rng.uniform(0.5, 2.0, size=(M, D)))],
+)
+@pytest.mark.parametrize("block_size", [1, 6, 100])
+def test_kuf_operator(inducing_variable, block_size):
+    kernel = kernels[0]
+    operator = KufOperator(inducing_variable, kernel, X, block_size=block_size)
+    expected = Kuf(inducing_variable, kernel, X).numpy()
+
+    assert operator.shape == (M, N)
+    assert_allclose(operator.to_dense(), expected)
+    assert_allclose(operator.matmul(V), expected @ V)
+    assert_allclose(operator.matmul(V[:M], adjoint=True), expected.T @ V[:M])
+    assert_allclose(operator.column_block(2, 8), expected[:, 2:8])
+
+
+def test_operator_requires_static_shape():
+    @tf.function(input_signature=[tf.TensorSpec([None, D], tf.float64)])
+    def build(X):
+        return KernelOperator(kernels[0], X).matmul(V)
+
+    with pytest.raises(ValueError):
+        build(X)
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from functools import reduce
+from unittest import mock
+
 import numpy as np
 import pytest
 import tensorflow as tf
@@ -144,11 +147,14 @@ def test_arccosine_nan_gradient(D, N):
     ],
 )
 @pytest.mark.parametrize("N, variance", [[3, 2.3], [5, 1.3],])
-def test_periodic(base_class, D, N, lengthscales, variance, period):
+@pytest.mark.parametrize("difference_block_size", [None, 2])
+def test_periodic(base_class, D, N, lengthscales, variance, period, difference_block_size):
     X = rng.randn(N, D) if D == 1 else rng.multivariate_normal(np.zeros(D), np.eye(D), N)
 
     base_kernel = base_class(lengthscales=lengthscales, variance=variance)
-    kernel = gpflow.kernels.Periodic(base_kernel, period=period)
+    kernel = gpflow.kernels.Periodic(
+        base_kernel, period=period, difference_block_size=difference_block_size
+    )
     gram_matrix = kernel(X)
     reference_gram_matrix = ref_periodic_kernel(
         X, base_class.__name__, lengthscales, variance, period
@@ -157,6 +163,29 @@ def test_periodic(base_class, D, N, lengthscales, variance, period):
     assert_allclose(gram_matrix, reference_gram_matrix)
 
 
+@pytest.mark.parametrize(
+    "base_class",
+    [gpflow.kernels.SquaredExponential, gpflow.kernels.RationalQuadratic, gpflow.kernels.Matern32],
+)
+@pytest.mark.parametrize("difference_block_size", [None, 3])
+def test_periodic_cross_covariance(base_class, difference_block_size):
+    N, M, D = 7, 4, 2
+    X, X2 = rng.randn(N, D), rng.randn(M, D)
+    base_kernel = base_class(lengthscales=[1.5, 0.7], variance=1.3)
+    kernel = gpflow.kernels.Periodic(
+        base_kernel, period=[3.0, 6.0], difference_block_size=difference_block_size
+    )
+    scaled_sine = np.sin(np.pi * (X[:, None, :] - X2[None, :, :]) / [3.0, 6.0]) / [1.5, 0.7]
+    if hasattr(base_kernel, "K_r"):
+        expected = base_kernel.K_r(np.sum(np.abs(scaled_sine), axis=-1))
+    else:
+        expected = base_kernel.K_r2(np.sum(np.square(scaled_sine), axis=-1))
+
+    assert_allclose(kernel(X, X2), expected)
+    K = tf.function(kernel.K, input_signature=[tf.TensorSpec(None, tf.float64)] * 2)
+    assert_allclose(K(X, X2), expected)
+
+
 @pytest.mark.parametrize(
     "base_class", [gpflow.kernels.SquaredExponential, gpflow.kernels.Matern12,]
 )
@@ -271,6 +300,70 @@ def test_conv_diag():
     assert np.allclose(kernel_full, kernel_diag)
 
 
+@pytest.mark.parametrize("patch_block_size", [1, 3, 4])
+def test_conv_patch_blocks(patch_block_size):
+    weights = rng.uniform(0.5, 2.0, 8)
+    kernel = gpflow.kernels.Convolutional(
+        gpflow.kernels.SquaredExponential(), [3, 3], [2, 2], weights=weights, colour_channels=2
+    )
+    blocked_kernel = gpflow.kernels.Convolutional(
+        gpflow.kernels.SquaredExponential(),
+        [3, 3],
+        [2, 2],
+        weights=weights,
+        colour_channels=2,
+        patch_block_size=patch_block_size,
+    )
+    X, X2 = rng.randn(3, 18), rng.randn(4, 18)
+    assert_allclose(kernel(X), blocked_kernel(X))
+    assert_allclose(kernel(X, X2), blocked_kernel(X, X2))
+    assert_allclose(kernel(X, full_cov=False), blocked_kernel(X, full_cov=False))
+
+
+@pytest.mark.parametrize("patch_block_size", [0, -2, 1.5, True])
+def test_conv_invalid_patch_block_size(patch_block_size):
+    with pytest.raises(ValueError):
+        gpflow.kernels.Convolutional(
+            gpflow.kernels.SquaredExponential(), [3, 3], [2, 2], patch_block_size=patch_block_size
+        )
+
+
+def test_conv_patch_cache():
+    kernel = gpflow.kernels.Convolutional(gpflow.kernels.SquaredExponential(), [3, 3], [2, 2])
+    X = rng.randn(3, 9)
+    expected = kernel(X)
+
+    kernel.cache_patches(X)
+    cached_patches = kernel.get_patches(X)
+    assert kernel.get_patches(X) is cached_patches
+    assert kernel.get_patches(X.copy()) is not cached_patches
+    assert_allclose(kernel(X), expected)
+
+    kernel.clear_patch_cache()
+    assert kernel.get_patches(X) is not cached_patches
+
+
+def test_conv_patch_cache_public_calls():
+    kernel = gpflow.kernels.Convolutional(gpflow.kernels.SquaredExponential(), [3, 3], [2, 2])
+    X, Y = rng.randn(5, 9), rng.randn(5, 1)
+    inducing_patches = gpflow.inducing_variables.InducingPatches(rng.randn(3, 4))
+    model = gpflow.models.SGPR((X, Y), kernel, inducing_patches)
+    expected_elbo = model.elbo()
+
+    kernel.cache_patches(X)
+    extract_patches = gpflow.kernels.Convolutional._extract_patches
+    with mock.patch.object(
+        gpflow.kernels.Convolutional, "_extract_patches", autospec=True, side_effect=extract_patches
+    ) as counter:
+        kernel(X)
+        kernel(X, full_cov=False)
+        assert counter.call_count == 0
+        assert_allclose(model.elbo(), expected_elbo)
+        assert counter.call_count == 0
+        kernel(X.copy(), full_cov=False)
+        assert counter.call_count == 1
+
+
 # Add a rbf and linear kernel, make sure the result is the same as adding the result of
 # the kernels separately.
 _kernel_setups_add = [
@@ -384,6 +477,169 @@ def test_active_product(N, D):
     assert np.allclose(Kff, Kff_prod)
 
 
+_kernel_setups_shared_distance = [
+    [gpflow.kernels.Matern52(lengthscales=0.7), gpflow.kernels.SquaredExponential()],
+    [
+        gpflow.kernels.Matern12(active_dims=[0, 1]),
+        gpflow.kernels.RationalQuadratic(lengthscales=2.0, active_dims=[0, 1]),
+        gpflow.kernels.Matern32(lengthscales=[0.5, 1.5], active_dims=[0, 1]),
+        gpflow.kernels.SquaredExponential(lengthscales=0.3, active_dims=[2]),
+        gpflow.kernels.Linear(active_dims=[2]),
+    ],
+]
+
+
+@pytest.mark.parametrize("kernels", _kernel_setups_shared_distance)
+@pytest.mark.parametrize(
+    "combination, reduction", [[gpflow.kernels.Sum, np.add], [gpflow.kernels.Product, np.multiply]]
+)
+@pytest.mark.parametrize("N, M, D", [[10, 12, 3]])
+def test_combination_shared_distance(kernels, combination, reduction, N, M, D):
+    X, Z = rng.randn(N, D), rng.randn(M, D)
+    kernel = combination(kernels)
+
+    assert_allclose(kernel(X), reduce(reduction, [k(X) for k in kernels]))
+    assert_allclose(kernel(X, Z), reduce(reduction, [k(X, Z) for k in kernels]))
+
+
+@pytest.mark.parametrize("N, M, D", [[10, 12, 3]])
+def test_combination_shared_distance_K(N, M, D):
+    X, Z = rng.randn(N, D), rng.randn(M, D)
+    kernels = _kernel_setups_shared_distance[0]
+    kernel = gpflow.kernels.Sum(kernels)
+
+    assert_allclose(kernel.K(X), sum(k.K(X) for k in kernels))
+    assert_allclose(kernel.K(X, Z), sum(k.K(X, Z) for k in kernels))
+
+
+def test_combination_shared_distance_groups():
+    kernel = gpflow.kernels.Sum(
+        [
+            gpflow.kernels.Matern12(active_dims=[0, 1]),
+            gpflow.kernels.SquaredExponential(active_dims=[0, 1]),
+            gpflow.kernels.SquaredExponential(lengthscales=[1.0, 2.0], active_dims=[0, 1]),
+            gpflow.kernels.Matern52(active_dims=[1]),
+            gpflow.kernels.Matern32(),
+            gpflow.kernels.Exponential(),
+            gpflow.kernels.Cosine(),
+        ]
+    )
+    assert kernel._shared_distance_groups() == [[0, 1], [2], [3], [4, 5], [6]]
+
+
+@pytest.mark.parametrize(
+    "kernel_class",
+    [
+        gpflow.kernels.SquaredExponential,
+        gpflow.kernels.Exponential,
+        gpflow.kernels.Matern12,
+        gpflow.kernels.Matern32,
+        gpflow.kernels.Matern52,
+    ],
+)
+@pytest.mark.parametrize("lengthscales", [0.7, [0.5, 1.3, 2.0]])
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_stationary_custom_gradient(kernel_class, lengthscales, symmetric):
+    """
+    The hand-written gradients of `IsotropicStationary.K` must match automatic
+    differentiation through `K_r2(scaled_squared_euclid_dist(X, X2))`, including
+    second-order derivatives.
+    """
+    kernel = kernel_class(variance=1.7, lengthscales=lengthscales)
+    X = tf.Variable(rng.randn(6, 3))
+    X2 = None if symmetric else tf.Variable(rng.randn(4, 3))
+    weights = rng.randn(6, 6 if symmetric else 4)
+    variables = kernel.trainable_variables + ((X,) if symmetric else (X, X2))
+
+    def gradients(K_fn):
+        with tf.GradientTape() as outer_tape:
+            with tf.GradientTape() as tape:
+                loss = tf.reduce_sum(weights * K_fn(X, X2))
+            grads = tape.gradient(loss, variables)
+            flat_grads = tf.concat([tf.reshape(g, [-1]) for g in grads], axis=0)
+        return grads, outer_tape.jacobian(flat_grads, kernel.trainable_variables)
+
+    def autodiff_K(X, X2):
+        return kernel.K_r2(kernel.scaled_squared_euclid_dist(X, X2))
+
+    grads, hessians = gradients(kernel.K)
+    expected_grads, expected_hessians = gradients(autodiff_K)
+    for actual, expected in zip(grads + hessians, expected_grads + expected_hessians):
+        assert_allclose(actual, expected, rtol=1e-6, atol=1e-10)
+
+
+def test_stationary_custom_gradient_overridden_subclass():
+    """
+    Subclasses that override `K_r2` or `K_r` must not inherit the parent's `dK_dr2`.
+    """
+
+    class _SquaredExponential(gpflow.kernels.SquaredExponential):
+        def K_r2(self, r2):
+            return self.variance * tf.exp(-r2)
+
+    class _Matern32(gpflow.kernels.Matern32):
+        def K_r(self, r):
+            return self.variance * tf.exp(-r)
+
+    X = tf.Variable(rng.randn(6, 3))
+    for kernel in [_SquaredExponential(lengthscales=0.7), _Matern32(lengthscales=0.7)]:
+        assert not kernel._has_analytic_gradient()
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(kernel.K(X))
+        grads = tape.gradient(loss, (X,) + kernel.trainable_variables)
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(kernel.K_r2(kernel.scaled_squared_euclid_dist(X)))
+        expected_grads = tape.gradient(loss, (X,) + kernel.trainable_variables)
+        for actual, expected in zip(grads, expected_grads):
+            assert_allclose(actual, expected)
+    assert gpflow.kernels.Matern32()._has_analytic_gradient()
+
+
+def test_stationary_unknown_rank():
+    kernel = gpflow.kernels.SquaredExponential(lengthscales=0.7)
+    X = rng.randn(6, 3)
+    K = tf.function(kernel.K, input_signature=[tf.TensorSpec(None, tf.float64)])
+    assert_allclose(K(X), kernel.K(X))
+
+
+@pytest.mark.parametrize("lengthscales", [1.3, [0.5, 1.3, 2.0]])
+@pytest.mark.parametrize("N, M, D", [[11, 5, 3]])
+def test_cosine_projection(lengthscales, N, M, D):
+    kernel = gpflow.kernels.Cosine(variance=1.7, lengthscales=lengthscales)
+    X, X2 = rng.randn(N, D), rng.randn(M, D)
+    for args in [(X,), (X, X2), (rng.randn(2, N, D), X2)]:
+        expected = kernel.K_d(kernel.scaled_difference_matrix(*args))
+        assert_allclose(kernel.K(*args), expected)
+
+
+@pytest.mark.parametrize("difference_block_size", [1, 4, 11, 20])
+@pytest.mark.parametrize("N, M, D", [[11, 5, 3]])
+def test_anisotropic_difference_blocks(difference_block_size, N, M, D):
+    class _AnisotropicLaplace(gpflow.kernels.AnisotropicStationary):
+        def K_d(self, d):
+            return self.variance * tf.exp(-tf.reduce_sum(tf.abs(d), axis=-1))
+
+    kernel = _AnisotropicLaplace(lengthscales=[0.5, 1.3, 2.0])
+    blocked_kernel = _AnisotropicLaplace(
+        lengthscales=[0.5, 1.3, 2.0], difference_block_size=difference_block_size
+    )
+    X, X2 = rng.randn(N, D), rng.randn(M, D)
+    for args in [(X,), (X, X2)]:
+        assert_allclose(blocked_kernel(*args), kernel(*args))
+        with tf.GradientTape(persistent=True) as tape:
+            K = tf.reduce_sum(kernel(*args))
+            blocked_K = tf.reduce_sum(blocked_kernel(*args))
+        grads = tape.gradient(K, kernel.trainable_variables)
+        blocked_grads = tape.gradient(blocked_K, blocked_kernel.trainable_variables)
+        for grad, blocked_grad in zip(grads, blocked_grads):
+            assert_allclose(blocked_grad, grad)
+
+    # inputs of unknown rank are evaluated without blocks
+    unknown_rank = [tf.TensorSpec(None, tf.float64)] * 2
+    K = tf.function(blocked_kernel.K, input_signature=unknown_rank)
+    assert_allclose(K(X, X2), kernel(X, X2))
+
+
 @pytest.mark.parametrize("D", [4, 7])
 def test_ard_init_scalar(D):
     """
@@ -488,6 +744,20 @@ def test_changepoints(N, kernels, locations, steepness):
     _assert_changepoints_kern_err(X_data, kernels, locations, steepness)
 
 
+def test_changepoints_cross_covariance_and_diag():
+    N, M = 7, 4
+    kernel = gpflow.kernels.ChangePoints(
+        [gpflow.kernels.Matern12(), gpflow.kernels.Linear(), gpflow.kernels.SquaredExponential()],
+        locations=[-0.5, 0.5],
+        steepness=[5.0, 2.0],
+    )
+    X, X2 = rng.randn(N, 1), rng.randn(M, 1)
+    full_gram_matrix = kernel(np.concatenate([X, X2]))
+
+    assert_allclose(kernel(X, X2), full_gram_matrix[:N, N:])
+    assert_allclose(kernel(X, full_cov=False), np.diag(full_gram_matrix)[:N])
+
+
 @pytest.mark.parametrize(
     "active_dims_1, active_dims_2, is_separate",
     [
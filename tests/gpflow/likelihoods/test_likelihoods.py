@@ -31,9 +31,10 @@ from gpflow.likelihoods import (
     MultiClass,
     Ordinal,
     Poisson,
+    Softmax,
     StudentT,
 )
-from gpflow.quadrature import ndiagquad
+from gpflow.quadrature import MONTE_CARLO_SAMPLING, ndiagquad, standard_normal_samples
 from gpflow.config import default_float, default_int
 import gpflow.ci_utils
 
@@ -248,3 +249,80 @@ def test_montecarlo_predict_mean_and_var(likelihood_var, mu, var, y):
     mean2, var2 = likelihood_gaussian.predict_mean_and_var(mu, var)
     assert_allclose(mean1, mean2, rtol=5e-4, atol=1e-4)
     assert_allclose(var1, var2, rtol=5e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("scheme", ["smolyak", "cubature"])
+def test_quadrature_scheme_opt_in(scheme):
+    likelihood = gpflow.likelihoods.Bernoulli()
+    Fmu, Fvar = Datum.Fmu, Datum.Fvar
+    Y = tf.cast(Datum.Y > 0, default_float())
+    expected = likelihood.variational_expectations(Fmu, Fvar, Y)
+    likelihood.quadrature_scheme = scheme
+    # in one dimension, the Smolyak grid is the Gauss-Hermite rule
+    atol = 1e-2 if scheme == "cubature" else 1e-12
+    assert_allclose(likelihood.variational_expectations(Fmu, Fvar, Y), expected, atol=atol)
+
+
+@pytest.mark.parametrize(
+    "likelihood, Y",
+    [
+        (Bernoulli(), tf.cast(Datum.Y > 0, default_float())),
+        (Gamma(invlink=tf.square), tf.square(Datum.Y) + 0.1),
+        (StudentT(), Datum.Y),
+    ],
+)
+def test_adaptive_quadrature_orders(likelihood, Y):
+    """ Data with small variances are integrated with fewer points at the same accuracy """
+    Fvar = tf.where(Datum.Fmu > 0, 1e-8 * Datum.Fvar, Datum.Fvar + 0.5)
+    expected_ve = likelihood.variational_expectations(Datum.Fmu, Fvar, Y)
+    expected_lpd = likelihood.predict_log_density(Datum.Fmu, Fvar, Y)
+    expected_mean, expected_var = likelihood.predict_mean_and_var(Datum.Fmu, Fvar)
+
+    likelihood.adaptive_quadrature_orders = [(1e-6, 3), (1e-3, 8)]
+    assert_allclose(likelihood.variational_expectations(Datum.Fmu, Fvar, Y), expected_ve)
+    assert_allclose(likelihood.predict_log_density(Datum.Fmu, Fvar, Y), expected_lpd)
+    mean, var = likelihood.predict_mean_and_var(Datum.Fmu, Fvar)
+    assert_allclose(mean, expected_mean)
+    assert_allclose(var, expected_var)
+
+
+@pytest.mark.parametrize(
+    "sampling, control_variates",
+    [("antithetic", False), ("sobol", False), ("random", True), ("sobol", True)],
+)
+def test_montecarlo_variance_reduction(sampling, control_variates):
+    """ The variance reduction strategies are (nearly) unbiased and lower the variance """
+    rng = np.random.RandomState(0)
+    num_classes, num_repetitions = 5, 50
+    Fmu, Fvar = rng.randn(10, num_classes), 2 * rng.rand(10, num_classes)
+    Y = rng.randint(0, num_classes, (10, 1))
+
+    def estimates(likelihood):
+        likelihood.num_monte_carlo_points = 16
+        return np.stack(
+            [likelihood.variational_expectations(Fmu, Fvar, Y) for _ in range(num_repetitions)]
+        )
+
+    tf.random.set_seed(0)
+    likelihood = Softmax(num_classes)
+    likelihood.num_monte_carlo_points = 100000
+    expected = likelihood.variational_expectations(Fmu, Fvar, Y)
+    baseline = estimates(Softmax(num_classes))
+
+    likelihood = Softmax(num_classes)
+    likelihood.monte_carlo_sampling = sampling
+    likelihood.control_variates = control_variates
+    reduced = estimates(likelihood)
+    assert np.mean(np.std(reduced, 0)) < 0.75 * np.mean(np.std(baseline, 0))
+    assert_allclose(np.mean(reduced, 0), expected, atol=0.1)
+
+
+def test_standard_normal_samples():
+    tf.random.set_seed(0)
+    for sampling in MONTE_CARLO_SAMPLING:
+        samples = standard_normal_samples(4096, 3, 2, sampling).numpy()
+        assert samples.shape == (4096, 3, 2)
+        assert_allclose(np.mean(samples, 0), np.zeros((3, 2)), atol=0.1)
+        assert_allclose(np.var(samples, 0), np.ones((3, 2)), atol=0.1)
+    with pytest.raises(ValueError):
+        standard_normal_samples(4, 3, 2, "halton")
@@ -193,3 +193,55 @@ def test_multiclass_quadrature_predict_log_density():
 )
 def test_multiclass_quadrature_predict_mean_and_var():
     pass
+
+
+@pytest.mark.parametrize("num_classes", [3, 10])
+def test_multiclass_vectorized_prediction(num_classes):
+    rng = np.random.RandomState(1)
+    Fmu = rng.randn(15, num_classes)
+    Fvar = 0.01 + 2 * rng.rand(15, num_classes)
+    likelihood = MultiClass(num_classes)
+    expected_mean, expected_var = likelihood.predict_mean_and_var(Fmu, Fvar)
+
+    likelihood.vectorized_prediction = True
+    mean, var = likelihood.predict_mean_and_var(Fmu, Fvar)
+    assert_allclose(mean, expected_mean, atol=1e-4)
+    assert_allclose(var, expected_var, atol=1e-4)
+
+    likelihood.prediction_top_k = num_classes
+    assert_allclose(likelihood.predict_mean_and_var(Fmu, Fvar)[0], mean)
+
+
+def test_multiclass_vectorized_prediction_top_k():
+    """ Classes with much smaller latent means are (almost) never the largest """
+    num_classes, top_k = 20, 3
+    rng = np.random.RandomState(2)
+    Fmu = np.hstack([rng.randn(15, top_k), rng.randn(15, num_classes - top_k) - 20.0])
+    Fmu = Fmu[:, rng.permutation(num_classes)]
+    Fvar = 0.01 + rng.rand(15, num_classes)
+    likelihood = MultiClass(num_classes)
+    likelihood.vectorized_prediction = True
+    expected_mean, _ = likelihood.predict_mean_and_var(Fmu, Fvar)
+
+    likelihood.prediction_top_k = top_k
+    mean, _ = likelihood.predict_mean_and_var(Fmu, Fvar)
+    assert_allclose(mean, expected_mean, rtol=1e-3)
+    is_top_k = Fmu >= np.sort(Fmu, axis=1)[:, -top_k : -top_k + 1]
+    assert_allclose(mean.numpy()[~is_top_k], likelihood.invlink.eps_k1.numpy())
+
+
+def test_multiclass_vectorized_prediction_spread_means():
+    """
+    Data whose means are far apart relative to their standard deviations would need
+    a very fine grid; they are evaluated exactly instead.
+    """
+    num_classes = 10
+    rng = np.random.RandomState(3)
+    Fmu = rng.randn(20, num_classes) * np.where(np.arange(20) % 2 == 0, 30.0, 1.0)[:, None]
+    Fvar = np.where(np.arange(20) % 2 == 0, 1e-3, 1.0)[:, None] * rng.uniform(0.5, 2.0, Fmu.shape)
+    likelihood = MultiClass(num_classes)
+    expected_mean, _ = likelihood.predict_mean_and_var(Fmu, Fvar)
+
+    likelihood.vectorized_prediction = True
+    mean, _ = likelihood.predict_mean_and_var(Fmu, Fvar)
+    assert_allclose(mean, expected_mean, atol=1e-6)
@@ -143,3 +143,104 @@ def test_switched_likelihood_regression_valid_num_latent_gps(num_latent_gps):
     else:
         with pytest.raises(tf.errors.InvalidArgumentError):
             _ = m.training_loss(data)
+
+
+def _switched_data(num_groups=3, N=20, L=2):
+    rng = np.random.RandomState(1)
+    labels = rng.randint(0, num_groups, (N, 1)).astype(np.float64)
+    Y = np.hstack([rng.randn(N, L), labels])
+    return rng.randn(N, L), rng.rand(N, L) + 0.1, Y
+
+
+def _student_t_likelihoods():
+    return [StudentT(scale=scale, df=4.0) for scale in [0.5, 1.0, 2.0]]
+
+
+def _gaussian_likelihoods():
+    return [Gaussian(variance=variance) for variance in [0.5, 1.0, 2.0]]
+
+
+@pytest.mark.parametrize("make_likelihoods", [_student_t_likelihoods, _gaussian_likelihoods])
+@pytest.mark.parametrize("vectorize, precompute", [(False, True), (True, False)])
+def test_switched_likelihood_static_paths(vectorize, precompute, make_likelihoods):
+    Fmu, Fvar, Y = _switched_data()
+    likelihoods = make_likelihoods()
+    expected_likelihood = SwitchedLikelihood(likelihoods)
+    switched_likelihood = SwitchedLikelihood(likelihoods, vectorize=vectorize)
+    if precompute:
+        switched_likelihood.precompute_partition(Y)
+
+    assert_allclose(
+        switched_likelihood.log_prob(Fmu, Y), expected_likelihood.log_prob(Fmu, Y),
+    )
+    assert_allclose(
+        switched_likelihood.variational_expectations(Fmu, Fvar, Y),
+        expected_likelihood.variational_expectations(Fmu, Fvar, Y),
+    )
+    assert_allclose(
+        switched_likelihood.predict_log_density(Fmu, Fvar, Y),
+        expected_likelihood.predict_log_density(Fmu, Fvar, Y),
+    )
+
+
+@pytest.mark.parametrize("check_shapes", [True, False])
+def test_switched_likelihood_precomputed_partition_mismatch(check_shapes):
+    Fmu, Fvar, Y = _switched_data()
+    switched_likelihood = SwitchedLikelihood(_student_t_likelihoods())
+    switched_likelihood.precompute_partition(Y)
+    Y_shuffled = Y[::-1].copy()
+    with gpflow.config.as_context(gpflow.config.Config(check_shapes=check_shapes)):
+        with pytest.raises(tf.errors.InvalidArgumentError):
+            switched_likelihood.log_prob(Fmu, Y_shuffled)
+    switched_likelihood.clear_partition()
+    switched_likelihood.log_prob(Fmu, Y_shuffled)
+
+
+def test_switched_likelihood_precomputed_partition_with_vgp():
+    """ The precomputed partition compiles with XLA and its gradients match """
+    X, _, Y = _switched_data(L=1)
+    likelihood = SwitchedLikelihood(_student_t_likelihoods())
+    model = gpflow.models.VGP((X, Y), kernel=gpflow.kernels.Matern32(), likelihood=likelihood)
+    model.q_mu.assign(np.random.RandomState(2).randn(*model.q_mu.shape))
+
+    def loss_and_gradients():
+        with tf.GradientTape() as tape:
+            loss = model.training_loss()
+        return loss, tape.gradient(loss, model.trainable_variables)
+
+    expected_loss, expected_gradients = loss_and_gradients()
+    likelihood.precompute_partition(Y)
+    loss, gradients = tf.function(loss_and_gradients, experimental_compile=True)()
+    assert_allclose(loss, expected_loss)
+    for gradient, expected_gradient in zip(gradients, expected_gradients):
+        assert_allclose(gradient, expected_gradient, atol=1e-10)
+
+
+@pytest.mark.parametrize(
+    "likelihoods",
+    [
+        [StudentT(scale=0.5), Gaussian(variance=0.5), StudentT(scale=2.0)],
+        [StudentT(df=3.0), StudentT(df=4.0), StudentT(df=3.0, scale=2.0)],
+    ],
+)
+def test_switched_likelihood_vectorize_groups(likelihoods):
+    """ Likelihoods of different classes or attributes are vectorized in separate groups """
+    Fmu, Fvar, Y = _switched_data()
+    expected_likelihood = SwitchedLikelihood(likelihoods)
+    switched_likelihood = SwitchedLikelihood(likelihoods, vectorize=True)
+    assert switched_likelihood._vectorization_groups == [[0, 2], [1]]
+
+    assert_allclose(switched_likelihood.log_prob(Fmu, Y), expected_likelihood.log_prob(Fmu, Y))
+    assert_allclose(
+        switched_likelihood.variational_expectations(Fmu, Fvar, Y),
+        expected_likelihood.variational_expectations(Fmu, Fvar, Y),
+    )
+    assert_allclose(
+        switched_likelihood.predict_log_density(Fmu, Fvar, Y),
+        expected_likelihood.predict_log_density(Fmu, Fvar, Y),
+    )
+
+
+def test_switched_likelihood_vectorize_requires_scalar_parameters():
+    with pytest.raises(ValueError):
+        SwitchedLikelihood([StudentT(scale=np.array([1.0, 2.0])), StudentT()], vectorize=True)
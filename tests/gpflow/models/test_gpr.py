@@ -15,6 +15,7 @@
 import gpflow
 import numpy as np
 import pytest
+import tensorflow as tf
 from gpflow import set_trainable
 
 rng = np.random.RandomState(0)
@@ -45,3 +46,156 @@ def test_non_trainable_model_objective():
 
     _ = model.log_marginal_likelihood()
     assert model.log_prior_density() == 0.0
+
+
+def _dense_kronecker_posterior(K, B, Kxs, Kss, noise_variance, Y):
+    """ Reference posterior for the covariance K ⊗ B + σ² I, [N*, P] and [N*, P, N*, P] """
+    num_new, num_outputs = Kss.shape[0], B.shape[0]
+    Kyy = np.kron(K, B) + noise_variance * np.eye(K.shape[0] * num_outputs)
+    Kfy = np.kron(Kxs, B)
+    mean = Kfy @ np.linalg.solve(Kyy, Y.reshape(-1))
+    cov = np.kron(Kss, B) - Kfy @ np.linalg.solve(Kyy, Kfy.T)
+    return (
+        mean.reshape(num_new, num_outputs),
+        cov.reshape(num_new, num_outputs, num_new, num_outputs),
+    )
+
+
+@pytest.mark.parametrize("linear_coregionalization", [True, False])
+def test_kronecker_gpr(linear_coregionalization):
+    P, N, Ntest = 3, Data.N, 4
+    X, Xnew = rng.rand(N, 2), rng.rand(Ntest, 2)
+    Y = rng.randn(N, P)
+    input_kernel = gpflow.kernels.Matern52(lengthscales=[0.7, 1.3])
+    if linear_coregionalization:
+        W = rng.randn(P, 2)
+        kernel = gpflow.kernels.LinearCoregionalization([input_kernel] * 2, W=W)
+        model = gpflow.models.KroneckerGPR((X, Y), kernel, noise_variance=0.3)
+        B = W @ W.T
+    else:
+        coregion = gpflow.kernels.Coregion(output_dim=P, rank=1)
+        coregion.W.assign(rng.randn(P, 1))
+        model = gpflow.models.KroneckerGPR((X, Y), input_kernel, coregion, noise_variance=0.3)
+        B = coregion.output_covariance().numpy()
+
+    K = input_kernel(X).numpy()
+    Kyy = np.kron(K, B) + 0.3 * np.eye(N * P)
+    expected_lml = gpflow.logdensities.multivariate_normal(
+        Y.reshape(-1, 1), np.zeros((N * P, 1)), np.linalg.cholesky(Kyy)
+    )
+    np.testing.assert_allclose(model.log_marginal_likelihood(), expected_lml[0])
+
+    mean, cov = _dense_kronecker_posterior(
+        K, B, input_kernel(Xnew, X).numpy(), input_kernel(Xnew).numpy(), 0.3, Y
+    )
+    f_mean, f_var = model.predict_f(Xnew, full_cov=True, full_output_cov=True)
+    np.testing.assert_allclose(f_mean, mean)
+    np.testing.assert_allclose(f_var, cov, atol=1e-10)
+    _, f_var = model.predict_f(Xnew, full_cov=True, full_output_cov=False)
+    np.testing.assert_allclose(f_var, np.einsum("ipjp->pij", cov), atol=1e-10)
+    _, f_var = model.predict_f(Xnew, full_cov=False, full_output_cov=True)
+    np.testing.assert_allclose(f_var, np.einsum("ipiq->ipq", cov), atol=1e-10)
+    _, f_var = model.predict_f(Xnew, full_cov=False, full_output_cov=False)
+    np.testing.assert_allclose(f_var, np.einsum("ipip->ip", cov), atol=1e-10)
+
+
+def test_kronecker_gpr_matches_coregionalized_gpr():
+    """
+    KroneckerGPR should give the same objective and gradients as a GPR on the
+    stacked data with a product of the input kernel and a Coregion kernel.
+    """
+    P, N = 3, Data.N
+    X, Y = rng.rand(N, 1), rng.randn(N, P)
+    W = rng.randn(P, 2)
+
+    coregion = gpflow.kernels.Coregion(output_dim=P, rank=2)
+    coregion.W.assign(W)
+    model = gpflow.models.KroneckerGPR((X, Y), gpflow.kernels.SquaredExponential(), coregion)
+
+    X_stacked = np.hstack([np.repeat(X, P, axis=0), np.tile(np.arange(P), N)[:, None]])
+    coregion_dense = gpflow.kernels.Coregion(output_dim=P, rank=2, active_dims=[1])
+    coregion_dense.W.assign(W)
+    kernel_dense = gpflow.kernels.SquaredExponential(active_dims=[0]) * coregion_dense
+    model_dense = gpflow.models.GPR((X_stacked, Y.reshape(-1, 1)), kernel_dense)
+
+    with tf.GradientTape(persistent=True) as tape:
+        loss = model.training_loss()
+        loss_dense = model_dense.training_loss()
+    np.testing.assert_allclose(loss, loss_dense)
+    parameters = [
+        model.kernel.variance,
+        model.kernel.lengthscales,
+        model.coregion.W,
+        model.coregion.kappa,
+        model.likelihood.variance,
+    ]
+    parameters_dense = [
+        kernel_dense.kernels[0].variance,
+        kernel_dense.kernels[0].lengthscales,
+        coregion_dense.W,
+        coregion_dense.kappa,
+        model_dense.likelihood.variance,
+    ]
+    grads = tape.gradient(loss, [p.unconstrained_variable for p in parameters])
+    grads_dense = tape.gradient(loss_dense, [p.unconstrained_variable for p in parameters_dense])
+    for grad, grad_dense in zip(grads, grads_dense):
+        np.testing.assert_allclose(grad, grad_dense, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize("linear_coregionalization", [True, False])
+def test_kronecker_gpr_gradients_repeated_eigenvalues(linear_coregionalization):
+    """
+    The default Coregion initialisation gives P - 1 equal eigenvalues of B, a
+    rank-deficient W gives zero eigenvalues of B, and repeated inputs give zero
+    eigenvalues of K: the gradients must still match a dense Kronecker GPR.
+    """
+    P, N, Ntest = 4, 12, 3
+    X, Xnew = rng.rand(N, 1), rng.rand(Ntest, 1)
+    X[1] = X[0]
+    Y = rng.randn(N, P)
+    input_kernel = gpflow.kernels.SquaredExponential()
+    if linear_coregionalization:
+        kernel = gpflow.kernels.LinearCoregionalization([input_kernel] * 2, W=rng.randn(P, 2))
+        model = gpflow.models.KroneckerGPR((X, Y), kernel)
+    else:
+        coregion = gpflow.kernels.Coregion(output_dim=P, rank=1)
+        model = gpflow.models.KroneckerGPR((X, Y), input_kernel, coregion)
+
+    def dense_objectives():
+        B = model.output_covariance()
+        Kyy = tf.experimental.numpy.kron(input_kernel(X), B)
+        Kyy += model.likelihood.variance * tf.eye(N * P, dtype=Kyy.dtype)
+        Kfy = tf.experimental.numpy.kron(input_kernel(Xnew, X), B)
+        mean = Kfy @ tf.linalg.solve(Kyy, Y.reshape(-1, 1))
+        var = tf.linalg.diag_part(tf.experimental.numpy.kron(input_kernel(Xnew), B))
+        var -= tf.reduce_sum(Kfy * tf.transpose(tf.linalg.solve(Kyy, tf.transpose(Kfy))), -1)
+        lml = gpflow.logdensities.multivariate_normal(
+            Y.reshape(-1, 1), tf.zeros((N * P, 1), Kyy.dtype), tf.linalg.cholesky(Kyy)
+        )
+        return -lml[0], tf.reshape(mean, [Ntest, P]), tf.reshape(var, [Ntest, P])
+
+    variables = model.trainable_variables
+    with tf.GradientTape(persistent=True) as outer_tape:
+        with tf.GradientTape(persistent=True) as tape:
+            loss = model.training_loss()
+            mean, var = model.predict_f(Xnew)
+            loss_dense, mean_dense, var_dense = dense_objectives()
+        grads = tape.gradient(loss, variables)
+        grads_dense = tape.gradient(loss_dense, variables)
+        grad_sum = tf.add_n([tf.reduce_sum(g) for g in grads])
+        grad_sum_dense = tf.add_n([tf.reduce_sum(g) for g in grads_dense])
+    np.testing.assert_allclose(loss, loss_dense)
+    for grad, grad_dense in zip(grads, grads_dense):
+        np.testing.assert_allclose(grad, grad_dense, rtol=1e-6, atol=1e-8)
+
+    # second derivatives of the objective, as used by Hessian-based optimizers
+    hessp = outer_tape.gradient(grad_sum, variables)
+    hessp_dense = outer_tape.gradient(grad_sum_dense, variables)
+    for value, value_dense in zip(hessp, hessp_dense):
+        np.testing.assert_allclose(value, value_dense, rtol=1e-6, atol=1e-8)
+
+    for prediction, prediction_dense in [(mean, mean_dense), (var, var_dense)]:
+        grads = outer_tape.gradient(prediction, variables)
+        grads_dense = outer_tape.gradient(prediction_dense, variables)
+        for grad, grad_dense in zip(grads, grads_dense):
+            np.testing.assert_allclose(grad, grad_dense, rtol=1e-6, atol=1e-8)
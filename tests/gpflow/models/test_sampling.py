@@ -0,0 +1,193 @@
+# Copyright 2020 the GPflow authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import gpflow
+from gpflow.models.sampling import (
+    InducingPosteriorSampler,
+    PosteriorSampler,
+    RandomFourierFeatures,
+    pathwise_samples,
+)
+
+rng = np.random.RandomState(0)
+
+
+class Data:
+    N, M, P, D = 20, 5, 2, 2
+    X = rng.rand(N, D) * 4
+    Y = np.sin(X[:, :1]) + np.cos(X[:, 1:]) * np.arange(1, P + 1) + 0.1 * rng.randn(N, P)
+    Xnew = rng.rand(4, D) * 4
+    num_samples = 2000
+    num_features = 2000
+
+
+def _svgp(whiten, q_diag):
+    model = gpflow.models.SVGP(
+        gpflow.kernels.SquaredExponential(lengthscales=[1.0, 1.5]),
+        gpflow.likelihoods.Gaussian(),
+        Data.X[: Data.M].copy(),
+        num_latent_gps=Data.P,
+        whiten=whiten,
+        q_diag=q_diag,
+        mean_function=gpflow.mean_functions.Constant(0.3),
+    )
+    model.q_mu.assign(rng.randn(Data.M, Data.P))
+    if q_diag:
+        model.q_sqrt.assign(rng.rand(Data.M, Data.P))
+    else:
+        model.q_sqrt.assign(np.tril(0.3 * rng.randn(Data.P, Data.M, Data.M)))
+    return model
+
+
+def _sgpr():
+    return gpflow.models.SGPR(
+        (Data.X, Data.Y), gpflow.kernels.Matern52(), Data.X[: Data.M].copy(), noise_variance=0.1,
+    )
+
+
+def _gpr():
+    return gpflow.models.GPR((Data.X, Data.Y), gpflow.kernels.Matern32(), noise_variance=0.1)
+
+
+@pytest.mark.parametrize(
+    "kernel",
+    [
+        gpflow.kernels.SquaredExponential(variance=2.0, lengthscales=[0.5, 1.0]),
+        gpflow.kernels.Exponential(lengthscales=0.7),
+        gpflow.kernels.Matern12(),
+        gpflow.kernels.Matern32(lengthscales=[0.5, 1.0]),
+        gpflow.kernels.Matern52(variance=0.5),
+    ],
+)
+def test_random_fourier_features(kernel):
+    tf.random.set_seed(0)
+    features = RandomFourierFeatures(kernel, input_dim=Data.D, num_features=50000)
+    Phi = features(Data.Xnew)
+    np.testing.assert_allclose(Phi @ tf.transpose(Phi), kernel(Data.Xnew), atol=0.05)
+
+
+@pytest.mark.parametrize(
+    "model_factory",
+    [
+        lambda: _svgp(whiten=True, q_diag=False),
+        lambda: _svgp(whiten=False, q_diag=False),
+        lambda: _svgp(whiten=True, q_diag=True),
+        _sgpr,
+        _gpr,
+    ],
+)
+def test_pathwise_samples_moments(model_factory):
+    tf.random.set_seed(1)
+    model = model_factory()
+    samples = pathwise_samples(model, num_samples=Data.num_samples, num_features=Data.num_features)
+    f = samples(Data.Xnew).numpy()  # [S, N, P]
+    assert f.shape == (Data.num_samples, len(Data.Xnew), Data.P)
+
+    mean, cov = model.predict_f(Data.Xnew, full_cov=True)  # [N, P], [P, N, N]
+    np.testing.assert_allclose(f.mean(0), mean, atol=0.15)
+    empirical_cov = np.einsum("snp,smp->pnm", f - f.mean(0), f - f.mean(0)) / len(f)
+    np.testing.assert_allclose(empirical_cov, cov, atol=0.15)
+
+
+def test_pathwise_samples_are_functions():
+    """ Evaluating a sample twice, or on subsets of inputs, gives consistent values """
+    model = _svgp(whiten=True, q_diag=False)
+    sample = pathwise_samples(model, num_features=64)
+    f = sample(Data.Xnew)
+    assert f.shape == (len(Data.Xnew), Data.P)
+    np.testing.assert_allclose(sample(Data.Xnew), f)
+    np.testing.assert_allclose(sample(Data.Xnew[1:3]), f[1:3])
+
+
+def test_pathwise_samples_unsupported_kernel():
+    model = gpflow.models.GPR((Data.X, Data.Y), gpflow.kernels.Linear())
+    with pytest.raises(NotImplementedError):
+        pathwise_samples(model)
+
+
+def _empirical_moments(f):
+    empirical_cov = np.einsum("snp,smp->pnm", f - f.mean(0), f - f.mean(0)) / len(f)
+    return f.mean(0), empirical_cov
+
+
+@pytest.mark.parametrize(
+    "model_factory", [lambda: _svgp(whiten=False, q_diag=False), _sgpr, _gpr],
+)
+def test_posterior_sampler(model_factory):
+    tf.random.set_seed(2)
+    model = model_factory()
+    sampler = PosteriorSampler(model, Data.Xnew)
+    f = sampler.sample(Data.num_samples).numpy()
+    assert f.shape == (Data.num_samples, len(Data.Xnew), Data.P)
+    assert sampler.sample().shape == (len(Data.Xnew), Data.P)
+
+    mean, cov = model.predict_f(Data.Xnew, full_cov=True)
+    empirical_mean, empirical_cov = _empirical_moments(f)
+    np.testing.assert_allclose(empirical_mean, mean, atol=0.1)
+    np.testing.assert_allclose(empirical_cov, cov, atol=0.1)
+
+
+def test_posterior_sampler_increases_jitter():
+    """ Duplicated inputs give a singular covariance that needs more than the initial jitter """
+    kernel = gpflow.kernels.SquaredExponential(variance=1e4, lengthscales=3.0)
+    model = gpflow.models.GPR((Data.X, Data.Y), kernel, noise_variance=0.1)
+    Xnew = np.concatenate([rng.rand(30, Data.D) * 4] * 2)
+    sampler = PosteriorSampler(model, Xnew, jitter=1e-12)
+    assert sampler.jitter > 1e-12
+    assert np.all(np.isfinite(sampler.sample(3)))
+
+
+@pytest.mark.parametrize(
+    "model_factory",
+    [
+        lambda: _svgp(whiten=True, q_diag=False),
+        lambda: _svgp(whiten=False, q_diag=False),
+        lambda: _svgp(whiten=True, q_diag=True),
+        _sgpr,
+    ],
+)
+def test_inducing_posterior_sampler(model_factory):
+    tf.random.set_seed(3)
+    model = model_factory()
+    mean, cov = model.predict_f(Data.Xnew, full_cov=True)
+
+    sampler = InducingPosteriorSampler(model, Data.Xnew)
+    np.testing.assert_allclose(sampler.mean, mean)
+    f = sampler.sample(Data.num_samples).numpy()
+    assert f.shape == (Data.num_samples, len(Data.Xnew), Data.P)
+    assert sampler.sample().shape == (len(Data.Xnew), Data.P)
+
+    # with the diagonal correction, the marginals are exact
+    empirical_mean, empirical_cov = _empirical_moments(f)
+    np.testing.assert_allclose(empirical_mean, mean, atol=0.1)
+    np.testing.assert_allclose(
+        np.diagonal(empirical_cov, axis1=-2, axis2=-1),
+        np.diagonal(cov, axis1=-2, axis2=-1),
+        rtol=0.15,
+    )
+
+    # without it, the covariance misses the (positive semi-definite) Nyström residual
+    sampler = InducingPosteriorSampler(model, Data.Xnew, diagonal_correction=False)
+    _, low_rank_cov = _empirical_moments(sampler.sample(Data.num_samples).numpy())
+    residual = cov - low_rank_cov
+    assert np.all(np.diagonal(residual, axis1=-2, axis2=-1) > -0.1)
+
+
+def test_inducing_posterior_sampler_unsupported_model():
+    with pytest.raises(NotImplementedError):
+        InducingPosteriorSampler(_gpr(), Data.Xnew)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import tensorflow_probability as tfp
+from numpy.testing import assert_allclose
+
+import gpflow
+from gpflow.optimizers import MultiStart, sample_initial_values
+from gpflow.utilities import read_values, to_default_float
+
+rng = np.random.RandomState(0)
+
+
+class Datum:
+    X = rng.rand(20, 1) * 10
+    Y = np.sin(X) + 0.9 * np.cos(X * 1.6) + rng.randn(*X.shape) * 0.3
+    ranges = {".kernel.lengthscales": (0.1, 10.0), ".likelihood.variance": (0.01, 1.0)}
+
+
+def _create_model():
+    return gpflow.models.GPR((Datum.X, Datum.Y), kernel=gpflow.kernels.SquaredExponential())
+
+
+def test_sample_initial_values():
+    model = _create_model()
+    model.kernel.variance.prior = tfp.distributions.Gamma(
+        to_default_float(2.0), to_default_float(2.0)
+    )
+    samples = sample_initial_values(model, 50, ranges=Datum.ranges, seed=1)
+    assert len(samples) == 50
+    for values in samples:
+        assert set(values) == {".kernel.lengthscales", ".likelihood.variance", ".kernel.variance"}
+        for path, (low, high) in Datum.ranges.items():
+            assert low <= values[path] <= high
+        assert values[".kernel.variance"] > 0
+    variances = [values[".kernel.variance"] for values in samples]
+    assert len(np.unique(variances)) == 50
+
+    repeated = sample_initial_values(model, 50, ranges=Datum.ranges, seed=1)
+    assert_allclose(repeated[-1][".kernel.variance"], samples[-1][".kernel.variance"])
+
+    with pytest.raises(ValueError):
+        sample_initial_values(model, 1, ranges={".kernel.period": (0.0, 1.0)})
+
+
+@pytest.mark.parametrize("num_processes", [0, 2])
+def test_multistart_assigns_best(num_processes):
+    model = _create_model()
+    initial_values = sample_initial_values(model, 4, ranges=Datum.ranges, seed=0)
+    results = MultiStart(_create_model, num_processes=num_processes).minimize(
+        model, initial_values, options=dict(maxiter=50)
+    )
+
+    assert len(results) == 4
+    for result, values in zip(results, initial_values):
+        for path, value in values.items():
+            assert_allclose(result.initial_values[path], value)
+        assert result.scipy_result is not None
+    best = min(results, key=lambda result: result.loss)
+    for path, value in read_values(model).items():
+        assert_allclose(value, best.values[path])
+    assert_allclose(model.training_loss(), best.loss)
+
+    # each restart matches a sequential optimisation from the same initial values
+    reference = _create_model()
+    gpflow.utilities.multiple_assign(reference, initial_values[0])
+    gpflow.optimizers.Scipy().minimize(
+        reference.training_loss, reference.trainable_variables, options=dict(maxiter=50)
+    )
+    assert_allclose(results[0].loss, reference.training_loss(), rtol=1e-6)
+
+
+def test_multistart_skips_failed_restarts():
+    model = _create_model()
+    initial_values = sample_initial_values(model, 2, ranges=Datum.ranges, seed=0)
+    # a huge signal variance and negligible noise make the optimisation fail
+    initial_values.insert(0, {".kernel.variance": 1e30, ".likelihood.variance": 1e-5})
+    results = MultiStart(_create_model, num_processes=0).minimize(model, initial_values)
+
+    assert results[0].loss == np.inf
+    assert results[0].values is None
+    assert np.isfinite(model.training_loss())
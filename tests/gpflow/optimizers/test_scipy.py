@@ -14,12 +14,14 @@
 
 import numpy as np
 import pytest
+import scipy.optimize
 import tensorflow as tf
 from numpy.testing import assert_allclose
 
 import gpflow
 from gpflow.config import default_jitter
 from gpflow.mean_functions import Constant
+from gpflow.optimizers.scipy import PackedVariables
 
 rng = np.random.RandomState(0)
 
@@ -64,3 +66,100 @@ def test_scipy_jit():
     # due to the changes introduced by PR #1213, which removed some implicit casts
     # to float32.
     np.testing.assert_allclose(get_values(m1), get_values(m2), rtol=1e-14, atol=1e-14)
+
+
+def test_scipy_hessp():
+    """ The Hessian-vector products match the Hessian computed with nested tapes """
+    model = _create_full_gp_model()
+    variables = model.trainable_variables
+    opt = gpflow.optimizers.Scipy()
+    x = opt.initial_parameters(variables).numpy()
+    p = rng.randn(*x.shape)
+
+    with tf.GradientTape() as outer_tape:
+        with tf.GradientTape() as inner_tape:
+            loss = model.training_loss()
+        grads = opt.pack_tensors(inner_tape.gradient(loss, variables))
+    jacobians = outer_tape.jacobian(grads, variables)
+    hessian = tf.concat([tf.reshape(j, (len(x), -1)) for j in jacobians], axis=1)
+
+    for compile in [True, False]:
+        hessp = opt.hessp_func(model.training_loss, variables, compile=compile)
+        assert_allclose(hessp(x, p), hessian.numpy() @ p)
+
+
+@pytest.mark.parametrize("method", ["Newton-CG", "trust-ncg", "trust-krylov"])
+def test_scipy_second_order_methods(method):
+    expected_model = _create_full_gp_model()
+    gpflow.optimizers.Scipy().minimize(
+        expected_model.training_loss, expected_model.trainable_variables
+    )
+
+    model = _create_full_gp_model()
+    result = gpflow.optimizers.Scipy().minimize(
+        model.training_loss, model.trainable_variables, method=method
+    )
+    assert result.success
+    assert result.nhev > 0
+    assert_allclose(model.training_loss(), expected_model.training_loss(), rtol=1e-6)
+
+
+@pytest.mark.parametrize("static", [True, False])
+def test_packed_variables(static):
+    shape = None if static else tf.TensorShape(None)
+    variables = [
+        tf.Variable(rng.randn(3, 2), shape=shape),
+        tf.Variable(np.float32(1.0), shape=shape),
+        tf.Variable(rng.randn(4), shape=shape),
+    ]
+    packed = PackedVariables(variables)
+    assert packed.size == (11 if static else None)
+
+    x = rng.randn(11)
+    expected = gpflow.optimizers.Scipy.unpack_tensors(variables, tf.convert_to_tensor(x))
+    for value, expected_value in zip(packed.unpack(tf.convert_to_tensor(x)), expected):
+        assert value.dtype == expected_value.dtype
+        assert_allclose(value, expected_value)
+
+    packed.assign(tf.convert_to_tensor(x))
+    for variable, expected_value in zip(variables, expected):
+        assert_allclose(variable.numpy(), expected_value)
+    packed_values = packed.pack(variables)
+    assert packed_values.dtype == tf.float64
+    assert_allclose(packed_values, x, rtol=1e-6)
+
+
+def test_scipy_eval_func():
+    """ The packed evaluation matches the per-variable unpacking and packing """
+    model = _create_full_gp_model()
+    variables = model.trainable_variables
+    opt = gpflow.optimizers.Scipy()
+    x = opt.initial_parameters(variables).numpy() + 0.1
+
+    for compile in [True, False]:
+        loss, grad = opt.eval_func(model.training_loss, variables, compile=compile)(x)
+        assert grad.dtype == np.float64
+        opt.assign_tensors(variables, opt.unpack_tensors(variables, tf.convert_to_tensor(x)))
+        with tf.GradientTape() as tape:
+            expected_loss = model.training_loss()
+        expected_grad = opt.pack_tensors(tape.gradient(expected_loss, variables))
+        assert_allclose(loss, expected_loss)
+        assert_allclose(grad, expected_grad)
+
+
+def test_scipy_callable_method():
+    """ A custom minimizer can be passed as the method """
+
+    def gradient_descent(fun, x0, args=(), jac=None, maxiter=100, **options):
+        x = x0
+        for _ in range(maxiter):
+            x = x - 0.01 * jac(x)
+        return scipy.optimize.OptimizeResult(x=x, fun=fun(x), success=True, nit=maxiter)
+
+    model = _create_full_gp_model()
+    initial_loss = model.training_loss()
+    result = gpflow.optimizers.Scipy().minimize(
+        model.training_loss, model.trainable_variables, method=gradient_descent
+    )
+    assert result.success
+    assert result.fun < initial_loss
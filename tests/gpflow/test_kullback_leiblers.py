@@ -93,6 +93,37 @@ class Datum:
     K_cholesky = np.linalg.cholesky(K)
 
 
+def _reference_gauss_kl(q_mu, q_sqrt, K):
+    """ Sum of the closed-form KL divergences, computed separately for each latent """
+    kl = 0.0
+    for l in range(q_mu.shape[1]):
+        K_l = K[l] if K.ndim == 3 else K
+        S_l = np.diag(q_sqrt[:, l] ** 2) if q_sqrt.ndim == 2 else q_sqrt[l] @ q_sqrt[l].T
+        K_inv = np.linalg.inv(K_l)
+        kl += 0.5 * (
+            np.trace(K_inv @ S_l)
+            + q_mu[:, l] @ K_inv @ q_mu[:, l]
+            - len(K_l)
+            + np.linalg.slogdet(K_l)[1]
+            - np.linalg.slogdet(S_l)[1]
+        )
+    return kl
+
+
+@pytest.mark.parametrize("diag", [True, False])
+@pytest.mark.parametrize("batched", [True, False])
+@pytest.mark.parametrize("use_cholesky", [True, False])
+def test_gauss_kl_reference(diag, batched, use_cholesky):
+    q_sqrt = Datum.sqrt_diag if diag else Datum.sqrt
+    K = Datum.K_batch if batched else Datum.K
+    expected = _reference_gauss_kl(Datum.mu, q_sqrt, K)
+    if use_cholesky:
+        kl = gauss_kl(Datum.mu, q_sqrt, K_cholesky=np.linalg.cholesky(K))
+    else:
+        kl = gauss_kl(Datum.mu, q_sqrt, K)
+    assert_allclose(kl, expected)
+
+
 @pytest.mark.parametrize("diag", [True, False])
 def test_kl_k_cholesky(diag):
     """
@@ -17,6 +17,7 @@ import pytest
 import tensorflow as tf
 from numpy.testing import assert_allclose
 
+import gpflow
 import gpflow.quadrature as quadrature
 
 
@@ -72,3 +73,100 @@ def test_diagquad_with_kwarg(mu1, var1):
     )
     expected = np.exp(alpha * mu1 + alpha ** 2 * var1 / 2)
     assert_allclose(quad, expected)
+
+
+@pytest.mark.parametrize("D", [1, 2, 3, 4])
+@pytest.mark.parametrize("scheme, H", [("gauss-hermite", 3), ("smolyak", 3), ("cubature", None)])
+def test_quadrature_rule_moments(scheme, H, D):
+    """ All schemes integrate polynomials of total degree up to three exactly """
+    x, w = quadrature.quadrature_rule(scheme, H, D)
+    z = np.sqrt(2.0) * x  # standard normal
+    w = w * np.pi ** (-0.5 * D)
+    assert_allclose(np.sum(w), 1.0)
+    assert_allclose(w @ z, np.zeros(D), atol=1e-12)
+    assert_allclose(np.einsum("q,qi,qj->ij", w, z, z), np.eye(D), atol=1e-12)
+    assert_allclose(w @ z ** 3, np.zeros(D), atol=1e-12)
+
+
+@pytest.mark.parametrize("D", [2, 3])
+def test_smolyak_total_degree(D):
+    x, w = quadrature.smolyak_hermgauss(4, D)
+    z = np.sqrt(2.0) * x
+    w = w * np.pi ** (-0.5 * D)
+    # E[z1^4 z2^2] = 3 has total degree 6 <= 2 * 4 - 1
+    assert_allclose(w @ (z[:, 0] ** 4 * z[:, 1] ** 2), 3.0)
+    assert len(w) < 4 ** D * 2
+
+
+def test_smolyak_1d_is_gauss_hermite():
+    x, w = quadrature.smolyak_hermgauss(7, 1)
+    gh_x, gh_w = quadrature.hermgauss(7)
+    order = np.argsort(x[:, 0])
+    assert_allclose(x[order, 0], gh_x)
+    assert_allclose(w[order], gh_w)
+
+
+@pytest.mark.parametrize("logspace", [True, False])
+@pytest.mark.parametrize("scheme, H", [("smolyak", 8), ("cubature", None)])
+def test_diagquad_schemes(scheme, H, logspace):
+    """ Smooth integrands of three Gaussians with fewer evaluations than the tensor grid """
+    mus = [np.array([0.3, -0.2]), np.array([0.1, 0.0]), np.array([-0.5, 0.4])]
+    variances = [np.array([0.2, 0.1]), np.array([0.05, 0.3]), np.array([0.1, 0.1])]
+    alphas = [0.5, -0.3, 0.2]
+    if logspace:
+        func = lambda *X: sum(a * x for a, x in zip(alphas, X))
+    else:
+        func = lambda *X: tf.exp(sum(a * x for a, x in zip(alphas, X)))
+    quad = quadrature.ndiagquad(func, H, mus, variances, logspace=logspace, scheme=scheme)
+    log_expected = sum(a * m + a ** 2 * v / 2 for a, m, v in zip(alphas, mus, variances))
+    expected = log_expected if logspace else np.exp(log_expected)
+    # the third-degree cubature rule is only approximate for these integrands
+    assert_allclose(quad, expected, atol=1e-3 if scheme == "cubature" else 1e-10)
+
+
+def test_mvnquad_scheme():
+    means = np.array([[0.3, -0.2], [1.0, 0.5]])
+    covs = np.array([[[1.0, 0.3], [0.3, 0.5]], [[0.4, -0.1], [-0.1, 0.2]]])
+    quad = quadrature.mvnquad(lambda X: X ** 2, means, covs, H=2, scheme="smolyak")
+    expected = means ** 2 + np.diagonal(covs, axis1=1, axis2=2)
+    assert_allclose(quad, expected)
+
+
+def test_quadrature_rule_unknown_scheme():
+    with pytest.raises(ValueError):
+        quadrature.quadrature_rule("trapezoid", 5, 2)
+
+
+def test_cached_quadrature_rule():
+    quadrature.clear_quadrature_rule_cache()
+    x, w = quadrature.cached_quadrature_rule("gauss-hermite", 5, 2)
+    assert x.dtype == w.dtype == gpflow.default_float()
+    gh_x, gh_w = quadrature.mvhermgauss(5, 2)
+    assert_allclose(x, gh_x)
+    assert_allclose(w, gh_w)
+    assert quadrature.cached_quadrature_rule("gauss-hermite", 5, 2)[0] is x
+    assert quadrature.cached_quadrature_rule("gauss-hermite", 5, 2, tf.float32)[0] is not x
+    quadrature.clear_quadrature_rule_cache()
+    assert quadrature.cached_quadrature_rule("gauss-hermite", 5, 2)[0] is not x
+
+
+def test_cached_quadrature_rule_in_tf_function():
+    """ Rules first requested while tracing are created eagerly and captured by the graph """
+    quadrature.clear_quadrature_rule_cache()
+    H, Din = 10, 3
+
+    @tf.function
+    def integrate(mu, var):
+        return quadrature.ndiagquad(lambda *X: tf.exp(sum(X)), H, [mu] * Din, [var] * Din)
+
+    mu, var = np.array([0.1, 0.2]), np.array([0.3, 0.4])
+    assert_allclose(integrate(mu, var), np.exp(Din * (mu + var / 2)))
+    x, _ = quadrature.cached_quadrature_rule("gauss-hermite", H, Din)
+    assert isinstance(x.numpy(), np.ndarray)
+    graph = integrate.get_concrete_function(mu, var).graph
+    constant_sizes = [
+        np.prod([dim.size for dim in op.get_attr("value").tensor_shape.dim])
+        for op in graph.get_operations()
+        if op.type == "Const"
+    ]
+    assert max(constant_sizes) < H ** Din